@@ -0,0 +1,4 @@
+from .candles import Candles, LoadCandles
+from .engine import SimulateCall, SweepCalls, SweepGrid, ParseStopLoss, ParseTakeProfits
+
+__all__ = ["Candles", "LoadCandles", "SimulateCall", "SweepCalls", "SweepGrid", "ParseStopLoss", "ParseTakeProfits"]
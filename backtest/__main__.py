@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+import argparse
+import time
+import numpy as np
+
+from backtest import LoadCandles, SweepGrid
+
+
+def Main():
+    parser = argparse.ArgumentParser(description="Replay historical 1m candles through the call logic for a grid of call parameters.")
+    parser.add_argument("candles", help="CSV or Parquet file with the columns time, open, high, low, close, volume")
+    parser.add_argument("--entry", nargs="+", type=float, required=True, help="Entry prices")
+    parser.add_argument("--stoploss", nargs="+", required=True, help="Stop losses as price or percentage below the entry, e.g. 10%%")
+    parser.add_argument("--targets", nargs="+", required=True,
+                        help='Take profit ladders as /addcall accepts them, one quoted ladder per value, e.g. "50@10%% 50@20%%"')
+    parser.add_argument("--investment", type=float, default=100.0, help="Buy in amount of every call")
+    parser.add_argument("--top", type=int, default=10, help="Number of best combinations to show")
+    args = parser.parse_args()
+
+    candles = LoadCandles(args.candles)
+    ladders = [ladder.split() for ladder in args.targets]
+
+    startTime = time.perf_counter()
+    result = SweepGrid(candles, args.entry, args.stoploss, ladders, args.investment)
+    duration = time.perf_counter() - startTime
+    print(f"Replayed {len(candles)} candles for {len(result['parameters'])} calls in {duration:.3f}s")
+
+    statusNames = ["ACQUIRING", "ACTIVE", "CLOSED"]
+    for idx in np.argsort(-result["total"])[:args.top]:
+        entryPrice, stopLoss, ladder = result["parameters"][idx]
+        status = statusNames[result["status"][idx]] + (" (Stop Loss)" if result["stopped"][idx] else "")
+        print(f"entry {entryPrice} stop loss {stopLoss} targets {ladder}: "
+              f"{result['total'][idx]:.2f} {result['percentage'][idx]:.2f}% {status}, {result['targetsHit'][idx]} targets hit")
+
+
+if __name__ == "__main__":
+    Main()
@@ -0,0 +1,65 @@
+import numpy as np
+
+
+class Candles:
+    """
+    OHLCV candles as NumPy arrays, in the ccxt column order [time, open, high, low, close, volume]
+    with the time in milliseconds.
+    """
+    COLUMNS = ("time", "open", "high", "low", "close", "volume")
+
+    def __init__(self, time, open, high, low, close, volume=None):
+        self.time = np.asarray(time, dtype=np.int64)
+        self.open = np.asarray(open, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+        self.volume = np.zeros(len(self.time)) if volume is None else np.asarray(volume, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def __getitem__(self, index) -> "Candles":
+        return Candles(self.time[index], self.open[index], self.high[index],
+                       self.low[index], self.close[index], self.volume[index])
+
+    def __repr__(self):
+        return f"<Candles count={len(self)} first={self.time[0] if len(self) else None} last={self.time[-1] if len(self) else None}>"
+
+    @classmethod
+    def FromArray(cls, ohlcv) -> "Candles":
+        """Create the candles from rows as returned by ccxt fetchOHLCV."""
+        ohlcv = np.asarray(ohlcv, dtype=np.float64).reshape(-1, 6)
+        return cls(ohlcv[:, 0], ohlcv[:, 1], ohlcv[:, 2], ohlcv[:, 3], ohlcv[:, 4], ohlcv[:, 5])
+
+
+def LoadCandles(path: str) -> Candles:
+    """
+    Load candles from a CSV or Parquet file with the columns time, open, high, low, close and volume.
+    CSV files without a header are read in that column order. Reading Parquet requires pandas.
+    """
+    if path.endswith(".parquet"):
+        try:
+            import pandas
+        except ImportError:
+            raise ValueError("Reading Parquet files requires pandas and pyarrow to be installed.")
+        frame = pandas.read_parquet(path, columns=list(Candles.COLUMNS))
+        candles = Candles(*(frame[column].to_numpy() for column in Candles.COLUMNS))
+    else:
+        with open(path, newline="") as file:
+            firstLine = file.readline()
+        hasHeader = not firstLine.split(",")[0].strip().lstrip("-").replace(".", "", 1).isdigit()
+        if hasHeader:
+            header = [column.strip().lower() for column in firstLine.split(",")]
+            missing = [column for column in Candles.COLUMNS[:5] if column not in header]
+            if missing:
+                raise ValueError(f"Missing columns in {path}: {', '.join(missing)}")
+            usecols = [header.index(column) for column in Candles.COLUMNS if column in header]
+        else:
+            usecols = list(range(len(Candles.COLUMNS)))
+        data = np.loadtxt(path, delimiter=",", skiprows=1 if hasHeader else 0, usecols=usecols, ndmin=2)
+        candles = Candles(*(data[:, idx] for idx in range(data.shape[1])))
+
+    # Replay in time order
+    order = np.argsort(candles.time, kind="stable")
+    return candles[order]
@@ -0,0 +1,165 @@
+import itertools
+from typing import List
+import numpy as np
+from .candles import Candles
+
+ACQUIRING = 0
+ACTIVE = 1
+CLOSED = 2
+
+
+def ParseStopLoss(entryPrice: float, stopLoss: str) -> float:
+    """Parse a stop loss as /addcall accepts it, a price or a percentage below the entry."""
+    if stopLoss.endswith('%'):
+        return entryPrice * (1 - float(stopLoss[:-1]) / 100)
+    return float(stopLoss)
+
+
+def ParseTakeProfits(entryPrice: float, takeProfits: List[str]) -> List[dict]:
+    """
+    Parse take profits as /addcall accepts them, a price or a percentage above the entry,
+    optionally prefixed with the batch size in percent, e.g. 20@20% 20@50% 60@100%.
+    """
+    result = []
+    for targetPrice in takeProfits:
+        if "@" in targetPrice:
+            batchSize, targetPrice = targetPrice.split("@")
+            batchSize = float(batchSize) / 100
+        else:
+            batchSize = 1 / len(takeProfits)
+
+        if targetPrice.endswith('%'):
+            targetPrice = entryPrice * (1 + float(targetPrice[:-1]) / 100)
+        else:
+            targetPrice = float(targetPrice)
+        result.append({"targetPrice": targetPrice, "size": batchSize})
+    return result
+
+
+def SweepCalls(candles: Candles, entryPrices, stopLosses, targetPrices, targetSizes, investment: float = 100.0) -> dict:
+    """
+    Replay the candles for many calls at once with the semantics of Call.Update, all calls
+    starting at the first candle.
+
+    entryPrices and stopLosses have a value per call. targetPrices and targetSizes have a row
+    per call, unused targets are padded with NaN prices. Every threshold is resolved to the
+    first candle that crosses it, found with a binary search on the running minimum of the
+    lows and the running maximum of the highs after the activation:
+     • activation at the first candle with low <= entry, buying at the high of that candle
+       when it stays below the entry
+     • stop loss at the first candle from the activation with low <= stop loss, the stop
+       loss is checked before the targets of the same candle
+     • a take profit is triggered when its first candle with high >= target comes before
+       the stop loss, the call closes when all take profits are triggered
+
+    Returns a dictionary of arrays with a value per call.
+    """
+    entryPrices = np.asarray(entryPrices, dtype=np.float64)
+    stopLosses = np.asarray(stopLosses, dtype=np.float64)
+    targetPrices = np.asarray(targetPrices, dtype=np.float64).reshape(len(entryPrices), -1)
+    targetSizes = np.nan_to_num(np.asarray(targetSizes, dtype=np.float64).reshape(targetPrices.shape))
+    nrOfCandles = len(candles)
+    if nrOfCandles == 0:
+        raise ValueError("No candles to replay.")
+
+    # First candle of which the low reaches the entry
+    activation = np.searchsorted(-np.minimum.accumulate(candles.low), -entryPrices, side='left')
+    activated = activation < nrOfCandles
+
+    stopIndex = np.full(len(entryPrices), nrOfCandles)
+    targetIndex = np.full(targetPrices.shape, nrOfCandles)
+    # Calls with the same entry activate on the same candle and share the running extremes
+    for start in np.unique(activation[activated]):
+        members = np.nonzero(activation == start)[0]
+        lowMin = np.minimum.accumulate(candles.low[start:])
+        highMax = np.maximum.accumulate(candles.high[start:])
+        stopIndex[members] = start + np.searchsorted(-lowMin, -stopLosses[members], side='left')
+        # NaN padded targets sort after everything and are never reached
+        targetIndex[members] = start + np.searchsorted(highMax, targetPrices[members], side='left')
+
+    validTargets = ~np.isnan(targetPrices)
+    hit = activated[:, None] & validTargets & (targetIndex < stopIndex[:, None])
+
+    activationIndex = np.minimum(activation, nrOfCandles - 1)
+    activationHigh = candles.high[activationIndex]
+    buyPrice = np.where(activated & (activationHigh < entryPrices), activationHigh, entryPrices)
+    amount = investment / entryPrices
+    invested = np.where(activated, amount * buyPrice, investment)
+
+    takeProfitAmounts = amount[:, None] * targetSizes
+    result = np.where(activated, -invested, 0.0) + \
+        np.where(hit, takeProfitAmounts * np.nan_to_num(targetPrices), 0.0).sum(axis=1)
+    remaining = np.where(activated, amount - np.where(hit, takeProfitAmounts, 0.0).sum(axis=1), 0.0)
+
+    # Without open take profits the call closes, at the activation when it had no targets
+    lastTarget = np.where(hit, targetIndex, activation[:, None]).max(axis=1, initial=0)
+    allTargets = activated & (hit.sum(axis=1) == validTargets.sum(axis=1)) & (lastTarget < stopIndex)
+    stopped = activated & ~allTargets & (stopIndex < nrOfCandles)
+
+    result = result + np.where(stopped, remaining * stopLosses, 0.0)
+    remaining = np.where(stopped, 0.0, remaining)
+
+    closeIndex = np.where(allTargets, lastTarget, np.where(stopped, stopIndex, nrOfCandles))
+    closed = closeIndex < nrOfCandles
+    status = np.where(closed, CLOSED, np.where(activated, ACTIVE, ACQUIRING))
+    # The value of the coins still held, at the price of the last candle the call was monitored
+    price = candles.close[np.where(closed, closeIndex, nrOfCandles - 1)]
+    value = remaining * price
+    total = result + value
+
+    return {
+        "status": status,
+        "activationIndex": np.where(activated, activation, -1),
+        "closeIndex": np.where(closed, closeIndex, -1),
+        "stopped": stopped,
+        "buyPrice": np.where(activated, buyPrice, np.nan),
+        "targetsHit": hit.sum(axis=1),
+        "result": result,
+        "amount": remaining,
+        "value": value,
+        "total": total,
+        "percentage": total / invested * 100,
+    }
+
+
+def SimulateCall(candles: Candles, entryPrice: float, stopLoss: float, takeProfits: List[dict], investment: float = 100.0) -> dict:
+    """
+    Replay the candles for a single call, with take profits as a list of {"targetPrice", "size"}.
+    """
+    sweep = SweepCalls(candles, [entryPrice], [stopLoss],
+                       [[tp['targetPrice'] for tp in takeProfits] or [np.nan]],
+                       [[tp['size'] for tp in takeProfits] or [0.0]],
+                       investment)
+    result = {key: values[0].item() for key, values in sweep.items()}
+    for key in ("activationIndex", "closeIndex"):
+        result[key.replace("Index", "At")] = int(candles.time[result[key]]) if result[key] >= 0 else None
+    return result
+
+
+def SweepGrid(candles: Candles, entryPrices: List[float], stopLosses: List[str], ladders: List[List[str]], investment: float = 100.0) -> dict:
+    """
+    Sweep every combination of entry price, stop loss and take profit ladder, with the stop
+    losses and take profits as /addcall accepts them. Percentages are relative to the entry.
+    The result has the arrays of SweepCalls plus the parameters of every combination.
+    """
+    combinations = list(itertools.product(entryPrices, stopLosses, ladders))
+    if not combinations:
+        raise ValueError("No combinations to sweep.")
+    width = max(1, max(len(ladder) for ladder in ladders))
+    entries = np.empty(len(combinations))
+    stops = np.empty(len(combinations))
+    targetPrices = np.full((len(combinations), width), np.nan)
+    targetSizes = np.zeros((len(combinations), width))
+    for idx, (entryPrice, stopLoss, ladder) in enumerate(combinations):
+        entries[idx] = float(entryPrice)
+        stops[idx] = ParseStopLoss(float(entryPrice), stopLoss)
+        for column, takeProfit in enumerate(ParseTakeProfits(float(entryPrice), ladder)):
+            targetPrices[idx, column] = takeProfit['targetPrice']
+            targetSizes[idx, column] = takeProfit['size']
+
+    result = SweepCalls(candles, entries, stops, targetPrices, targetSizes, investment)
+    result["entryPrice"] = entries
+    result["stopLoss"] = stops
+    result["targetPrices"] = targetPrices
+    result["parameters"] = [(entryPrice, stopLoss, " ".join(ladder)) for entryPrice, stopLoss, ladder in combinations]
+    return result
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Check of the vectorized backtest engine against the live trigger logic: random calls are
+replayed over random walk candles with SweepCalls and candle by candle with Call.Update,
+and the outcome of every call has to be the same.
+
+The candles are wide enough that calls regularly activate and stop out on the same candle,
+and reach a stop loss and a take profit on the same candle, so the order in which
+Call.Update evaluates them is covered. Prices are rounded to 4 decimals, so the thresholds
+compare the same as floats and as Decimals.
+
+    python -m benchmarks.backtestcheck --calls 300 --candles 2000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+from datetime import datetime
+from decimal import Decimal
+
+import numpy as np
+
+from backtest import Candles, SweepCalls
+from .standins import FakeBot
+
+# Relative difference allowed between the float results of the engine and the Decimal results of Call.Update
+TOLERANCE = 1e-9
+
+
+def CreateCandles(nrOfCandles: int, rng: np.random.Generator) -> Candles:
+    """Random walk candles, with now and then a wide candle that crosses several thresholds at once."""
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.004, nrOfCandles)))
+    width = np.where(rng.random(nrOfCandles) < 0.05, 0.05, 0.005)
+    high = np.round(close * (1 + rng.uniform(0, 1, nrOfCandles) * width), 4)
+    low = np.round(close * (1 - rng.uniform(0, 1, nrOfCandles) * width), 4)
+    close = np.round(close, 4)
+    openPrice = np.concatenate(([close[0]], close[:-1]))
+    startTime = int(datetime(2024, 1, 1).timestamp() * 1000)
+    return Candles(startTime + np.arange(nrOfCandles) * 60000, openPrice,
+                   np.maximum(high, np.maximum(openPrice, close)), np.minimum(low, np.minimum(openPrice, close)), close)
+
+
+def CreateCalls(nrOfCalls: int, candles: Candles, rng: random.Random):
+    """Random entries around the prices of the candles, with up to 4 take profits each."""
+    calls = []
+    for _ in range(nrOfCalls):
+        entryPrice = round(float(candles.close[0]) * rng.uniform(0.85, 1.02), 4)
+        stopLoss = round(entryPrice * rng.uniform(0.85, 0.99), 4)
+        nrOfTargets = rng.randint(0, 4)
+        targets = sorted(round(entryPrice * (1 + rng.uniform(0.005, 0.15)), 4) for _ in range(nrOfTargets))
+        sizes = [round(1 / nrOfTargets, 4)] * nrOfTargets if nrOfTargets else []
+        calls.append((entryPrice, stopLoss, targets, sizes))
+    return calls
+
+
+async def ReplayCall(callId: int, candles: Candles, entryPrice: float, stopLoss: float, targets, sizes) -> dict:
+    """Replay the candles through Call.Update, as the monitor does for a new candle."""
+    import database
+    from crypto import Call
+
+    entry, investment = Decimal(str(entryPrice)), Decimal("100.0")
+    createdAt = datetime.fromtimestamp(candles.time[0] / 1000)
+    dbCall = database.CryptoCall(callId, "", "BTC/USDT", "backtest", entry, Decimal(str(stopLoss)), investment,
+                                 Decimal("0.0"), Decimal("0.0"), Decimal("0.0"), createdAt, None, None, None,
+                                 "acquiring")
+    dbTakeProfits = [database.TakeProfit(callId * 10 + idx, callId, investment / entry * Decimal(str(size)),
+                                         Decimal(str(targetPrice)), Decimal("0.0"), None)
+                     for idx, (targetPrice, size) in enumerate(zip(targets, sizes))]
+    call = Call(dbCall, dbTakeProfits)
+
+    closeIndex = len(candles) - 1
+    for idx in range(len(candles)):
+        klineData = {"low": Decimal(str(candles.low[idx])),
+                     "high": Decimal(str(candles.high[idx])),
+                     "time": datetime.fromtimestamp(candles.time[idx] / 1000),
+                     "close": Decimal(str(candles.close[idx])),
+                     "pair": call.pair}
+        if not await call.Update(klineData):
+            closeIndex = idx
+            break
+
+    indexes = {datetime.fromtimestamp(time / 1000): idx for idx, time in enumerate(candles.time)}
+    activated = dbCall.activatedAt is not None
+    return {
+        "status": call.status.value,
+        "activationIndex": indexes[dbCall.activatedAt] if activated else -1,
+        "closeIndex": indexes[dbCall.closedAt] if dbCall.closedAt is not None else -1,
+        "stopped": dbCall.stopLossTriggered is not None,
+        "buyPrice": float(call.entryPrice) if activated else np.nan,
+        "targetsHit": sum(1 for tp in dbTakeProfits if tp.triggeredAt is not None),
+        "result": float(call.result),
+        "amount": float(call.amount),
+        # The coins still held are valued at the close of the last candle the call was monitored
+        "value": float(call.amount) * float(candles.close[closeIndex]),
+    }
+
+
+def Differs(expected, actual) -> bool:
+    if isinstance(expected, float) or isinstance(actual, float):
+        if np.isnan(expected) and np.isnan(actual):
+            return False
+        return abs(expected - actual) > TOLERANCE * max(1.0, abs(expected))
+    return expected != actual
+
+
+async def Run(args) -> int:
+    rng = np.random.default_rng(args.seed)
+    candles = CreateCandles(args.candles, rng)
+    calls = CreateCalls(args.calls, candles, random.Random(args.seed))
+
+    width = max(1, max(len(targets) for _, _, targets, _ in calls))
+    targetPrices = [targets + [np.nan] * (width - len(targets)) for _, _, targets, _ in calls]
+    targetSizes = [sizes + [0.0] * (width - len(sizes)) for _, _, _, sizes in calls]
+    sweep = SweepCalls(candles, [call[0] for call in calls], [call[1] for call in calls], targetPrices, targetSizes)
+
+    mismatches = 0
+    for idx, (entryPrice, stopLoss, targets, sizes) in enumerate(calls):
+        replayed = await ReplayCall(idx + 1, candles, entryPrice, stopLoss, targets, sizes)
+        differences = {key: (sweep[key][idx].item(), value) for key, value in replayed.items()
+                       if Differs(sweep[key][idx].item(), value)}
+        if differences:
+            mismatches += 1
+            if mismatches <= 10:
+                print(f"call {idx + 1} entry {entryPrice} stop loss {stopLoss} targets {targets}: "
+                      + ", ".join(f"{key} engine {engine} Call.Update {live}" for key, (engine, live) in differences.items()))
+
+    sameCandle = int(np.sum((sweep["activationIndex"] >= 0) & (sweep["activationIndex"] == sweep["closeIndex"])))
+    print(f"{args.calls} calls over {args.candles} candles: {int(np.sum(sweep['status'] == 2))} closed, "
+          f"{int(np.sum(sweep['stopped']))} by stop loss, {sameCandle} closed on their activation candle, "
+          f"{mismatches} differ from Call.Update")
+    return mismatches
+
+
+def Main():
+    parser = argparse.ArgumentParser(description="Check the backtest engine against Call.Update.")
+    parser.add_argument("--calls", type=int, default=300, help="Number of random calls")
+    parser.add_argument("--candles", type=int, default=2000, help="Number of random walk candles")
+    parser.add_argument("--seed", type=int, default=1, help="Seed of the random calls and candles")
+    args = parser.parse_args()
+
+    # Call.Update posts its events through the bot, which reads its settings on import
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "0:backtestcheck")
+    os.environ.setdefault("TELEGRAM_GROUP_CHAT_ID", "0")
+    from bot import CryptoCallBot
+    CryptoCallBot.SetInstance(FakeBot())
+
+    # The changes of the calls are only queued, nothing is written
+    sys.exit(1 if asyncio.run(Run(args)) else 0)
+
+
+if __name__ == "__main__":
+    Main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the per tick evaluation of a pair. The baseline converts the tick prices to
+Decimals and runs Call.Update for every open call on every tick. The monitor rounds them
+to fixed point integers, looks up the calls of which a threshold was crossed in the
+PriceLadder and only creates Decimals and runs Call.Update for those.
+
+The ticks are a random walk that activates the calls and reaches their stop losses and
+targets, so the updates on a crossed threshold are part of what is measured. Both ways
+have to end with the same state of every call.
+
+    python -m benchmarks.hotpath --calls 1000 --ticks 20000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal
+
+from .standins import FakeBot
+
+EXCHANGE = "hotpath"
+PAIR = "BTC/USDT"
+# Ticks per running candle, i.e. about a tick per second
+TICKS_PER_CANDLE = 60
+
+
+def CreateCalls(nrOfCalls: int, price: float, rng: random.Random):
+    """Entries around the start price, a stop loss 10% below and up to 3 targets 5% apart."""
+    calls = []
+    for _ in range(nrOfCalls):
+        entryPrice = Decimal(str(round(price * rng.uniform(0.9, 1.1), 2)))
+        stopLoss = (entryPrice * Decimal("0.9")).quantize(Decimal("0.01"))
+        nrOfTargets = rng.randint(1, 3)
+        targets = [(entryPrice * Decimal(str(1 + step / 20))).quantize(Decimal("0.01"))
+                   for step in range(1, nrOfTargets + 1)]
+        calls.append((entryPrice, stopLoss, targets))
+    return calls
+
+
+def CreateTicks(nrOfTicks: int, price: float, rng: random.Random):
+    """
+    Updates of the running candle as (candle time, low, high, close), a random walk rounded
+    to the tick size. The low and high are the range since the previous tick, which is what
+    the monitor evaluates of an update of the running candle.
+    """
+    startTime = int(datetime(2024, 1, 1).timestamp() * 1000)
+    ticks = []
+    close = price
+    for idx in range(nrOfTicks):
+        previous = close
+        close = round(close * (1 + rng.gauss(0, 0.001)), 2)
+        low = round(min(previous, close) * (1 - rng.uniform(0, 0.0002)), 2)
+        high = round(max(previous, close) * (1 + rng.uniform(0, 0.0002)), 2)
+        ticks.append((startTime + idx // TICKS_PER_CANDLE * 60000, low, high, close))
+    return ticks
+
+
+def BuildCalls(specs):
+    """New calls in their ACQUIRING state, created before the first tick."""
+    import database
+    from crypto import Call
+
+    calls = []
+    investment = Decimal("100.0")
+    createdAt = datetime(2023, 12, 31)
+    for callId, (entryPrice, stopLoss, targets) in enumerate(specs, 1):
+        dbCall = database.CryptoCall(callId, "", PAIR, EXCHANGE, entryPrice, stopLoss, investment, Decimal("0.0"),
+                                     Decimal("0.0"), Decimal("0.0"), createdAt, None, None, None, "acquiring")
+        size = Decimal(1) / len(targets)
+        dbTakeProfits = [database.TakeProfit(callId * 10 + idx, callId, investment / entryPrice * size, targetPrice,
+                                             Decimal("0.0"), None)
+                         for idx, targetPrice in enumerate(targets)]
+        calls.append(Call(dbCall, dbTakeProfits))
+    return calls
+
+
+def GetOutcome(call) -> tuple:
+    return call.status.value, call.result, call.amount
+
+
+async def RunBaseline(calls, ticks) -> int:
+    """The tick prices as Decimals and Call.Update for every open call, returns the number of updates."""
+    openCalls = list(calls)
+    updates = 0
+    for candleTime, low, high, close in ticks:
+        klineData = {"low": Decimal(str(low)),
+                     "high": Decimal(str(high)),
+                     "time": datetime.fromtimestamp(candleTime / 1000),
+                     "close": Decimal(str(close)),
+                     "pair": PAIR}
+        callsToRemove = []
+        for call in openCalls:
+            if not await call.Update(klineData):
+                callsToRemove.append(call)
+        updates += len(openCalls)
+        for call in callsToRemove:
+            openCalls.remove(call)
+    return updates
+
+
+async def RunFixedPoint(calls, ticks) -> int:
+    """
+    The tick prices as fixed point integers, looked up in the PriceLadder as the monitor
+    does, returns the number of updates.
+    """
+    from crypto.fixedpoint import FixedPoint
+    from crypto.priceladder import PriceLadder
+    from crypto.pricestore import PriceStore
+
+    fixedPoint = FixedPoint(2)
+    ladder = PriceLadder(fixedPoint)
+    for call in calls:
+        ladder.Add(call)
+    updates = 0
+    for candleTime, low, high, close in ticks:
+        PriceStore.Set(EXCHANGE, PAIR, fixedPoint.Round(close), fixedPoint)
+        crossed = ladder.GetCrossed(fixedPoint.Floor(low), fixedPoint.Ceil(high))
+        if not crossed:
+            continue
+        klineData = {"low": Decimal(str(low)),
+                     "high": Decimal(str(high)),
+                     "time": datetime.fromtimestamp(candleTime / 1000),
+                     "close": Decimal(str(close)),
+                     "pair": PAIR}
+        for call in crossed:
+            if await call.Update(klineData):
+                ladder.Add(call)
+            else:
+                ladder.Remove(call)
+        updates += len(crossed)
+    return updates
+
+
+async def Run(args) -> bool:
+    import database
+
+    rng = random.Random(args.seed)
+    specs = CreateCalls(args.calls, args.price, rng)
+    ticks = CreateTicks(args.ticks, args.price, rng)
+
+    results, outcomes = {}, {}
+    for name, run in (("baseline", RunBaseline), ("fixed point", RunFixedPoint)):
+        calls = BuildCalls(specs)
+        startTime = time.perf_counter()
+        updates = await run(calls, ticks)
+        duration = time.perf_counter() - startTime
+        results[name] = duration
+        outcomes[name] = [GetOutcome(call) for call in calls]
+        closed = sum(1 for call in calls if call.status == database.CryptoCall.Status.CLOSED)
+        print(f"{name:>12}: {duration:.3f}s, {duration / len(ticks) * 1e6:.2f}µs per tick, "
+              f"{updates} runs of Call.Update, {closed} of {len(calls)} calls closed")
+    print(f"     speedup: {results['baseline'] / results['fixed point']:.2f}x")
+
+    differences = sum(1 for baseline, fixedPoint in zip(outcomes["baseline"], outcomes["fixed point"])
+                      if baseline != fixedPoint)
+    if differences:
+        print(f"{differences} calls ended differently")
+    return differences == 0
+
+
+def Main():
+    parser = argparse.ArgumentParser(description="Benchmark the per tick evaluation of the baseline and of the price ladder.")
+    parser.add_argument("--calls", type=int, default=1000, help="Number of calls on the pair")
+    parser.add_argument("--ticks", type=int, default=20000, help="Number of ticks to evaluate")
+    parser.add_argument("--price", type=float, default=50000.0, help="Start price of the pair")
+    parser.add_argument("--seed", type=int, default=1, help="Seed of the random calls and ticks")
+    args = parser.parse_args()
+
+    # Call.Update posts its events through the bot, which reads its settings on import
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "0:hotpath")
+    os.environ.setdefault("TELEGRAM_GROUP_CHAT_ID", "0")
+    from bot import CryptoCallBot
+    CryptoCallBot.SetInstance(FakeBot())
+
+    # The changes of the calls are only queued, nothing is written
+    sys.exit(0 if asyncio.run(Run(args)) else 1)
+
+
+if __name__ == "__main__":
+    Main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Load test of the monitor with stand-ins for the exchange, the database and the bot.
+
+Open calls are spread over the pairs of a stand-in exchange, loaded by the monitor as on
+startup and driven by random walk OHLCV updates. Every step updates the running candle
+of every watched pair, the next step is emitted once the monitor took all updates. The
+scenario sets the drift of the prices, e.g. a market crash that closes most calls by
+their stop loss. Reported are the update throughput, the candle latency (emitted until
+the monitor was done with it), the decision latency (emitted until the bot was told),
+the database statements per candle and the CPU time.
+
+    python -m benchmarks.loadtest --calls 10000 --pairs 1000 --steps 200 --scenario crash
+
+Runs with the same arguments and seed get the same workload, with --output the results
+are written as JSON together with the commit, to compare them across commits.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from decimal import Decimal
+
+from .standins import FakeExchange, FakePool, FakeBot
+
+
+def Steady(step: int, args) -> float:
+    return 0.0
+
+
+def Crash(step: int, args) -> float:
+    """The prices drop by --drop over --crash-steps steps, starting halfway."""
+    start = args.steps // 2
+    if start <= step < start + args.crash_steps:
+        return math.log(1 - args.drop) / args.crash_steps
+    return 0.0
+
+
+def Pump(step: int, args) -> float:
+    """The prices rise by --drop over --crash-steps steps, starting halfway, hitting the targets."""
+    return -Crash(step, args)
+
+
+SCENARIOS = {"steady": Steady, "crash": Crash, "pump": Pump}
+
+
+def Percentiles(values) -> dict:
+    values = sorted(values)
+    if not values:
+        return {}
+    return {name: values[min(len(values) - 1, int(quantile * len(values)))] * 1000
+            for name, quantile in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0))}
+
+
+def GetCommit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+async def CreateCalls(database, nrOfCalls: int, pairs, exchangeName: str):
+    """Store the open calls, spread evenly over the pairs, around the start prices of the pairs."""
+    createdAt = datetime.now().replace(microsecond=0)
+    callRows = []
+    targetRows = []
+    for idx in range(nrOfCalls):
+        pair = pairs[idx % len(pairs)]
+        decimals = -int(round(math.log10(FakeExchange.startMarkets[pair]['precision']['price'])))
+        price = FakeExchange.startPrices[pair]
+        active = random.random() < 0.6
+        entryPrice = price * (random.uniform(0.99, 1.01) if active else random.uniform(0.97, 0.995))
+        entryPrice = Decimal(str(round(entryPrice, decimals)))
+        amount = Decimal("100.0") / entryPrice
+        callRows.append({"contractAddress": "", "pair": pair, "exchange": exchangeName,
+                         "entryPrice": entryPrice,
+                         "stopLoss": Decimal(str(round(float(entryPrice) * random.uniform(0.85, 0.95), decimals))),
+                         "amount": amount if active else Decimal("0.0"),
+                         "result": Decimal("-100.0") if active else Decimal("0.0"),
+                         "createdAt": createdAt,
+                         "activatedAt": createdAt if active else None,
+                         "status": database.CryptoCall.Status.ACTIVE if active else database.CryptoCall.Status.ACQUIRING})
+        # The take profits sell the bought amount in equal parts
+        targetRows.append([Decimal(str(round(float(entryPrice) * (1 + target * random.uniform(0.02, 0.05)), decimals)))
+                           for target in range(1, 4)])
+    dbCalls = await database.CryptoCall.InsertMany(callRows)
+    await database.TakeProfit.InsertMany(
+        [{"callId": dbCall.id, "targetPrice": targetPrice, "amount": dbCall.investment / dbCall.entryPrice / len(targets)}
+         for dbCall, targets in zip(dbCalls, targetRows) for targetPrice in targets])
+
+
+async def Run(args) -> dict:
+    import database
+    from bot import CryptoCallBot
+    from crypto import CryptoMonitor
+
+    random.seed(args.seed)
+    pairs = [f"C{idx}/USDT" for idx in range(args.pairs)]
+    FakeExchange.CreateMarkets(pairs)
+    pool = FakePool([database.CryptoCall, database.TakeProfit, database.PairState, database.LiveMessage])
+    await database.Database.Init(pool)
+    await CreateCalls(database, args.calls, pairs, FakeExchange.id)
+    pool.Reset()
+    fakeBot = FakeBot()
+    CryptoCallBot.SetInstance(fakeBot)
+
+    # Startup, loading and registering the open calls
+    monitor = CryptoMonitor()
+    startTime, startCpu = time.perf_counter(), time.process_time()
+    await monitor.Initialize()
+    exchange = FakeExchange.instance
+    results = {"startup": {"seconds": time.perf_counter() - startTime, "cpuSeconds": time.process_time() - startCpu,
+                           "statements": sum(pool.statements.values()), "pairs": len(exchange.watched),
+                           "openCalls": len(monitor.GetOpenCalls())}}
+    pool.Reset()
+    fakeBot.latencies.clear()
+
+    # The updates, a step at a time
+    scenario = SCENARIOS[args.scenario]
+    updates = 0
+    startTime, startCpu = time.perf_counter(), time.process_time()
+    for step in range(args.steps):
+        if not exchange.watched:
+            break
+        updates += exchange.Step(scenario(step, args), args.volatility,
+                                 newCandle=step > 0 and step % args.updates_per_candle == 0)
+        if not await exchange.Drained(10.0):
+            print(f"Updates of step {step} were not taken within 10s")
+            break
+    duration = time.perf_counter() - startTime
+    cpu = time.process_time() - startCpu
+    # The queued state changes are part of the load
+    await monitor.Stop()
+    statements = dict(pool.statements)
+    closed = sum(1 for row in pool.tables.get(database.CryptoCall._tableName, {}).values() if row["status"] == "closed")
+
+    results["run"] = {"updates": updates, "seconds": duration, "cpuSeconds": cpu,
+                      "updatesPerSecond": updates / duration if duration else 0.0,
+                      "cpuMicrosecondsPerUpdate": cpu / updates * 1e6 if updates else 0.0,
+                      "candleLatencyMs": Percentiles(exchange.latencies),
+                      "decisions": fakeBot.messages, "significantDecisions": fakeBot.significant,
+                      "decisionLatencyMs": Percentiles(fakeBot.latencies),
+                      "statements": statements, "transactions": pool.transactions,
+                      "statementsPerCandle": sum(statements.values()) / updates if updates else 0.0,
+                      "closedCalls": closed}
+    return results
+
+
+def Report(args, results):
+    startup, run = results["startup"], results["run"]
+    print(f"scenario {args.scenario}: {args.calls} calls on {args.pairs} pairs, {args.steps} steps, "
+          f"{'multiplexed' if args.multiplex else 'a stream per pair'}")
+    print(f"  startup: {startup['seconds']:.2f}s, cpu {startup['cpuSeconds']:.2f}s, "
+          f"{startup['statements']} statements, {startup['openCalls']} open calls on {startup['pairs']} pairs")
+    print(f"  updates: {run['updates']} in {run['seconds']:.2f}s, {run['updatesPerSecond']:.0f}/s, "
+          f"cpu {run['cpuSeconds']:.2f}s, {run['cpuMicrosecondsPerUpdate']:.1f}µs per update")
+    for name, key in (("candle latency", "candleLatencyMs"), ("decision latency", "decisionLatencyMs")):
+        percentiles = run[key]
+        print(f"  {name}: " + (", ".join(f"{quantile} {value:.2f}ms" for quantile, value in percentiles.items())
+                               if percentiles else "none"))
+    print(f"  decisions: {run['decisions']} messages, {run['significantDecisions']} significant, "
+          f"{run['closedCalls']} calls closed")
+    print(f"  database: {run['statementsPerCandle']:.4f} statements per candle, {run['transactions']} transactions, "
+          + ", ".join(f"{kind} {count}" for kind, count in sorted(run['statements'].items())))
+
+
+def Main():
+    parser = argparse.ArgumentParser(description="Load test the monitor with stand-ins for the exchange, database and bot.")
+    parser.add_argument("--calls", type=int, default=10000, help="Number of open calls")
+    parser.add_argument("--pairs", type=int, default=1000, help="Number of pairs the calls are spread over")
+    parser.add_argument("--steps", type=int, default=200, help="Number of updates per pair")
+    parser.add_argument("--updates-per-candle", type=int, default=10, help="Number of updates of every candle")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="steady", help="Price movement of the run")
+    parser.add_argument("--volatility", type=float, default=0.002, help="Standard deviation of the log return per update")
+    parser.add_argument("--drop", type=float, default=0.3, help="Price change of the crash and pump scenarios")
+    parser.add_argument("--crash-steps", type=int, default=5, help="Number of steps of the crash or pump")
+    parser.add_argument("--no-multiplex", dest="multiplex", action="store_false", help="Watch every pair with its own stream")
+    parser.add_argument("--seed", type=int, default=1, help="Seed of the random calls and prices")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--verbose", action="store_true", help="Show the output of the monitor")
+    args = parser.parse_args()
+
+    # The settings are read when the modules are imported
+    os.environ["CRYPTO_MULTIPLEX_STREAMS"] = "true" if args.multiplex else "false"
+    marketCacheDir = tempfile.mkdtemp(prefix="loadtest-markets-")
+    os.environ["CRYPTO_MARKET_CACHE_DIR"] = marketCacheDir
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "0:loadtest")
+    os.environ.setdefault("TELEGRAM_GROUP_CHAT_ID", "0")
+    # The log of the monitor is written as in production, but only shown with --verbose
+    from telemetry import Logger
+    Logger.Start(None if args.verbose else open(os.devnull, "w"))
+    # The monitor creates exchanges by their ccxt.pro name
+    import ccxt.pro
+    setattr(ccxt.pro, FakeExchange.id, FakeExchange)
+
+    try:
+        results = asyncio.run(Run(args))
+    finally:
+        shutil.rmtree(marketCacheDir, ignore_errors=True)
+    Report(args, results)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({"commit": GetCommit(), "arguments": vars(args), "results": results}, file, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    Main()
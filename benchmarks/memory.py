@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Measure the memory of calls kept in memory by the monitor: a Call with its CryptoCall row
+and its TakeProfit rows, as loaded from the database.
+
+    python -m benchmarks.memory --calls 10000 --targets 3
+"""
+import argparse
+import gc
+import tracemalloc
+from datetime import datetime
+from decimal import Decimal
+
+import database
+from crypto import Call
+
+
+def CreateRows(nrOfCalls: int, nrOfTargets: int):
+    """Create the rows of the calls and their take profits as they are returned by the database driver."""
+    rows = []
+    createdAt = datetime.now()
+    for callId in range(1, nrOfCalls + 1):
+        entryPrice = Decimal("50000.1234567890") + callId
+        callRow = (callId, "0x0", "BTC/USDT", "binance", entryPrice, entryPrice * Decimal("0.9"),
+                   Decimal("100.0"), Decimal("0.0020000000"), Decimal("0.0"), Decimal("0.0"),
+                   createdAt, createdAt, None, None, "active")
+        takeProfitRows = [(callId * nrOfTargets + idx, callId, Decimal("0.0006666667"),
+                           entryPrice * (1 + Decimal(idx + 1) / 10), Decimal("0.0"), None)
+                          for idx in range(nrOfTargets)]
+        rows.append((callRow, takeProfitRows))
+    return rows
+
+
+def CreateCalls(rows):
+    return [Call(database.CryptoCall(*callRow), [database.TakeProfit(*row) for row in takeProfitRows])
+            for callRow, takeProfitRows in rows]
+
+
+def Main():
+    parser = argparse.ArgumentParser(description="Measure the memory per call kept in memory.")
+    parser.add_argument("--calls", type=int, default=10000, help="Number of calls to create")
+    parser.add_argument("--targets", type=int, default=3, help="Number of take profits per call")
+    args = parser.parse_args()
+
+    rows = CreateRows(args.calls, args.targets)
+    # The field values are shared with the rows of the driver, only the models are measured
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    calls = CreateCalls(rows)
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    print(f"{len(calls)} calls with {args.targets} take profits: {used / 1024 / 1024:.2f} MiB, "
+          f"{used / len(calls):.0f} bytes per call")
+
+
+if __name__ == "__main__":
+    Main()
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark of the per row cost of the models: decoding rows as returned by the
+database driver and encoding the changed fields of a row for an UPDATE.
+
+    python -m benchmarks.models --rows 100000
+"""
+import argparse
+import time
+from decimal import Decimal
+
+import database
+from .memory import CreateRows
+
+
+def Main():
+    parser = argparse.ArgumentParser(description="Measure the per row cost of decoding and encoding models.")
+    parser.add_argument("--rows", type=int, default=100000, help="Number of rows to decode and encode")
+    args = parser.parse_args()
+
+    callRows = [callRow for callRow, _ in CreateRows(args.rows, 0)]
+
+    startTime = time.perf_counter()
+    dbCalls = [database.CryptoCall._FromRow(row) for row in callRows]
+    decode = time.perf_counter() - startTime
+
+    for dbCall in dbCalls:
+        dbCall.amount = Decimal("0.0")
+        dbCall.status = database.CryptoCall.Status.CLOSED
+    startTime = time.perf_counter()
+    for dbCall in dbCalls:
+        dbCall._GetChanges()
+    encode = time.perf_counter() - startTime
+
+    print(f"decode: {decode / len(callRows) * 1e6:.2f}µs per row, "
+          f"encode changes: {encode / len(callRows) * 1e6:.2f}µs per row")
+
+
+if __name__ == "__main__":
+    Main()
@@ -0,0 +1,334 @@
+"""
+Local stand-ins for the exchange, the database and the bot, so the monitor can be run
+under load without network access, MySQL or Telegram.
+"""
+import asyncio
+import math
+import random
+import re
+import time
+from collections import Counter
+from ccxt.base.decimal_to_precision import TICK_SIZE
+
+
+class FakeExchange:
+    """
+    Stand-in for a ccxt.pro exchange that emits random walk OHLCV updates for its pairs.
+
+    Updates are produced a step at a time by Step, every step updates the running candle
+    of every watched pair. A pair is handed to the monitor once per step, the time the
+    update was emitted and the time the monitor asked for the next update, i.e. was done
+    with it, give the candle latency.
+    """
+    id = "loadtest"
+    instance = None  # The exchange created by the monitor
+    startMarkets = {}
+    startPrices = {}
+
+    def __init__(self, config=None):
+        self.name = "LoadTest"
+        self.has = {'watchOHLCVForSymbols': True, 'unWatchOHLCV': True, 'unWatchOHLCVForSymbols': True}
+        self.precisionMode = TICK_SIZE
+        self.markets = dict(self.startMarkets)
+        self.prices = dict(self.startPrices)  # pair -> close
+        self.candles = {}  # pair -> [time, open, high, low, close, volume] of the running candle
+        self.emittedAt = {}  # pair -> time.perf_counter() of the last update
+        self.latencies = []  # seconds from emitting an update until the monitor was done with it
+        self.watched = set()
+        self.__pending = set()
+        self.__inFlight = {}  # consumer -> list of emit times of the updates handed out
+        self.__stepped = asyncio.Event()
+        self.__drained = asyncio.Event()
+        self.__watchId = 0
+        self.__candleTime = int(time.time() // 60 * 60 * 1000)
+        FakeExchange.instance = self
+
+    @classmethod
+    def CreateMarkets(cls, pairs):
+        """Create the markets of the exchanges to come, a random start price and tick size per pair."""
+        cls.startMarkets = {}
+        cls.startPrices = {}
+        for pair in pairs:
+            price = 10 ** random.uniform(-3, 4.5)
+            decimals = max(2, 5 - int(math.floor(math.log10(price))))
+            base, quote = pair.split("/")
+            cls.startMarkets[pair] = {'id': f"{base}{quote}", 'symbol': pair, 'base': base, 'quote': quote,
+                                  'type': 'spot', 'spot': True, 'active': True,
+                                  'precision': {'price': 10 ** -decimals, 'amount': 1e-8}}
+            cls.startPrices[pair] = round(price, decimals)
+
+    @property
+    def pending(self) -> int:
+        return len(self.__pending)
+
+    async def Drained(self, timeout: float) -> bool:
+        """Wait until the updates of the last step were handed to the monitor, False on a timeout."""
+        try:
+            await asyncio.wait_for(self.__drained.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def Step(self, drift: float = 0.0, volatility: float = 0.002, newCandle: bool = False) -> int:
+        """
+        Move the price of every watched pair and emit the update of its running candle.
+        Returns the number of updates.
+        """
+        if newCandle:
+            self.__candleTime += 60000
+        now = time.perf_counter()
+        for pair in self.watched:
+            decimals = -int(round(math.log10(self.markets[pair]['precision']['price'])))
+            price = round(self.prices[pair] * math.exp(random.gauss(drift, volatility)), decimals)
+            self.prices[pair] = price
+            candle = self.candles.get(pair)
+            if candle is None or candle[0] != self.__candleTime:
+                candle = [self.__candleTime, price, price, price, price, 0.0]
+            else:
+                candle = [candle[0], candle[1], max(candle[2], price), min(candle[3], price), price, candle[5]]
+            candle[5] += random.uniform(0, 10)
+            self.candles[pair] = candle
+            self.emittedAt[pair] = now
+            self.__pending.add(pair)
+        if self.__pending:
+            self.__drained.clear()
+        self.__stepped.set()
+        return len(self.watched)
+
+    def __Done(self, consumer):
+        """The consumer asks for more, so it is done with the updates it got before."""
+        now = time.perf_counter()
+        self.latencies.extend(now - emittedAt for emittedAt in self.__inFlight.pop(consumer, ()))
+
+    def __Take(self, pairs):
+        self.__pending.difference_update(pairs)
+        if not self.__pending:
+            self.__drained.set()
+
+    async def __Wait(self):
+        self.__stepped.clear()
+        await self.__stepped.wait()
+
+    # The ccxt.pro interface used by CryptoExchange and MarketCache
+
+    def loadMarkets(self, reload=False):
+        return self.load_markets(reload)
+
+    async def load_markets(self, reload=False):
+        return self.markets
+
+    def set_markets(self, markets):
+        self.markets = markets
+
+    def parse_timeframe(self, timeframe: str) -> int:
+        return 60
+
+    async def fetchOHLCV(self, pair, timeframe, since=None, limit=None):
+        # No history, the calls of a benchmark are created just before it starts
+        return []
+
+    async def watchOHLCV(self, pair, timeframe):
+        if pair not in self.watched:
+            # The first watch returns the running candle right away
+            self.watched.add(pair)
+            price = self.prices[pair]
+            return [self.candles.get(pair) or [self.__candleTime, price, price, price, price, 0.0]]
+        self.__Done(pair)
+        while pair not in self.__pending:
+            await self.__Wait()
+        self.__Take([pair])
+        self.__inFlight[pair] = [self.emittedAt[pair]]
+        return [self.candles[pair]]
+
+    async def watchOHLCVForSymbols(self, symbolsAndTimeframes):
+        self.__watchId += 1
+        watchId = self.__watchId
+        self.__Done(None)
+        pairs = [pair for pair, _ in symbolsAndTimeframes]
+        self.watched.update(pairs)
+        while True:
+            ready = [pair for pair in pairs if pair in self.__pending]
+            if ready:
+                break
+            await self.__Wait()
+            if watchId != self.__watchId:
+                # Replaced by a watch for another set of symbols
+                return {}
+        self.__Take(ready)
+        self.__inFlight[None] = [self.emittedAt[pair] for pair in ready]
+        return {pair: {timeframe: [self.candles[pair]]} for pair, timeframe in symbolsAndTimeframes if pair in ready}
+
+    async def unWatchOHLCV(self, pair, timeframe):
+        self.__Done(pair)
+        self.watched.discard(pair)
+        self.__Take([pair])
+
+    async def unWatchOHLCVForSymbols(self, symbolsAndTimeframes):
+        pairs = [pair for pair, _ in symbolsAndTimeframes]
+        self.watched.difference_update(pairs)
+        self.__Take(pairs)
+
+    async def close(self):
+        # The updates still in flight are left out of the latencies
+        self.__inFlight.clear()
+        self.watched.clear()
+        self.__Take(list(self.__pending))
+
+
+class FakeCursor:
+    def __init__(self, pool):
+        self.__pool = pool
+        self.__rows = []
+        self.lastrowid = None
+
+    async def execute(self, query, args=()):
+        self.__rows, self.lastrowid = self.__pool.Execute(query, list(args or ()))
+
+    async def fetchone(self):
+        return self.__rows[0] if self.__rows else None
+
+    async def fetchall(self):
+        return self.__rows
+
+    async def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, pool):
+        self.__pool = pool
+
+    async def cursor(self):
+        return FakeCursor(self.__pool)
+
+    async def begin(self):
+        self.__pool.transactions += 1
+
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+
+class FakePool:
+    """
+    Stand-in for the aiomysql pool that keeps the tables in memory and counts the statements.
+
+    Only the statements generated by the models are understood: selects with a WHERE of
+    comparisons joined by AND or a single IN, single and multi-row inserts, updates and
+    deletes by ID. Columns that aren't inserted get the default of the given models.
+    """
+    __SELECT = re.compile(r"SELECT (.+?) FROM (\w+)(?: WHERE (.+?))?;?$", re.DOTALL)
+    __INSERT = re.compile(r"INSERT INTO (\w+) \((.+?)\) VALUES", re.DOTALL)
+    __UPDATE = re.compile(r"UPDATE (\w+) SET (.+) WHERE id = %s$", re.DOTALL)
+    __DELETE = re.compile(r"DELETE FROM (\w+) WHERE id = %s$")
+    __IN = re.compile(r"(\w+) IN \((.+)\)$")
+    __CONDITION = re.compile(r"(\w+) (=|!=) %s$")
+
+    def __init__(self, models=()):
+        self.tables = {}  # table name -> {id: {column: value}}
+        self.__models = {model._tableName: model for model in models}
+        self.statements = Counter()  # statement kind -> count
+        self.transactions = 0
+        self.__nextIds = {}
+
+    def Reset(self):
+        """Reset the counters, e.g. after the tables were filled."""
+        self.statements.clear()
+        self.transactions = 0
+
+    async def acquire(self):
+        return FakeConnection(self)
+
+    def release(self, connection):
+        pass
+
+    def close(self):
+        pass
+
+    async def wait_closed(self):
+        pass
+
+    def Execute(self, query: str, args: list):
+        query = query.strip()
+        kind = query.split(None, 1)[0].upper()
+        self.statements[kind] += 1
+        if query == "SELECT @@auto_increment_increment":
+            return [(1,)], None
+
+        match = self.__SELECT.match(query)
+        if kind == "SELECT" and match:
+            columns = [column.strip() for column in match.group(1).split(",")]
+            rows = self.tables.get(match.group(2), {}).values()
+            if match.group(3):
+                rows = [row for row in rows if self.__Matches(row, match.group(3), args)]
+            return [tuple(row.get(column) for column in columns) for row in rows], None
+
+        match = self.__INSERT.match(query)
+        if match:
+            table = self.tables.setdefault(match.group(1), {})
+            columns = [column.strip() for column in match.group(2).split(",")]
+            firstId = None
+            for start in range(0, len(args), len(columns)):
+                row = self.__GetDefaults(match.group(1))
+                row.update(zip(columns, args[start:start + len(columns)]))
+                if row.get("id") is None:
+                    row["id"] = self.__nextIds.get(match.group(1), 1)
+                self.__nextIds[match.group(1)] = max(self.__nextIds.get(match.group(1), 1), row["id"] + 1)
+                table[row["id"]] = row
+                firstId = row["id"] if firstId is None else firstId
+            return [], firstId
+
+        match = self.__UPDATE.match(query)
+        if match:
+            columns = [assignment.split("=")[0].strip() for assignment in match.group(2).split(",")]
+            row = self.tables.get(match.group(1), {}).get(args[-1])
+            if row is not None:
+                row.update(zip(columns, args[:-1]))
+            return [], None
+
+        match = self.__DELETE.match(query)
+        if match:
+            self.tables.get(match.group(1), {}).pop(args[0], None)
+            return [], None
+
+        raise ValueError(f"Statement not supported by the stand-in database: {query}")
+
+    def __GetDefaults(self, tableName: str) -> dict:
+        model = self.__models.get(tableName)
+        if model is None:
+            return {}
+        defaults = {}
+        for field, default in model._storedDefaults.items():
+            encode = model._encoders.get(field)
+            defaults[field] = default() if encode is None else encode(default())
+        return defaults
+
+    def __Matches(self, row, where: str, args: list) -> bool:
+        match = self.__IN.match(where)
+        if match:
+            return row.get(match.group(1)) in args
+        for condition, value in zip(where.split(" AND "), args):
+            column, operator = self.__CONDITION.match(condition.strip()).groups()
+            if (row.get(column) == value) != (operator == "="):
+                return False
+        return True
+
+
+class FakeBot:
+    """Stand-in for CryptoCallBot that records the messages instead of sending them."""
+    def __init__(self):
+        self.messages = 0
+        self.significant = 0
+        self.latencies = []  # seconds from emitting the update of the pair until the message
+
+    async def SendMessage(self, message: str) -> None:
+        self.messages += 1
+
+    async def SendCallMessage(self, call, comment: str, significant: bool = True) -> None:
+        self.messages += 1
+        self.significant += significant
+        emittedAt = FakeExchange.instance.emittedAt.get(call.pair) if FakeExchange.instance else None
+        if emittedAt is not None:
+            self.latencies.append(time.perf_counter() - emittedAt)
@@ -1,11 +1,16 @@
 from dotenv import load_dotenv
 import os
+from envsettings import GetBool
 from telegram import Update
 from telegram.ext import ContextTypes
 from enum import Enum, auto
+from .ttlcache import TtlCache
+from telemetry import Logger
 
 load_dotenv()
 
+_logger = Logger.Get("bot")
+
 class MemberStatus(Enum):
     KICKED = auto()
     LEFT = auto()
@@ -50,17 +55,49 @@ class BotSettings:
     __name = os.getenv('TELEGRAM_BOT_NAME')
     __minStatusLevel = MemberStatus(os.getenv('TELEGRAM_BOT_MIN_STATUS_LEVEL', 'RESTRICTED'))
     __minCommandLevel = MemberStatus(os.getenv('TELEGRAM_BOT_MIN_COMMAND_LEVEL', 'MEMBER'))
+    # Telegram allows about 20 messages per minute in a group
+    __outboxRate = float(os.getenv('TELEGRAM_OUTBOX_RATE', '20'))
+    if not __outboxRate > 0:
+        # The outbox waits 1 / rate for a token
+        raise ValueError(f"TELEGRAM_OUTBOX_RATE must be greater than 0, got {__outboxRate}.")
+    __outboxBurst = int(os.getenv('TELEGRAM_OUTBOX_BURST', '3'))
+    __outboxSize = int(os.getenv('TELEGRAM_OUTBOX_SIZE', '1000'))
+    __liveStatus = GetBool('TELEGRAM_LIVE_STATUS', False)
+    __liveStatusInterval = float(os.getenv('TELEGRAM_LIVE_STATUS_INTERVAL', '30'))
+    __liveStatusMax = int(os.getenv('TELEGRAM_LIVE_STATUS_MAX', '3'))
+    __statusPageSize = int(os.getenv('TELEGRAM_STATUS_PAGE_SIZE', '5'))
+    __statusCompactPageSize = int(os.getenv('TELEGRAM_STATUS_COMPACT_PAGE_SIZE', '30'))
+    # Member status per user ID, invalidated by chat member updates
+    __memberCache = TtlCache(float(os.getenv('TELEGRAM_MEMBER_CACHE_TTL', '300')),
+                             int(os.getenv('TELEGRAM_MEMBER_CACHE_SIZE', '1000')))
 
     @classmethod
     async def IsFromMember(cls, update: Update, context: ContextTypes.DEFAULT_TYPE, isCommand: bool = True) -> bool:
         try:
-            member = await context.bot.get_chat_member(chat_id=cls.__groupChatId, user_id=update.effective_user.id)
+            userId = update.effective_user.id
+            status = cls.__memberCache.Get(userId)
+            if status is None:
+                member = await context.bot.get_chat_member(chat_id=cls.__groupChatId, user_id=userId)
+                status = MemberStatus(member.status)
+                cls.__memberCache.Set(userId, status)
             minStatusLevel = cls.__minCommandLevel if isCommand else cls.__minStatusLevel
-            return MemberStatus(member.status) >= minStatusLevel
+            return status >= minStatusLevel
         except Exception as e:
-            print(f"Error checking member status: {e}")
+            _logger.warning("Error checking member status: %s", e)
             return False
 
+    @classmethod
+    async def OnChatMemberUpdated(cls, update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+        """Update the cached member status when a member of the group chat changes."""
+        chatMember = update.chat_member
+        if chatMember is None or chatMember.chat.id != cls.__groupChatId:
+            return
+        userId = chatMember.new_chat_member.user.id
+        try:
+            cls.__memberCache.Set(userId, MemberStatus(chatMember.new_chat_member.status))
+        except ValueError:
+            cls.__memberCache.Invalidate(userId)
+
     @classmethod
     def GetGroupChatId(cls) -> int:
         return cls.__groupChatId
@@ -73,6 +110,46 @@ class BotSettings:
     def GetBotName(cls) -> str:
         return cls.__name
 
+    @classmethod
+    def GetOutboxRate(cls) -> float:
+        """Maximum number of messages per minute sent to the group chat."""
+        return cls.__outboxRate
+
+    @classmethod
+    def GetOutboxBurst(cls) -> int:
+        """Number of messages that can be sent at once before the rate applies."""
+        return max(1, cls.__outboxBurst)
+
+    @classmethod
+    def GetOutboxSize(cls) -> int:
+        """Maximum number of queued messages, the oldest is dropped when the queue is full."""
+        return max(1, cls.__outboxSize)
+
+    @classmethod
+    def IsLiveStatusEnabled(cls) -> bool:
+        """Edit tracked overviews in place instead of posting a new overview on every event."""
+        return cls.__liveStatus
+
+    @classmethod
+    def GetLiveStatusInterval(cls) -> float:
+        """Number of seconds between edits of the tracked overviews."""
+        return max(1.0, cls.__liveStatusInterval)
+
+    @classmethod
+    def GetLiveStatusMax(cls) -> int:
+        """Number of tracked messages kept live per call and for the overview of all calls."""
+        return max(1, cls.__liveStatusMax)
+
+    @classmethod
+    def GetStatusPageSize(cls) -> int:
+        """Number of call overviews per page of /callstatus."""
+        return max(1, cls.__statusPageSize)
+
+    @classmethod
+    def GetStatusCompactPageSize(cls) -> int:
+        """Number of single line call summaries per page of /callstatus compact."""
+        return max(1, cls.__statusCompactPageSize)
+
     @staticmethod
     def EscapeMarkdownV2(text: str) -> str:
         escapeChars = r'_[]()~>#+-=|{}.!'  # excluding: `*
@@ -1,19 +1,25 @@
 #!/usr/bin/env python
 from telegram import Update
-from telegram.ext import Application, CommandHandler, CallbackContext
+from telegram.ext import Application, CommandHandler, ChatMemberHandler, CallbackQueryHandler, CallbackContext
 from telegram.constants import ParseMode
 from telegram.error import RetryAfter
 from dotenv import load_dotenv
 from decimal import Decimal
-import traceback
 from version import __version__
 
 from .botsettings import BotSettings
+from .outbox import Outbox
+from .livestatus import LiveStatus
+from .statusview import StatusView
+from .streamhealthview import StreamHealthView
 import database
 from crypto import CryptoMonitor, Call
+from telemetry import Metrics, Logger
 
 load_dotenv()
 
+_logger = Logger.Get("bot")
+
 
 class CryptoCallBot:
     __singelton = None
@@ -26,15 +32,19 @@ class CryptoCallBot:
    • <entry> - The entry price for the trade
    • <stoploss> - The stop loss price for the trade can be a percentage or a entry price
    • <take_profit> - The take profit price for the trade can be a percentage or a entry price (add a % behind the value), when using multiple take profits, equal batches are used of the amount of bought coins. Also with a prefixed with a <precentage>@ different batch sizes can be setup, e.g 20@20% 20@50% 60@100%""",
-        "status": """/callstatus [<call_id>]
+        "status": """/callstatus [<call_id>|compact]
   Show the status of a specific call or all calls that are in progress.
-   • <call_id> - The ID of the call to check. If not provided, show all calls.""",
+   • <call_id> - The ID of the call to check. If not provided, show all calls a page at a time.
+   • compact - Show all calls with a single line per call.""",
         "stoploss": """/callstoploss <call_id> <stoploss>
   Set the stop loss for a specific call.
    • <call_id> - The ID of the call to set the stop loss for.
    • <stoploss> - The new stop loss price for the call can be a percentage of the current price or a fixed price""",
    "close": """/closecall <call_id>
-  Close a specific call."""}
+  Close a specific call.""",
+        "health": """/streamhealth [all]
+  Show the health of the price streams per exchange and the pairs of which the stream is not healthy.
+   • all - Show every watched pair."""}
 
     def __init__(self):
         self.__application = Application.builder()\
@@ -44,12 +54,18 @@ class CryptoCallBot:
            .build()
 
         self.__monitor = CryptoMonitor()
+        self.__outbox = Outbox(self.__application.bot, BotSettings.GetGroupChatId())
+        self.__liveStatus = LiveStatus(self.__outbox, self.__monitor, self.__RenderStatus) \
+            if BotSettings.IsLiveStatusEnabled() else None
 
         self.__application.add_handler(CommandHandler("start", self.Start))
         self.__application.add_handler(CommandHandler("addcall", self.OnAddCall))
         self.__application.add_handler(CommandHandler("callstatus", self.OnCallStatus))
         self.__application.add_handler(CommandHandler("closecall", self.OnCloseCall))
         self.__application.add_handler(CommandHandler("callstoploss", self.OnCallStopLoss))
+        self.__application.add_handler(CommandHandler("streamhealth", self.OnStreamHealth))
+        self.__application.add_handler(CallbackQueryHandler(self.OnCallStatusPage, pattern=StatusView.PATTERN))
+        self.__application.add_handler(ChatMemberHandler(BotSettings.OnChatMemberUpdated, ChatMemberHandler.CHAT_MEMBER))
 
     def GetApplication(self) -> Application:
         return self.__application
@@ -75,7 +91,7 @@ class CryptoCallBot:
                                                          f"{reason}\n\n{call.GetOverview()}"),
                                                      parse_mode=ParseMode.MARKDOWN_V2)
         except Exception as e:
-            print(f"Error sending message: {e}")
+            _logger.warning("Error sending message: %s", e)
 
     async def OnAddCall(self, update: Update, context: CallbackContext) -> None:
         if not await self.CheckCaller(update, context, True):
@@ -116,16 +132,19 @@ class CryptoCallBot:
                     {"targetPrice": targetPrice, "size": batchSize})
 
             call = await self.__monitor.AddCall(contractAddress, exchange, pair, entryPrice, stopLoss, takeProfits)
-            await update.message.reply_text(BotSettings.EscapeMarkdownV2(call.GetOverview()),
-                                            parse_mode=ParseMode.MARKDOWN_V2)
+            text = call.GetOverview()
+            message = await update.message.reply_text(BotSettings.EscapeMarkdownV2(text),
+                                                      parse_mode=ParseMode.MARKDOWN_V2)
+            if self.__liveStatus is not None:
+                await self.__liveStatus.Track(call.id, message, text)
         except ValueError as e:
             await update.message.reply_text(f"Invalid arguments. error: {e}")
         except RetryAfter as e:
             # Most likely the bot has alread sent a message to the group chat and is rate limited
             # by Telegram. In this case we can ditch the message.
-            print(f"Rate limit exceeded. Retry after {e.retry_after} seconds.")
+            _logger.warning("Rate limit exceeded. Retry after %s seconds.", e.retry_after)
         except Exception:
-            traceback.print_exc()
+            _logger.exception("Error creating a call")
             await update.message.reply_text("An error occurred while creating the call.")
 
 
@@ -159,11 +178,10 @@ class CryptoCallBot:
                 await update.message.reply_text(f"Stop loss must be greater than 0.")
                 return
 
-            call.stopLoss = stopLoss
-            await call.Save()
-            await call.SendMessage(f"Update stop loss to: {stopLoss}")
+            await self.__monitor.SetStopLoss(call, stopLoss)
+            await call.SendMessage(f"Update stop loss to: {stopLoss}", significant=False)
         except Exception as e:
-            traceback.print_exc()
+            _logger.exception("Error setting the stop loss")
             await update.message.reply_text(f"An error occurred while setting the stop loss: {e}")
 
     async def OnCallStatus(self, update: Update, context: CallbackContext) -> None:
@@ -171,31 +189,54 @@ class CryptoCallBot:
             return
 
         try:
-            if context.args:
+            if context.args and context.args[0].lower() != StatusView.COMPACT:
                 try:
                     callId = int(context.args[0])
                     call = await self.__monitor.Get(callId)
                     if call:
-                        await update.message.reply_text(BotSettings.EscapeMarkdownV2(call.GetOverview()),
-                                                        parse_mode=ParseMode.MARKDOWN_V2)
+                        text = call.GetOverview()
+                        message = await update.message.reply_text(BotSettings.EscapeMarkdownV2(text),
+                                                                  parse_mode=ParseMode.MARKDOWN_V2)
+                        if self.__liveStatus is not None and call.status != database.CryptoCall.Status.CLOSED:
+                            await self.__liveStatus.Track(call.id, message, text)
                     else:
                         await update.message.reply_text(f"Call ID {callId} not found.")
                 except ValueError:
                     await update.message.reply_text("Invalid call ID.")
             else:
-                openCalls = self.__monitor.GetOpenCalls()
-                if not openCalls:
-                    msg = "No open calls."
-                else:
-                    msg = "Open calls:\n\n"
-                    for call in openCalls:
-                        msg += f"{call.GetOverview()}"
-                await update.message.reply_text(BotSettings.EscapeMarkdownV2(msg),
-                                                parse_mode=ParseMode.MARKDOWN_V2)
+                view = StatusView.GetData(StatusView.COMPACT if context.args else StatusView.FULL, 0)
+                msg, replyMarkup = self.__RenderStatus(view)
+                message = await update.message.reply_text(BotSettings.EscapeMarkdownV2(msg),
+                                                          parse_mode=ParseMode.MARKDOWN_V2,
+                                                          reply_markup=replyMarkup)
+                if self.__liveStatus is not None:
+                    await self.__liveStatus.Track(None, message, msg, view)
         except Exception as e:
-            traceback.print_exc()
+            _logger.exception("Error fetching the status")
             await update.message.reply_text(f"An error occurred while fetching the status: {e}")
 
+    def __RenderStatus(self, view: str = None):
+        openCalls = sorted(self.__monitor.GetOpenCalls(), key=lambda call: call.id)
+        return StatusView.Render(openCalls, view)
+
+    async def OnCallStatusPage(self, update: Update, context: CallbackContext) -> None:
+        query = update.callback_query
+        if not await BotSettings.IsFromMember(update, context, False):
+            await query.answer("You don't have enough rights to use this command!")
+            return
+
+        try:
+            msg, replyMarkup = self.__RenderStatus(query.data)
+            await query.edit_message_text(BotSettings.EscapeMarkdownV2(msg),
+                                          parse_mode=ParseMode.MARKDOWN_V2,
+                                          reply_markup=replyMarkup)
+            if self.__liveStatus is not None:
+                self.__liveStatus.SetView(query.message.chat_id, query.message.message_id, query.data, msg)
+            await query.answer()
+        except Exception as e:
+            _logger.exception("Error fetching a status page")
+            await query.answer(f"An error occurred while fetching the status: {e}")
+
     async def OnCloseCall(self, update: Update, context: CallbackContext) -> None:
         if not await self.CheckCaller(update, context, True):
             return
@@ -207,25 +248,47 @@ class CryptoCallBot:
             callId = int(context.args[0])
             await self.__monitor.CloseCall(callId)
         except Exception as e:
-            traceback.print_exc()
+            _logger.exception("Error closing a call")
             await update.message.reply_text(f"An error occurred while closing the call: {e}")
 
+    async def OnStreamHealth(self, update: Update, context: CallbackContext) -> None:
+        if not await self.CheckCaller(update, context, False):
+            return
+
+        try:
+            showAll = bool(context.args) and context.args[0].lower() == StreamHealthView.ALL
+            text = StreamHealthView.Render(await self.__monitor.GetStreamHealth(), showAll)
+            await update.message.reply_text(BotSettings.EscapeMarkdownV2(text), parse_mode=ParseMode.MARKDOWN_V2)
+        except Exception as e:
+            _logger.exception("Error fetching the stream health")
+            await update.message.reply_text(f"An error occurred while fetching the stream health: {e}")
+
     async def __PostInit(self, _application: Application) -> None:
-        print("Creating tables...")
+        _logger.info("Creating tables...")
+        await Metrics.Start()
         await database.Database.Init()
         await database.CreateTables()
+        self.__outbox.Start()
         await self.__monitor.Initialize()
+        if self.__liveStatus is not None:
+            await self.__liveStatus.Start()
 
     def Run(self) -> None:
-        print(f"Starting {BotSettings.GetBotName()} version {__version__}, only listening to group chat: {BotSettings.GetGroupChatId()}")
-        self.__application.run_polling()
+        _logger.info("Starting %s version %s, only listening to group chat: %s",
+                     BotSettings.GetBotName(), __version__, BotSettings.GetGroupChatId())
+        # Chat member updates are only sent when requested, they keep the member cache current
+        self.__application.run_polling(allowed_updates=Update.ALL_TYPES)
 
     async def __PostShutdown(self, application: Application) -> None:
-        print("Shutting down...")
+        _logger.info("Shutting down...")
+        if self.__liveStatus is not None:
+            await self.__liveStatus.Stop()
         await self.__monitor.Stop()
+        await self.__outbox.Stop()
 
         await database.Database.Close()
-        print("Database connection closed.")
+        _logger.info("Database connection closed.")
+        await Metrics.Stop()
 
     @classmethod
     def GetInstance(cls) -> "CryptoCallBot":
@@ -233,10 +296,21 @@ class CryptoCallBot:
             cls.__singelton = cls()
         return cls.__singelton
 
+    @classmethod
+    def SetInstance(cls, instance) -> None:
+        """Replace the instance that receives the call events, e.g. by a stand-in of the benchmarks."""
+        cls.__singelton = instance
+
     async def SendMessage(self, message: str) -> None:
-        try:
-            await self.__application.bot.send_message(chat_id=BotSettings.GetGroupChatId(),
-                                                      text=BotSettings.EscapeMarkdownV2(message),
-                                                      parse_mode=ParseMode.MARKDOWN_V2)
-        except Exception as e:
-            traceback.print_exc()
\ No newline at end of file
+        """Queue a message to the group chat, it is sent by the rate limited outbox."""
+        self.__outbox.Put(message)
+
+    async def SendCallMessage(self, call: Call, comment: str, significant: bool = True) -> None:
+        """
+        Post an event of a call to the group chat. With live status messages, events that
+        are not significant only update the tracked overviews of the call.
+        """
+        if self.__liveStatus is not None:
+            await self.__liveStatus.OnCallEvent(call, comment, significant)
+        else:
+            self.__outbox.Put(call.GetOverview(comment))
\ No newline at end of file
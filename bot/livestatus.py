@@ -0,0 +1,133 @@
+import asyncio
+from telegram import Message
+
+import database
+from crypto import CryptoMonitor, Call
+from .botsettings import BotSettings
+from .outbox import Outbox
+from telemetry import Logger
+
+_logger = Logger.Get("bot")
+
+
+class LiveStatus:
+    """
+    Keeps sent overviews up to date by editing them instead of posting new messages.
+
+    Every call has its own tracked messages, as has every /callstatus request. The
+    tracked messages are edited at a throttled cadence when their overview changed,
+    new messages are only posted for significant events such as an activation, a stop
+    loss or a close. The message IDs are stored in the database to survive a restart.
+    """
+    def __init__(self, outbox: Outbox, monitor: CryptoMonitor, renderStatus):
+        self.__outbox = outbox
+        self.__monitor = monitor
+        self.__renderStatus = renderStatus
+        self.__messages = {}  # live message id -> LiveMessage
+        self.__lastTexts = {}  # live message id -> last sent text
+        self.__events = {}  # call id -> last event of the call
+        self.__task = None
+
+    async def Start(self):
+        """Continue with the live messages of before a restart and start refreshing them."""
+        openCallIds = {call.id for call in self.__monitor.GetOpenCalls()}
+        for liveMessage in await database.LiveMessage.GetBySelect(status=database.LiveMessage.Status.LIVE):
+            if liveMessage.callId is not None and liveMessage.callId not in openCallIds:
+                self.__Close(liveMessage)
+            else:
+                self.__messages[liveMessage.id] = liveMessage
+        _logger.info("Loaded %d live messages.", len(self.__messages))
+        self.__task = asyncio.create_task(self.__Run())
+
+    async def Stop(self):
+        if self.__task is not None:
+            self.__task.cancel()
+            try:
+                await self.__task
+            except asyncio.CancelledError:
+                pass
+            self.__task = None
+
+    async def Track(self, callId: int, message: Message, text: str = None, view: str = None):
+        """
+        Keep a sent message up to date, with callId None for an overview of all open calls
+        showing the given view. Only the newest messages per call, or of the overviews, are kept live.
+        """
+        liveMessage = await database.LiveMessage.Insert(callId=callId, chatId=message.chat_id,
+                                                        messageId=message.message_id, view=view)
+        self.__messages[liveMessage.id] = liveMessage
+        if text is not None:
+            self.__lastTexts[liveMessage.id] = text
+
+        tracked = sorted((other for other in self.__messages.values() if other.callId == callId), key=lambda other: other.id)
+        for other in tracked[:-BotSettings.GetLiveStatusMax()]:
+            self.__Close(other)
+
+    def SetView(self, chatId: int, messageId: int, view: str, text: str):
+        """Show another view in a tracked overview of all open calls, after it was paged."""
+        for liveMessage in self.__messages.values():
+            if liveMessage.chatId == chatId and liveMessage.messageId == messageId:
+                liveMessage.view = view
+                self.__lastTexts[liveMessage.id] = text
+                database.WriteBehind.Enqueue(liveMessage)
+
+    async def OnCallEvent(self, call: Call, comment: str, significant: bool):
+        """
+        Post a new message for a significant event, otherwise show the event in the tracked
+        messages of the call with their next edit.
+        """
+        self.__events[call.id] = comment
+        callMessages = [liveMessage for liveMessage in self.__messages.values() if liveMessage.callId == call.id]
+        closed = call.status == database.CryptoCall.Status.CLOSED
+        if significant or not callMessages:
+            text = call.GetOverview(comment)
+
+            async def OnSent(message: Message):
+                await self.Track(call.id, message, text)
+
+            self.__outbox.Put(text, onSent=None if closed else OnSent)
+
+        if closed:
+            # Give the earlier messages their final state and stop tracking them
+            for liveMessage in callMessages:
+                self.__outbox.Edit(liveMessage.chatId, liveMessage.messageId, call.GetOverview())
+                self.__Close(liveMessage)
+            self.__events.pop(call.id, None)
+
+    def __Close(self, liveMessage: database.LiveMessage):
+        self.__messages.pop(liveMessage.id, None)
+        self.__lastTexts.pop(liveMessage.id, None)
+        liveMessage.status = database.LiveMessage.Status.CLOSED
+        database.WriteBehind.Enqueue(liveMessage)
+
+    def __Refresh(self):
+        """Queue an edit of every live message of which the overview changed."""
+        openCalls = {call.id: call for call in self.__monitor.GetOpenCalls()}
+        views = {}
+        for liveMessage in list(self.__messages.values()):
+            replyMarkup = None
+            if liveMessage.callId is None:
+                if liveMessage.view not in views:
+                    views[liveMessage.view] = self.__renderStatus(liveMessage.view)
+                text, replyMarkup = views[liveMessage.view]
+            elif liveMessage.callId in openCalls:
+                text = openCalls[liveMessage.callId].GetOverview(self.__events.get(liveMessage.callId, ""))
+            else:
+                continue
+
+            if self.__lastTexts.get(liveMessage.id) != text:
+                self.__lastTexts[liveMessage.id] = text
+
+                async def OnFailed(liveMessage=liveMessage):
+                    # The message was deleted or can no longer be edited
+                    self.__Close(liveMessage)
+
+                self.__outbox.Edit(liveMessage.chatId, liveMessage.messageId, text, onFailed=OnFailed, replyMarkup=replyMarkup)
+
+    async def __Run(self):
+        while True:
+            await asyncio.sleep(BotSettings.GetLiveStatusInterval())
+            try:
+                self.__Refresh()
+            except Exception:
+                _logger.exception("Error refreshing the live messages")
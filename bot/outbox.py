@@ -0,0 +1,193 @@
+import asyncio
+import time
+from collections import deque, OrderedDict
+from datetime import timedelta
+from telegram import Bot
+from telegram.constants import ParseMode, MessageLimit
+from telegram.error import RetryAfter, NetworkError, BadRequest
+
+from .botsettings import BotSettings
+from telemetry import Metrics, Logger
+
+_logger = Logger.Get("bot")
+
+_REQUEST_SECONDS = Metrics.Histogram("cryptocallbot_telegram_request_seconds",
+                                     "Duration of requests to Telegram.", ("method",))
+_OUTBOX_SIZE = Metrics.Gauge("cryptocallbot_outbox_size", "Messages and edits waiting in the outbox.")
+_OUTBOX_DROPPED = Metrics.Counter("cryptocallbot_outbox_dropped_total", "Messages dropped from a full outbox.")
+
+
+class Outbox:
+    """
+    Rate limited queue of messages to the group chat.
+
+    Messages are sent at most at the rate of a token bucket tuned to the per chat limits
+    of Telegram. Messages that wait for a token are merged per minute into a single
+    digest, a RetryAfter is honored by waiting and sending the same message again.
+    When the queue is full the oldest message is dropped, the next digest reports how
+    many messages were dropped.
+
+    Edits of sent messages share the rate limit, new messages go first. Several edits of
+    the same message are coalesced into the last one.
+    """
+    NETWORK_RETRIES = 3
+
+    def __init__(self, bot: Bot, chatId: int):
+        self.__bot = bot
+        self.__chatId = chatId
+        self.__rate = BotSettings.GetOutboxRate() / 60
+        self.__burst = BotSettings.GetOutboxBurst()
+        self.__maxSize = BotSettings.GetOutboxSize()
+        self.__tokens = self.__burst
+        self.__lastRefill = time.monotonic()
+        self.__queue = deque()
+        self.__edits = OrderedDict()
+        self.__dropped = 0
+        self.__wakeup = asyncio.Event()
+        self.__task = None
+        _OUTBOX_SIZE.SetFunction(lambda: self.size)
+
+    @property
+    def size(self) -> int:
+        return len(self.__queue) + len(self.__edits)
+
+    def Start(self):
+        if self.__task is None:
+            self.__task = asyncio.create_task(self.__Run())
+
+    async def Stop(self, timeout: float = 10.0):
+        """Stop after sending the queued messages, waiting at most timeout seconds."""
+        if self.__task is None:
+            return
+        task, self.__task = self.__task, None
+        self.__wakeup.set()
+        try:
+            await asyncio.wait_for(task, timeout)
+        except asyncio.TimeoutError:
+            _logger.warning("Outbox stopped with %d messages unsent.", self.size)
+
+    def Put(self, message: str, onSent=None):
+        """
+        Queue a message, dropping the oldest queued message when the queue is full.
+        A message with an onSent callback is sent on its own and the callback is awaited
+        with the sent message.
+        """
+        if len(self.__queue) >= self.__maxSize:
+            self.__queue.popleft()
+            self.__dropped += 1
+            _OUTBOX_DROPPED.Inc()
+            _logger.warning("Outbox full, dropped the oldest message (%d dropped).", self.__dropped)
+        self.__queue.append((int(time.time() // 60), message, onSent))
+        self.__wakeup.set()
+
+    def Edit(self, chatId: int, messageId: int, message: str, onFailed=None, replyMarkup=None):
+        """
+        Queue an edit of a sent message, replacing an edit of the same message that is still queued.
+        The onFailed callback is awaited when the message can no longer be edited.
+        """
+        key = (chatId, messageId)
+        self.__edits.pop(key, None)
+        self.__edits[key] = (message, onFailed, replyMarkup)
+        self.__wakeup.set()
+
+    async def __Acquire(self):
+        """Wait for a token of the token bucket."""
+        while True:
+            now = time.monotonic()
+            self.__tokens = min(self.__burst, self.__tokens + (now - self.__lastRefill) * self.__rate)
+            self.__lastRefill = now
+            if self.__tokens >= 1:
+                self.__tokens -= 1
+                return
+            await asyncio.sleep((1 - self.__tokens) / self.__rate)
+
+    def __TakeDigest(self):
+        """Take the queued messages of the oldest minute that fit in a single message."""
+        minute, message, onSent = self.__queue.popleft()
+        if onSent is not None:
+            return message, onSent
+        parts = [message]
+        length = len(BotSettings.EscapeMarkdownV2(message))
+        while self.__queue and self.__queue[0][0] == minute and self.__queue[0][2] is None:
+            nextLength = len(BotSettings.EscapeMarkdownV2(self.__queue[0][1])) + 2
+            if length + nextLength > MessageLimit.MAX_TEXT_LENGTH:
+                break
+            parts.append(self.__queue.popleft()[1])
+            length += nextLength
+        if self.__dropped:
+            parts.append(f"{self.__dropped} older messages were dropped.")
+            self.__dropped = 0
+        return "\n\n".join(parts), None
+
+    async def __Call(self, method, **kwargs):
+        """Call a bot method, honoring RetryAfter and retrying on network errors."""
+        retries = 0
+        requestSeconds = _REQUEST_SECONDS.Labels(getattr(method, "__name__", "request"))
+        while True:
+            try:
+                return await self.__Request(method, kwargs, requestSeconds)
+            except RetryAfter as e:
+                retryAfter = e.retry_after
+                if isinstance(retryAfter, timedelta):
+                    retryAfter = retryAfter.total_seconds()
+                _logger.warning("Rate limit exceeded. Retry after %s seconds.", retryAfter)
+                self.__tokens = 0
+                await asyncio.sleep(retryAfter)
+            except BadRequest:
+                # A subclass of NetworkError that will not succeed on a retry
+                raise
+            except NetworkError:
+                retries += 1
+                if retries > self.NETWORK_RETRIES:
+                    raise
+                await asyncio.sleep(2 ** retries)
+
+    @staticmethod
+    async def __Request(method, kwargs, requestSeconds):
+        startTime = time.perf_counter()
+        try:
+            return await method(**kwargs)
+        finally:
+            requestSeconds.Observe(time.perf_counter() - startTime)
+
+    async def __Send(self, message: str, onSent):
+        try:
+            sent = await self.__Call(self.__bot.send_message,
+                                     chat_id=self.__chatId,
+                                     text=BotSettings.EscapeMarkdownV2(message),
+                                     parse_mode=ParseMode.MARKDOWN_V2)
+            if onSent is not None:
+                await onSent(sent)
+        except Exception:
+            _logger.exception("Error sending a message")
+
+    async def __Edit(self):
+        (chatId, messageId), (message, onFailed, replyMarkup) = self.__edits.popitem(last=False)
+        try:
+            await self.__Call(self.__bot.edit_message_text,
+                              chat_id=chatId,
+                              message_id=messageId,
+                              text=BotSettings.EscapeMarkdownV2(message),
+                              parse_mode=ParseMode.MARKDOWN_V2,
+                              reply_markup=replyMarkup)
+        except BadRequest as e:
+            if "not modified" in str(e).lower():
+                return
+            _logger.warning("Error editing message %s: %s", messageId, e)
+            if onFailed is not None:
+                await onFailed()
+        except Exception:
+            _logger.exception("Error editing message %s", messageId)
+
+    async def __Run(self):
+        while self.__task is not None or self.__queue or self.__edits:
+            if not self.__queue and not self.__edits:
+                self.__wakeup.clear()
+                await self.__wakeup.wait()
+                continue
+            await self.__Acquire()
+            if self.__queue:
+                # Messages queued while waiting for a token are merged into the digest
+                await self.__Send(*self.__TakeDigest())
+            elif self.__edits:
+                await self.__Edit()
@@ -0,0 +1,77 @@
+from typing import List, Optional, Tuple
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.constants import MessageLimit
+
+from crypto import Call
+from .botsettings import BotSettings
+
+
+class StatusView:
+    """
+    Paginated overview of all open calls, with the full overview or a single line summary
+    per call. A view is identified by callback data of the form status:<mode>:<page>,
+    which is used by the inline previous and next buttons.
+    """
+    PREFIX = "status"
+    FULL = "full"
+    COMPACT = "compact"
+    PATTERN = rf"^{PREFIX}:({FULL}|{COMPACT}):\d+$"
+
+    @classmethod
+    def GetData(cls, mode: str, page: int) -> str:
+        return f"{cls.PREFIX}:{mode}:{page}"
+
+    @classmethod
+    def Parse(cls, data: Optional[str]) -> Tuple[str, int]:
+        """Get the mode and page of callback data, the first full page when it is missing."""
+        try:
+            prefix, mode, page = data.split(":")
+            if prefix == cls.PREFIX and mode in (cls.FULL, cls.COMPACT):
+                return mode, max(0, int(page))
+        except (AttributeError, ValueError):
+            pass
+        return cls.FULL, 0
+
+    @classmethod
+    def __Paginate(cls, calls: List[Call], mode: str) -> List[List[str]]:
+        """Split the rendered calls in pages within the page size and the message length limit."""
+        pageSize = BotSettings.GetStatusPageSize() if mode == cls.FULL else BotSettings.GetStatusCompactPageSize()
+        separator = "" if mode == cls.FULL else "\n"
+        # Leave room for the header of the page
+        maxLength = MessageLimit.MAX_TEXT_LENGTH - 100
+        pages = []
+        page, length = [], 0
+        for call in calls:
+            text = call.GetOverview() if mode == cls.FULL else call.GetSummary()
+            textLength = len(BotSettings.EscapeMarkdownV2(text)) + len(separator)
+            if page and (len(page) >= pageSize or length + textLength > maxLength):
+                pages.append(page)
+                page, length = [], 0
+            page.append(text)
+            length += textLength
+        if page:
+            pages.append(page)
+        return pages
+
+    @classmethod
+    def Render(cls, calls: List[Call], data: Optional[str] = None) -> Tuple[str, Optional[InlineKeyboardMarkup]]:
+        """Render a page of the open calls, returns the text and the navigation buttons."""
+        mode, page = cls.Parse(data)
+        if not calls:
+            return "No open calls.", None
+
+        pages = cls.__Paginate(calls, mode)
+        page = min(page, len(pages) - 1)
+        separator = "" if mode == cls.FULL else "\n"
+        text = f"Open calls ({len(calls)}), page {page + 1}/{len(pages)}:\n\n" + separator.join(pages[page])
+
+        buttons = []
+        if page > 0:
+            buttons.append(InlineKeyboardButton("◀ Previous", callback_data=cls.GetData(mode, page - 1)))
+        if page < len(pages) - 1:
+            buttons.append(InlineKeyboardButton("Next ▶", callback_data=cls.GetData(mode, page + 1)))
+        if mode == cls.FULL:
+            toggle = InlineKeyboardButton("Compact", callback_data=cls.GetData(cls.COMPACT, 0))
+        else:
+            toggle = InlineKeyboardButton("Full", callback_data=cls.GetData(cls.FULL, 0))
+        return text, InlineKeyboardMarkup([buttons, [toggle]] if buttons else [[toggle]])
@@ -0,0 +1,65 @@
+from collections import Counter
+from typing import List
+
+from telegram.constants import MessageLimit
+
+from .botsettings import BotSettings
+
+
+class StreamHealthView:
+    """
+    Health of the OHLCV streams, the number of pairs per state for every exchange followed
+    by a line per pair that isn't healthy, or per pair when all pairs are asked for.
+    """
+    ALL = "all"
+    HEALTHY = "healthy"
+
+    @staticmethod
+    def __FormatSeconds(seconds) -> str:
+        if seconds is None:
+            return "never"
+        if seconds < 120:
+            return f"{seconds:.0f}s"
+        return f"{seconds / 60:.0f}m"
+
+    @classmethod
+    def __RenderPair(cls, row: dict) -> str:
+        line = f"  {row['pair'] or '*'} {row['state']}, last update {cls.__FormatSeconds(row['age'])}"
+        if row['age'] is not None:
+            line += " ago"
+        if row['failures']:
+            line += f", {row['failures']} failures"
+        if row['reconnects']:
+            line += f", {row['reconnects']} reconnects"
+        if row['retryIn'] is not None:
+            line += f", retry in {cls.__FormatSeconds(row['retryIn'])}"
+        if row['error'] and row['state'] != cls.HEALTHY:
+            line += f": {row['error'][:100]}"
+        return line
+
+    @classmethod
+    def Render(cls, rows: List[dict], showAll: bool = False) -> str:
+        """Render the health of the streams, cut off at the message length limit."""
+        if not rows:
+            return "No pairs are watched."
+
+        exchanges = {}
+        for row in rows:
+            exchanges.setdefault(row['exchange'], []).append(row)
+        lines = []
+        for exchange, exchangeRows in sorted(exchanges.items()):
+            states = Counter(row['state'] for row in exchangeRows)
+            lines.append(f"{exchange}: " + ", ".join(f"{count} {state}" for state, count in sorted(states.items())))
+            lines.extend(cls.__RenderPair(row) for row in exchangeRows if showAll or row['state'] != cls.HEALTHY)
+
+        # Leave room for the line about the lines that were left out
+        maxLength = MessageLimit.MAX_TEXT_LENGTH - 100
+        text, length = [], 0
+        for idx, line in enumerate(lines):
+            lineLength = len(BotSettings.EscapeMarkdownV2(line)) + 1
+            if length + lineLength > maxLength:
+                text.append(f"... {len(lines) - idx} more lines")
+                break
+            text.append(line)
+            length += lineLength
+        return "Stream health:\n" + "\n".join(text)
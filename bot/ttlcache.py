@@ -0,0 +1,39 @@
+import time
+from collections import OrderedDict
+
+
+class TtlCache:
+    """
+    Dictionary like cache of which the entries expire after a time to live. When the
+    cache is full the least recently used entry is evicted.
+    """
+    def __init__(self, ttl: float, maxSize: int):
+        self.__ttl = ttl
+        self.__maxSize = maxSize
+        self.__items = OrderedDict()  # key -> (expires at, value)
+
+    def __len__(self) -> int:
+        return len(self.__items)
+
+    def Get(self, key, default=None):
+        """Get the value of a key, or the default when it is missing or expired."""
+        item = self.__items.get(key)
+        if item is None:
+            return default
+        if item[0] < time.monotonic():
+            del self.__items[key]
+            return default
+        self.__items.move_to_end(key)
+        return item[1]
+
+    def Set(self, key, value):
+        self.__items.pop(key, None)
+        self.__items[key] = (time.monotonic() + self.__ttl, value)
+        while len(self.__items) > self.__maxSize:
+            self.__items.popitem(last=False)
+
+    def Invalidate(self, key):
+        self.__items.pop(key, None)
+
+    def Clear(self):
+        self.__items.clear()
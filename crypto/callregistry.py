@@ -0,0 +1,110 @@
+from collections import OrderedDict
+from typing import List, Optional
+
+import database
+
+
+class CallRegistry:
+    """
+    Index of the calls known to the monitor.
+
+    Open calls are kept by ID, with secondary indexes per exchange and pair and per
+    status, so every lookup is a dictionary access instead of a scan over the pairs of
+    all exchanges. Recently closed calls are kept in a size bound LRU cache, so asking
+    for them again doesn't need a database round trip.
+    """
+    def __init__(self, closedCacheSize: int):
+        self.__calls = {}  # call id -> Call
+        self.__byPair = {}  # (exchange, pair) -> {call id: Call}
+        self.__byStatus = {}  # status -> {call id: Call}
+        self.__statuses = {}  # call id -> indexed status
+        self.__closed = OrderedDict()  # call id -> Call, least recently used first
+        self.__closedCacheSize = closedCacheSize
+
+    def __len__(self) -> int:
+        return len(self.__calls)
+
+    def __contains__(self, callId: int) -> bool:
+        return callId in self.__calls
+
+    def Add(self, call):
+        """
+        Index a call, a closed call is only kept in the cache of closed calls.
+        """
+        if call.status == database.CryptoCall.Status.CLOSED:
+            self.__Unindex(call)
+            self.__AddClosed(call)
+            return
+
+        self.__closed.pop(call.id, None)
+        self.__Unindex(call)
+        self.__calls[call.id] = call
+        self.__byPair.setdefault((call.exchange, call.pair), {})[call.id] = call
+        self.__byStatus.setdefault(call.status, {})[call.id] = call
+        self.__statuses[call.id] = call.status
+
+    def Update(self, call):
+        """
+        Move a call to the index of its current status, a call that closed moves to the
+        cache of closed calls.
+        """
+        if call.id not in self.__calls or self.__statuses[call.id] != call.status:
+            self.Add(call)
+
+    def Remove(self, call):
+        """
+        Forget a call, also when it is cached as a closed call.
+        """
+        self.__Unindex(call)
+        self.__closed.pop(call.id, None)
+
+    def Clear(self):
+        self.__calls.clear()
+        self.__byPair.clear()
+        self.__byStatus.clear()
+        self.__statuses.clear()
+        self.__closed.clear()
+
+    def __Unindex(self, call):
+        if self.__calls.pop(call.id, None) is None:
+            return
+        key = (call.exchange, call.pair)
+        calls = self.__byPair[key]
+        del calls[call.id]
+        if not calls:
+            del self.__byPair[key]
+        status = self.__statuses.pop(call.id)
+        calls = self.__byStatus[status]
+        del calls[call.id]
+        if not calls:
+            del self.__byStatus[status]
+
+    def __AddClosed(self, call):
+        if self.__closedCacheSize <= 0:
+            return
+        self.__closed[call.id] = call
+        self.__closed.move_to_end(call.id)
+        while len(self.__closed) > self.__closedCacheSize:
+            self.__closed.popitem(last=False)
+
+    def Get(self, callId: int) -> Optional[object]:
+        """
+        Get an open or recently closed call by its ID, None when it isn't known.
+        """
+        call = self.__calls.get(callId)
+        if call is None:
+            call = self.__closed.get(callId)
+            if call is not None:
+                self.__closed.move_to_end(callId)
+        return call
+
+    def GetOpenCalls(self) -> List:
+        return list(self.__calls.values())
+
+    def GetByPair(self, exchange: str, pair: str) -> List:
+        """Get the open calls on a pair of an exchange."""
+        return list(self.__byPair.get((exchange, pair), {}).values())
+
+    def GetByStatus(self, status: database.CryptoCall.Status) -> List:
+        """Get the open calls with a status, ACQUIRING or ACTIVE."""
+        return list(self.__byStatus.get(status, {}).values())
@@ -1,12 +1,32 @@
 #from binance import BinanceSocketManager, AsyncClient  # ThreadedWebsocketManager
 import ccxt.pro as ccxt
 import asyncio
+import random
 import time
 from typing import List, Tuple
 from decimal import Decimal
 import database
-import traceback
 from datetime import datetime
+from .monitorsettings import MonitorSettings
+from .priceladder import PriceLadder
+from .callregistry import CallRegistry
+from .marketcache import MarketCache
+from .pricestore import PriceStore
+from .streamhealth import StreamHealth
+from telemetry import Metrics, Logger
+
+_logger = Logger.Get("crypto")
+
+_CANDLES = Metrics.Counter("cryptocallbot_candles_total", "Candle updates received.", ("exchange",))
+_CANDLE_SECONDS = Metrics.Histogram("cryptocallbot_candle_latency_seconds",
+                                    "Time from receiving a candle update until it was processed.", ("exchange", "pair"))
+_CALL_UPDATE_SECONDS = Metrics.Histogram("cryptocallbot_call_update_seconds",
+                                         "Duration of Call.Update on a crossed threshold.")
+_RECONNECTS = Metrics.Counter("cryptocallbot_stream_reconnects_total",
+                              "Reconnects of the OHLCV streams after an error or a stall.", ("exchange",))
+_REBUILDS = Metrics.Counter("cryptocallbot_connection_rebuilds_total",
+                            "Rebuilds of the connection of an exchange after many of its streams failed together.",
+                            ("exchange",))
 
 def DecimalToString(value: Decimal) -> str:
     """Convert Decimal to string with 10 decimal places."""
@@ -14,28 +34,55 @@ def DecimalToString(value: Decimal) -> str:
 
 class Call:
     SIGNS = {"USDT": '₮', "BTC": "₿", "ETH": "Ξ", "EUR": "€", "USD": "$", "USDC": "$", "BUSD": "$"}
+    __slots__ = ("__dbCall", "__baseCoin", "__quoteCoin", "__quoteSign", "__dbTakeProfits",
+                 "__overview", "__summary", "__renderedPrice")
+
     def __init__(self, dbCall: database.CryptoCall, dbTakeProfits: List):
         self.__dbCall = dbCall
         self.__baseCoin, self.__quoteCoin = dbCall.pair.split("/", 1)
         self.__quoteSign = Call.SIGNS.get(self.__quoteCoin, self.__quoteCoin)
         self.__dbTakeProfits = dbTakeProfits
-        self.__price = Decimal("0.0")
+        # Rendered overview and summary, cleared when the price or state changes
+        self.__overview = None
+        self.__summary = None
+        self.__renderedPrice = None
+
+    def __getstate__(self):
+        # Only the stored state is sent to another process, the rendered texts are not
+        return self.__dbCall, self.__dbTakeProfits
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def _Assign(self, call: "Call"):
+        """
+        Take over the state of another instance of the same call, e.g. the copy sent by a
+        worker process, so references to this instance see the change.
+        """
+        self.__dbCall = call.__dbCall
+        self.__dbTakeProfits = call.__dbTakeProfits
+        self.__InvalidateOverview()
 
     @classmethod
     async def Create(cls, contractAddress: str, pair: str, exchange: str, entryPrice: Decimal, stopLoss: Decimal, takeProfits: List):
-        dbCall = await database.CryptoCall.Insert(contractAddress=contractAddress,
-                                                  pair=pair,
-                                                  exchange=exchange,
-                                                  entryPrice=entryPrice,
-                                                  stopLoss=stopLoss)
-        dbTakeProfits = []
-        amount = dbCall.investment / entryPrice
-        print("Amount: ", amount)
-        for takeProfit in takeProfits:
-            dbTakeProfits.append(
-                await database.TakeProfit.Insert(callId=dbCall.id,
-                                                 targetPrice=takeProfit['targetPrice'],
-                                                 amount=amount * takeProfit['size']))
+        # The call and its take profits are written in a single transaction, so a failure
+        # never leaves a call without its take profits
+        async with database.Database.GetTransaction() as cursor:
+            dbCall = await database.CryptoCall.Insert(cursor,
+                                                      contractAddress=contractAddress,
+                                                      pair=pair,
+                                                      exchange=exchange,
+                                                      entryPrice=entryPrice,
+                                                      stopLoss=stopLoss,
+                                                      # Set here, so the instance has the stored time
+                                                      createdAt=datetime.now().replace(microsecond=0))
+            amount = dbCall.investment / entryPrice
+            _logger.debug("Amount: %s", amount)
+            dbTakeProfits = await database.TakeProfit.InsertMany(
+                [{"callId": dbCall.id,
+                  "targetPrice": takeProfit['targetPrice'],
+                  "amount": amount * takeProfit['size']} for takeProfit in takeProfits],
+                cursor)
 
         return cls(dbCall, dbTakeProfits)
 
@@ -48,25 +95,29 @@ class Call:
         return Call(dbCall, dbTakeProfits)
 
     @classmethod
-    async def GetOpenCalls(self):
+    async def GetOpenCalls(self, exchange: str = None):
         """
-        Get all open calls from the database.
+        Get all open calls from the database, only those of an exchange when it is given.
         """
         dbCalls = await database.CryptoCall.GetByExclude(status=database.CryptoCall.Status.CLOSED)
-        openCalls = []
-        for dbCall in dbCalls:
-            dbTakeProfits = await database.TakeProfit.GetBySelect(callId=dbCall.id)
-            openCalls.append(Call(dbCall, dbTakeProfits))
-        print(f"openCalls: {openCalls}")
+        if exchange is not None:
+            dbCalls = [dbCall for dbCall in dbCalls if dbCall.exchange == exchange]
+        # Load the take profits of all calls at once instead of a query per call
+        dbTakeProfits = await database.TakeProfit.GetGroupedBy("callId", [dbCall.id for dbCall in dbCalls])
+        openCalls = [Call(dbCall, dbTakeProfits[dbCall.id]) for dbCall in dbCalls]
+        # The calls are only formatted when debug messages are written
+        _logger.debug("Open calls: %s", openCalls)
         return openCalls
 
     def __repr__(self):
         return f"<Call id={self.__dbCall.id} exchange={self.exchange} pair={self.__dbCall.pair} entryPrice={self.__dbCall.entryPrice} stopLoss={self.__dbCall.stopLoss} investment={self.__dbCall.investment} amount={self.__dbCall.amount} result={self.__dbCall.result} status={self.__dbCall.status}>"
 
-    async def Save(self):
-        await self.__dbCall.Save()
-        for tp in self.__dbTakeProfits:
-            await tp.Save()
+    async def Save(self, wait: bool = True):
+        """
+        Queue the call and its take profits for writing. When wait is set, return
+        only after the changes have been stored.
+        """
+        await database.WriteBehind.Persist(self.__dbCall, *self.__dbTakeProfits, wait=wait)
 
     async def Cancel(self):
         """
@@ -74,15 +125,16 @@ class Call:
         """
         self.__dbCall.status = database.CryptoCall.Status.CLOSED
         self.__dbCall.closedAt = datetime.now()
+        self.__InvalidateOverview()
         await self.Save()
-        print(f"Cancelled call {self.__dbCall.id}")
+        _logger.info("Cancelled call %s", self.__dbCall.id)
 
     async def Close(self):
         """
         Close the call and update the database.
         """
         if self.__dbCall.status == database.CryptoCall.Status.CLOSED:
-            print(f"Call {self.__dbCall.id} is already closed.")
+            _logger.info("Call %s is already closed.", self.__dbCall.id)
             return
 
         if self.__dbCall.status == database.CryptoCall.Status.ACTIVE:
@@ -90,17 +142,19 @@ class Call:
             self.__dbCall.amount = Decimal("0.0")
         self.__dbCall.status = database.CryptoCall.Status.CLOSED
         self.__dbCall.closedAt = datetime.now()
+        self.__InvalidateOverview()
         await self.Save()
         await self.SendMessage(f"Call {self.__dbCall.id} closed at {self.sign} {DecimalToString(self.price)}.")
 
-    async def SendMessage(self, comment: str):
+    async def SendMessage(self, comment: str, significant: bool = True):
         """
-        Post a message to the bot's channel.
+        Post a message to the bot's channel. Events that are not significant may only
+        be shown by editing an earlier overview of the call.
         """
         from bot import CryptoCallBot
         bot = CryptoCallBot.GetInstance()
 
-        await bot.SendMessage(self.GetOverview(comment))
+        await bot.SendCallMessage(self, comment, significant)
 
     async def __ActivateTriggered(self, klineData) -> Tuple[bool, str]:
         if klineData['high'] < self.__dbCall.entryPrice:
@@ -114,7 +168,7 @@ class Call:
         self.__dbCall.investment = self.__dbCall.amount * entryPrice
         self.__dbCall.result = -self.__dbCall.investment
         self.__dbCall.status = database.CryptoCall.Status.ACTIVE
-        await self.Save()
+        await self.Save(wait=False)
 
         return True, f"Buy in at {self.sign} {DecimalToString(self.entryPrice)}."
 
@@ -124,7 +178,7 @@ class Call:
         self.__dbCall.amount = Decimal("0.0")
         self.__dbCall.stopLossTriggered = klineData['time']
         self.__dbCall.closedAt = klineData['time']
-        await self.Save()
+        await self.Save(wait=False)
         return False, f"Closed by stop loss."
 
     async def __TargetTriggered(self, dbTakeProfit, klineData) -> Tuple[bool, str]:
@@ -133,21 +187,35 @@ class Call:
         dbTakeProfit.result = dbTakeProfit.amount * \
             (dbTakeProfit.targetPrice - self.__dbCall.entryPrice)
         self.__dbCall.result += dbTakeProfit.amount * dbTakeProfit.targetPrice
-        await self.Save()
+        await self.Save(wait=False)
         return True, f"Take profit {self.sign} {DecimalToString(dbTakeProfit.targetPrice)} triggered."
 
+    def GetThresholds(self) -> Tuple[List[Decimal], List[Decimal]]:
+        """
+        Get the prices at which Update would change the state of the call, as a list of
+        thresholds crossed by the low and a list of thresholds crossed by the high.
+        """
+        status = self.__dbCall.status
+        if status == database.CryptoCall.Status.ACQUIRING:
+            return [self.__dbCall.entryPrice], []
+        if status == database.CryptoCall.Status.ACTIVE:
+            targets = [tp.targetPrice for tp in self.__dbTakeProfits if tp.triggeredAt is None]
+            # Without open take profits Update closes the call on any price
+            return [self.__dbCall.stopLoss], targets or [Decimal("0.0")]
+        return [], []
+
     async def Update(self, klineData) -> bool:
         """
         Update the call with the latest kline data.
         Returns True if the call was updated, False if the call was closed.
         """
         if self.__dbCall.status == database.CryptoCall.Status.CLOSED:
-            print(f"Call {self.__dbCall.id} is already closed.")
+            _logger.debug("Call %s is already closed.", self.__dbCall.id)
             return False
 
         retVal = True
         messages = []
-        self.price = klineData['close']
+        status = self.__dbCall.status
         if self.__dbCall.status == database.CryptoCall.Status.ACQUIRING:
             if klineData['low'] <= self.__dbCall.entryPrice:
                 retVal, message = await self.__ActivateTriggered(klineData)
@@ -170,17 +238,53 @@ class Call:
                 if nrOfOpenTakeProfits == 0:
                     self.__dbCall.status = database.CryptoCall.Status.CLOSED
                     self.__dbCall.closedAt = klineData['time']
-                    await self.Save()
+                    await self.Save(wait=False)
                     retVal = False
                     messages.append("Closed as all target prices have been reached.")
 
         if messages:
-            await self.SendMessage("\n".join(messages))
+            self.__InvalidateOverview()
+            # Activations and closes are significant, take profits only change the overview
+            await self.SendMessage("\n".join(messages), significant=self.__dbCall.status != status)
         return retVal
 
-    def GetOverview(self, message="") -> str:
-        """Get a string overview of the call."""
+    def __InvalidateOverview(self):
+        self.__overview = None
+        self.__summary = None
 
+    def __CheckPrice(self):
+        """Clear the rendered overview when the shared price changed or became stale."""
+        price, age = PriceStore.Get(self.exchange, self.pair)
+        renderedPrice = (price, PriceStore.IsStale(age))
+        if renderedPrice != self.__renderedPrice:
+            self.__renderedPrice = renderedPrice
+            self.__InvalidateOverview()
+
+    def GetOverview(self, message="") -> str:
+        """Get a string overview of the call, rendered again only after the price or state changed."""
+        self.__CheckPrice()
+        if self.__overview is None:
+            self.__overview = self.__RenderOverview()
+        comment, details = self.__overview
+        if message:
+            comment += f"\n{message}"
+        return f"{comment}\n{details}"
+
+    def GetSummary(self) -> str:
+        """Get a single line summary of the call."""
+        self.__CheckPrice()
+        if self.__summary is None:
+            totalResult = self.result + self.value
+            percentage = (totalResult / self.investment) * 100
+            status = self.__dbCall.status.name.lower()
+            if self.__dbCall.status == database.CryptoCall.Status.ACTIVE:
+                triggered = sum(1 for tp in self.__dbTakeProfits if tp.triggeredAt is not None)
+                status += f" {triggered}/{len(self.__dbTakeProfits)}"
+            self.__summary = f"{'🟩' if totalResult >= 0 else '🟥'} {self.id} {self.pair} {status} " \
+                             f"{self.sign} {DecimalToString(self.price)}{' (stale)' if self.isPriceStale else ''} {percentage:.2f}%"
+        return self.__summary
+
+    def __RenderOverview(self) -> Tuple[str, str]:
         firstColumnWidth = 11
 
         takeProfits = ""
@@ -205,13 +309,10 @@ class Call:
         percentage = (totalResult / self.investment) * 100
         percentage = f"{percentage:.2f}%"
         comment = f"Call {self.__dbCall.id}: {'🟩' if totalResult >= 0 else '🟥'} {self.sign} {DecimalToString(totalResult)} {percentage}"
-        if message:
-            comment += f"\n{message}"
 
         stopLossPercentage = (1 - self.stopLoss / self.entryPrice) * 100
 
-        return f"""{comment}
-```
+        return comment, f"""```
 Call ID       {str(self.id)}
 Contract      {str(self.contractAddress)}
 Pair          {str(self.pair)}
@@ -222,7 +323,7 @@ Entry Price   {self.sign} {DecimalToString(self.entryPrice)}
 Stop Loss     {self.sign} {DecimalToString(self.stopLoss)} {stopLossPercentage:.2f}%
 Investment    {self.sign} {DecimalToString(self.investment)}
 Amount Coins  {DecimalToString(self.amount)}
-Current Price {self.sign} {DecimalToString(self.price)}
+Current Price {self.sign} {DecimalToString(self.price)}{' (stale)' if self.isPriceStale else ''}
 Current Value {self.sign} {DecimalToString(self.value)}
 Result*       {self.sign} {DecimalToString(totalResult)} {percentage}
 
@@ -230,6 +331,10 @@ Profits{takeProfits}
 ```
 """
 
+    @property
+    def createdAt(self) -> datetime:
+        return self.__dbCall.createdAt
+
     @property
     def contractAddress(self) -> str:
         return self.__dbCall.contractAddress
@@ -268,6 +373,7 @@ Profits{takeProfits}
         elif isinstance(value, float):
             value = Decimal.from_float(value)
         self.__dbCall.stopLoss = value
+        self.__InvalidateOverview()
 
     @property
     def investment(self) -> Decimal:
@@ -283,6 +389,7 @@ Profits{takeProfits}
         elif isinstance(value, float):
             value = Decimal.from_float(value)
         self.__dbCall.amount = value
+        self.__InvalidateOverview()
 
     @property
     def takeProfits(self) -> List:
@@ -294,6 +401,7 @@ Profits{takeProfits}
     @status.setter
     def status(self, value: database.CryptoCall.Status):
         self.__dbCall.status = value
+        self.__InvalidateOverview()
 
     @property
     def result(self) -> Decimal:
@@ -306,21 +414,27 @@ Profits{takeProfits}
         elif isinstance(value, float):
             value = Decimal.from_float(value)
         self.__dbCall.result = value
+        self.__InvalidateOverview()
 
     @property
     def price(self) -> Decimal:
-        return self.__price
-    @price.setter
-    def price(self, value: Decimal):
-        if isinstance(value, str):
-            value = Decimal(value)
-        elif isinstance(value, float):
-            value = Decimal.from_float(value)
-        self.__price = value
+        """The last price of the pair, 0 when no price was received yet."""
+        price, _ = PriceStore.Get(self.exchange, self.pair)
+        return Decimal("0.0") if price is None else price
+
+    @property
+    def priceAge(self) -> float:
+        """Seconds since the price was received, None when no price was received yet."""
+        _, age = PriceStore.Get(self.exchange, self.pair)
+        return age
+
+    @property
+    def isPriceStale(self) -> bool:
+        return self.__dbCall.status != database.CryptoCall.Status.CLOSED and PriceStore.IsStale(self.priceAge)
 
     @property
     def value(self) -> Decimal:
-        return self.__price * self.amount
+        return self.price * self.amount
 
     @property
     def id(self) -> int:
@@ -329,7 +443,7 @@ Profits{takeProfits}
 class  CryptoExchange:
     INTERVAL = '1m'
 
-    def __init__(self, name: str):
+    def __init__(self, name: str, registry: CallRegistry):
         if hasattr(ccxt, name):
             self.__exchange = getattr(ccxt, name)({
                 'enableRateLimit': True,
@@ -348,27 +462,94 @@ class  CryptoExchange:
         else:
             raise ValueError(f"Exchange {name} not found.")
         self.__openCalls = {}
-        self.__exchangeInfo = {'last': 0, 'symbols': None}
+        self.__registry = registry
+        self.__markets = MarketCache(self.__exchange, name)
         self.__running = True
+        # Set on Stop, so the streams that wait to reconnect stop right away
+        self.__stopped = asyncio.Event()
+        # In multiplexed mode a single dispatcher task watches all pairs of this exchange
+        self.__multiplexed = MonitorSettings.IsMultiplexEnabled() and \
+            bool(self.__exchange.has.get('watchOHLCVForSymbols'))
+        self.__dispatcher = None
+        self.__symbolsChanged = asyncio.Event()
+        self.__pairLocks = {}
+        self.__intervalMs = self.__exchange.parse_timeframe(self.INTERVAL) * 1000
+        self.__pairStates = None
+        self.__pairStatesLock = asyncio.Lock()
+        # A stream without any update for this many seconds is stalled
+        self.__staleSeconds = MonitorSettings.GetStaleCandles() * self.__intervalMs / 1000
+        # Health of the shared stream in multiplexed mode, of the connection otherwise
+        self.__health = StreamHealth()
+        # The pairs of which the stream failed since their last update
+        self.__failing = set()
+        # Increased on every rebuild of the connection, streams that fail because of the
+        # rebuild subscribe again without counting as a failure
+        self.__generation = 0
+        self.__rebuildLock = asyncio.Lock()
+
+    async def Start(self):
+        """
+        Nothing to start, the pairs are watched as their calls are registered.
+        """
 
     async def Stop(self):
         """
         Stop the exchange and close all open calls.
         """
         self.__running = False
+        self.__stopped.set()
 
         openCalls = self.__openCalls.copy()
-        for pairData in openCalls.values():
-            if hasattr(self.__exchange, 'unWatchOHLCV'):
-                await self.__exchange.unWatchOHLCV(pairData['pair'], self.INTERVAL)
-
+        if openCalls and not await self.__Unwatch(list(openCalls)):
+            # Closing the websockets wakes the pending watches that can't be unsubscribed
+            await self.__CloseStreams()
+        if self.__multiplexed:
+            self.__symbolsChanged.set()
+        # In multiplexed mode the tasks of the pairs only catch up before they join the dispatcher
         openTasks = [pairData['task'] for pairData in openCalls.values() if pairData['task'] is not None]
+        if self.__dispatcher is not None:
+            openTasks.append(self.__dispatcher)
+
         await asyncio.gather(*openTasks)
-        self.__openCalls = []
-        print(f"Closed all calls for {self.__name}")
+        await self.__markets.Stop()
+        self.__openCalls = {}
+        _logger.info("Closed all calls for %s", self.__name)
         if hasattr(self.__exchange, 'close'):
             await self.__exchange.close()
-        print(f"Closed exchange {self.__name}")
+        _logger.info("Closed exchange %s", self.__name)
+
+    async def __Unwatch(self, pairs: List[str]) -> bool:
+        """
+        Unsubscribe the OHLCV of the pairs. Returns False when the exchange doesn't support
+        unwatching or it failed.
+        """
+        try:
+            if self.__multiplexed:
+                if not self.__exchange.has.get('unWatchOHLCVForSymbols'):
+                    return False
+                await self.__exchange.unWatchOHLCVForSymbols([[pair, self.INTERVAL] for pair in pairs])
+            else:
+                if not self.__exchange.has.get('unWatchOHLCV'):
+                    return False
+                for pair in pairs:
+                    await self.__exchange.unWatchOHLCV(pair, self.INTERVAL)
+            return True
+        except Exception as e:
+            _logger.warning("Error unwatching OHLCV for %s: %s", ", ".join(pairs), e, extra={"exchange": self.__name})
+            return False
+
+    async def __CloseStreams(self):
+        """
+        Close the websocket connections of the exchange, the pending watches fail.
+        """
+        try:
+            if hasattr(self.__exchange, 'close_ws_clients'):
+                # Only the websockets, closing the exchange would also refuse the REST requests of the backfill
+                await self.__exchange.close_ws_clients()
+            else:
+                await self.__exchange.close()
+        except Exception as e:
+            _logger.warning("Error closing the connection of %s: %s", self.__name, e, extra={"exchange": self.__name})
 
     @property
     def name(self) -> str:
@@ -385,93 +566,487 @@ class  CryptoExchange:
 
     async def __CheckPair(self, pair: str) -> str:
         """
-        Check if the trading pair is valid. Raises an exception if not. Returns the pair if valid.
+        Check if the trading pair is valid. Raises an exception if not. Returns the symbol of
+        the pair if valid, so aliases such as btcusdt are accepted for BTC/USDT.
         """
-        if self.__exchangeInfo is None or (time.time() - self.__exchangeInfo['last']) > 3600:
-            self.__exchangeInfo['last'] = time.time()
-            exchangeInfo = await self.__exchange.loadMarkets()
-            self.__exchangeInfo['symbols'] = [symbol for symbol, market in exchangeInfo.items() if market['active'] and market['type'] == 'spot']
-        if pair in self.__exchangeInfo['symbols']:
-            return pair
-        raise ValueError(f"Invalid pair: {pair}. This pair is not trading at Binance.")
+        symbol = await self.__markets.Resolve(pair)
+        if symbol is not None:
+            return symbol
+        raise ValueError(f"Invalid pair: {pair}. This pair is not trading at {self.__exchange.name}.")
 
     async def __HandleOhlcv(self, pairData, ohlcv) -> bool:
         # Handle the incoming OHLCV message
         # [time, open, high, low, close, volume]
-        active = True
-        if ohlcv and ohlcv[0] != pairData['lastOhlcv'][0]:
-            pairData['lastOhlcv'] = ohlcv
-            klineData = {"low": Decimal(str(ohlcv[3])),
-                         "high": Decimal(str(ohlcv[2])),
-                         "time": datetime.fromtimestamp(ohlcv[0] / 1000),
-                         # "open": Decimal(str(ohlcv[1])),
-                         "close": Decimal(str(ohlcv[4])),
-                         "pair": pairData['pair']}
-            callsToRemove = []
-            for call in pairData['calls']:
-                if not await call.Update(klineData):
-                    callsToRemove.append(call)
-
-            for call in callsToRemove:
-                pairData['calls'].remove(call)
-                if len(pairData['calls']) == 0:
-                    active = False
-        return active
+        # Returns False when the pair has no open calls left
+        if not ohlcv:
+            return True
+
+        lastOhlcv = pairData['lastOhlcv']
+        if ohlcv[0] != lastOhlcv[0]:
+            # A new candle, evaluate its full range
+            low, high = ohlcv[3], ohlcv[2]
+            if ohlcv[0] % self.__intervalMs == 0:
+                # Remember the candle, so a restart can replay from here
+                pairData['state'].lastCandleAt = datetime.fromtimestamp(ohlcv[0] / 1000)
+                database.WriteBehind.Enqueue(pairData['state'])
+        elif MonitorSettings.IsStreamingEvaluationEnabled():
+            # An update of the current candle, only the part of the range that was not
+            # evaluated yet can trigger something. Otherwise the close is the latest tick.
+            low = ohlcv[3] if ohlcv[3] < lastOhlcv[3] else ohlcv[4]
+            high = ohlcv[2] if ohlcv[2] > lastOhlcv[2] else ohlcv[4]
+        else:
+            return True
+        pairData['lastOhlcv'] = list(ohlcv)
+
+        # Prices stay fixed point integers until a threshold is crossed
+        fixedPoint = pairData['fixedPoint']
+        # The calls read the price from the store, their state is only updated on a crossed threshold
+        PriceStore.Set(self.__name, pairData['pair'], fixedPoint.Round(ohlcv[4]), fixedPoint)
+
+        # Only the calls of which a threshold was crossed need an update
+        ladder = pairData['ladder']
+        crossed = ladder.GetCrossed(fixedPoint.Floor(low), fixedPoint.Ceil(high))
+        if not crossed:
+            return len(pairData['calls']) > 0
+
+        klineData = {"low": Decimal(str(low)),
+                     "high": Decimal(str(high)),
+                     "time": datetime.fromtimestamp(ohlcv[0] / 1000),
+                     # "open": Decimal(str(ohlcv[1])),
+                     "close": Decimal(str(ohlcv[4])),
+                     "pair": pairData['pair']}
+        candleEnd = datetime.fromtimestamp((ohlcv[0] + self.__intervalMs) / 1000)
+        for call in crossed:
+            if call.createdAt >= candleEnd:
+                # A replayed candle that ended before the call was created
+                continue
+            startTime = time.perf_counter()
+            updated = await call.Update(klineData)
+            _CALL_UPDATE_SECONDS.Observe(time.perf_counter() - startTime)
+            if updated:
+                ladder.Add(call)
+            else:
+                ladder.Remove(call)
+                if call in pairData['calls']:
+                    pairData['calls'].remove(call)
+            self.__registry.Update(call)
+        return len(pairData['calls']) > 0
+
+    async def __GetPairState(self, pair: str) -> database.PairState:
+        """
+        Get the persisted state of a pair, the states of all pairs of the exchange are loaded at once.
+        """
+        async with self.__pairStatesLock:
+            if self.__pairStates is None:
+                states = await database.PairState.GetBySelect(exchange=self.__name)
+                self.__pairStates = {state.pair: state for state in states}
+            if pair not in self.__pairStates:
+                self.__pairStates[pair] = await database.PairState.Insert(exchange=self.__name, pair=pair)
+            return self.__pairStates[pair]
+
+    async def __FetchMissedCandles(self, pair: str, since: int) -> List:
+        """
+        Fetch the candles from since (in ms) up to and including the running candle, page by page.
+        """
+        candles = []
+        limit = MonitorSettings.GetBackfillPageSize()
+        while True:
+            page = await self.__exchange.fetchOHLCV(pair, self.INTERVAL, since=since, limit=limit)
+            page = [ohlcv for ohlcv in page if ohlcv[0] >= since]
+            if not page:
+                break
+            candles.extend(page)
+            since = page[-1][0] + self.__intervalMs
+            if len(page) < limit:
+                break
+        return candles
+
+    async def __Backfill(self, pairData, since: int) -> int:
+        """
+        Replay the candles missed since the given time (in ms) in order through the trigger logic.
+        Returns the number of replayed candles.
+        """
+        oldest = int(time.time() - MonitorSettings.GetBackfillMaxHours() * 3600) * 1000
+        since = max(since, oldest)
+        since -= since % self.__intervalMs
+        candles = await self.__FetchMissedCandles(pairData['pair'], since)
+        if len(candles) > 1:
+            _logger.info("Backfilling %d candles for %s since %s", len(candles), pairData['pair'],
+                         datetime.fromtimestamp(since / 1000), extra={"exchange": self.__name})
+        for ohlcv in candles:
+            if not await self.__HandleOhlcv(pairData, ohlcv):
+                break
+        return len(candles)
+
+    async def __BackfillAll(self):
+        """
+        Replay the missed candles of all pairs, after the shared subscription was interrupted.
+        """
+        semaphore = asyncio.Semaphore(MonitorSettings.GetStartupConcurrency())
+
+        async def BackfillPair(pair, pairData):
+            async with semaphore:
+                try:
+                    await self.__CatchUp(pairData)
+                except Exception as e:
+                    _logger.warning("Error backfilling OHLCV for %s: %s", pair, e, extra={"exchange": self.__name})
+                    # Left out of the shared stream until it caught up
+                    pairData['caughtUp'] = False
+                    pairData['task'] = asyncio.create_task(self.__CatchUpPair(pair))
+                    return
+            if not pairData['calls']:
+                await self.__ClosePair(pair)
+
+        await asyncio.gather(*(BackfillPair(pair, pairData) for pair, pairData in list(self.__openCalls.items())
+                               if pairData['caughtUp']))
+
+    async def __SeedPrice(self, pairData):
+        """
+        Handle the last price of a pair that has no candle to replay, from the store when
+        the pair was watched recently, otherwise from the first OHLCV.
+        """
+        pair = pairData['pair']
+        price = PriceStore.GetFresh(self.__name, pair)
+        if price is None:
+            price = (await self.__exchange.watchOHLCV(pair, self.INTERVAL))[0][4]
+        price = float(price)
+        # only keep the close price
+        lastOhlcv = [int(datetime.now().timestamp() * 1000) - 1, price, price, price, price, 0]
+        pairData['lastOhlcv'] = lastOhlcv
+        lastOhlcv = lastOhlcv.copy()
+        lastOhlcv[0] += 1
+        await self.__HandleOhlcv(pairData, lastOhlcv)
+
+    async def __CatchUp(self, pairData):
+        """
+        Replay the candles missed since the last handled candle, or since the pair should
+        be watched from. A pair that has neither and nothing to replay is seeded with the last price.
+        """
+        since = pairData['lastOhlcv'][0] or pairData['since']
+        if since is None or await self.__Backfill(pairData, since) == 0:
+            if pairData['lastOhlcv'][0] == 0:
+                await self.__SeedPrice(pairData)
+        pairData['caughtUp'] = True
+
+    async def __CatchUpPair(self, pair):
+        """
+        Catch up on the missed candles of a pair before the dispatcher watches it, retried
+        with backoff until it succeeds.
+        """
+        pairData = self.__openCalls[pair]
+        health = pairData['health']
+        while self.__running and not pairData['caughtUp']:
+            try:
+                await self.__CatchUp(pairData)
+            except Exception as e:
+                reason = self.__DescribeError(e)
+                delay = health.OnFailure(reason)
+                _logger.warning("Error catching up on OHLCV for %s: %s, retrying in %.1fs", pair, reason, delay,
+                                extra={"exchange": self.__name, "failures": health.failures})
+                await self.__Sleep(delay)
+                health.OnRetry()
+
+        pairData['task'] = None
+        if not self.__running:
+            return
+        if not pairData['calls']:
+            await self.__ClosePair(pair)
+            return
+        self.__symbolsChanged.set()
+        if self.__dispatcher is None:
+            self.__dispatcher = asyncio.create_task(self.__DispatchOhlcv())
 
     async def __WatchOhlcv(self, pair):
         pairData = self.__openCalls[pair]
+        health = pairData['health']
         running = True
 
         while self.__running and running:
+            generation = self.__generation
             try:
-                msg = await self.__exchange.watchOHLCV(pair, self.INTERVAL)
+                if not pairData['caughtUp']:
+                    # Catch up on the candles missed before the pair was watched or while the stream was down
+                    await self.__CatchUp(pairData)
+                    if not pairData['calls']:
+                        running = False
+                        continue
+                # A stream without updates for the stale time has stalled
+                msg = await asyncio.wait_for(self.__exchange.watchOHLCV(pair, self.INTERVAL), self.__staleSeconds)
+                receivedAt = time.perf_counter()
+                health.OnMessage()
+                self.__failing.discard(pair)
+                if self.__health.failures and self.__health.retryAt <= time.time():
+                    # Updates arrive again after the last rebuild
+                    self.__health.OnMessage()
                 for ohlcv in msg:
                     if not await self.__HandleOhlcv(pairData, ohlcv):
                         running = False
+                self.__ObserveCandles(pairData, len(msg), receivedAt)
             except Exception as e:
-                print(f"Error watching OHLCV for {pair}: {e}")
-                await asyncio.sleep(5)
+                # A failed catch up is retried the same way, but only a failed stream counts towards a rebuild
+                streamFailed = pairData['caughtUp']
+                pairData['caughtUp'] = False
+                await self.__OnStreamFailure(pair, health, e, generation, streamFailed)
+
+        await self.__ClosePair(pair)
 
+    def __DescribeError(self, error: Exception) -> str:
+        if isinstance(error, asyncio.TimeoutError):
+            return f"No updates for {self.__staleSeconds:.0f}s"
+        return str(error) or type(error).__name__
+
+    async def __OnStreamFailure(self, pair: str, health: StreamHealth, error: Exception, generation: int,
+                                streamFailed: bool):
+        """
+        Wait before subscribing a failed or stalled stream of a pair again. When many pairs
+        of the exchange fail together, the connection of the exchange is rebuilt.
+        """
+        if not self.__running:
+            return
+        if generation != self.__generation:
+            # The connection was rebuilt under the stream, subscribe again spread over a moment
+            await self.__Sleep(random.uniform(0, MonitorSettings.GetReconnectBaseSeconds()))
+            return
+
+        reason = self.__DescribeError(error)
+        delay = health.OnFailure(reason)
+        _logger.warning("Error %s OHLCV for %s: %s, reconnecting in %.1fs",
+                        "watching" if streamFailed else "catching up on", pair, reason, delay,
+                        extra={"exchange": self.__name, "failures": health.failures})
+        _RECONNECTS.Labels(self.__name).Inc()
+        if streamFailed:
+            self.__failing.add(pair)
+        if streamFailed and \
+                len(self.__failing) >= max(2, MonitorSettings.GetRebuildFailureRatio() * len(self.__openCalls)) and \
+                (self.__health.retryAt is None or self.__health.retryAt <= time.time()):
+            # Rebuilds back off as well, so an outage doesn't rebuild the connection on every failure
+            reason = f"{len(self.__failing)} of {len(self.__openCalls)} pairs failed"
+            self.__health.OnFailure(reason)
+            await self.__RebuildConnection(generation, reason)
+        elif isinstance(error, asyncio.TimeoutError) and self.__exchange.has.get('unWatchOHLCV'):
+            # Drop the subscription, so the next watch subscribes again
+            try:
+                await asyncio.wait_for(self.__exchange.unWatchOHLCV(pair, self.INTERVAL), self.__staleSeconds)
+            except Exception as e:
+                _logger.debug("Error unwatching the stalled OHLCV of %s: %s", pair, e, extra={"exchange": self.__name})
+        await self.__Sleep(delay)
+        health.OnRetry()
+
+    async def __Sleep(self, seconds: float):
+        """
+        Wait the given seconds before subscribing again, or until the exchange is stopped.
+        """
         try:
-            if self.__running and hasattr(self.__exchange, 'unWatchOHLCV'):
-                await self.__exchange.unWatchOHLCV(pair, self.INTERVAL)
-        except Exception as e:
-            print(f"Error unwatching OHLCV for {pair}: {e}")
-        del self.__openCalls[pair]
-        print(f"Closed all calls for {pair}")
-
-    async def _RegisterCall(self, call: Call):
-        pair = await self.__CheckPair(call.pair)
-        if pair in self.__openCalls:
-            self.__openCalls[pair]['calls'].append(call)
-        else:
-            # load the first OHLCV to get the last price
-            ohlcv = (await self.__exchange.watchOHLCV(pair, self.INTERVAL))[0]
-            # only keep the close price
-            lastOhlcv = [int(datetime.now().timestamp() * 1000) - 1, ohlcv[4], ohlcv[4], ohlcv[4], ohlcv[4], 0]
-            self.__openCalls[pair] = {'calls': [call], 'pair': pair, 'task': None, 'lastOhlcv': lastOhlcv}
-            lastOhlcv = lastOhlcv.copy()
-            lastOhlcv[0] += 1
-            await self.__HandleOhlcv(self.__openCalls[pair], lastOhlcv)
-
-            self.__openCalls[pair]['task'] = asyncio.create_task(self.__WatchOhlcv(pair))
-            print(f"Created task call for {pair}")
+            await asyncio.wait_for(self.__stopped.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def __RebuildConnection(self, generation: int, reason: str):
+        """
+        Close the websocket connections of the exchange, every stream subscribes again on a new connection.
+        """
+        async with self.__rebuildLock:
+            if generation != self.__generation:
+                # Rebuilt already by another stream
+                return
+            self.__generation += 1
+            _logger.warning("Rebuilding the connection of %s, %s", self.__name, reason, extra={"exchange": self.__name})
+            _REBUILDS.Labels(self.__name).Inc()
+            self.__failing.clear()
+            await self.__CloseStreams()
+
+    async def __DispatchOhlcv(self):
+        """
+        Watch all open pairs of the exchange over a single multi-symbol subscription
+        and route the candles to the pair buckets.
+        """
+        backfill = False
+        lastMessageAt = time.monotonic()
+        while self.__running:
+            generation = self.__generation
+            if backfill:
+                # Catch up on the candles missed while the stream was down
+                await self.__BackfillAll()
+                backfill = False
+                continue
+            self.__symbolsChanged.clear()
+            # Pairs that didn't catch up yet join once they did
+            symbols = [[pair, self.INTERVAL] for pair, pairData in self.__openCalls.items() if pairData['caughtUp']]
+            if not symbols:
+                break
+            watchTask = asyncio.ensure_future(self.__exchange.watchOHLCVForSymbols(symbols))
+            changedTask = asyncio.ensure_future(self.__symbolsChanged.wait())
+            # Without updates of any pair for the stale time the shared stream has stalled
+            timeout = max(0.0, self.__staleSeconds - (time.monotonic() - lastMessageAt))
+            try:
+                await asyncio.wait((watchTask, changedTask), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                changedTask.cancel()
+
+            try:
+                if not watchTask.done():
+                    # The pending watch is left to ccxt as its future is shared with the subscription
+                    watchTask.add_done_callback(lambda task: task.cancelled() or task.exception())
+                    if self.__symbolsChanged.is_set():
+                        # The set of pairs changed, subscribe again with the new set
+                        continue
+                    raise asyncio.TimeoutError()
+
+                msg = watchTask.result()
+                receivedAt = time.perf_counter()
+                lastMessageAt = time.monotonic()
+                self.__health.OnMessage()
+                for pair, timeframes in msg.items():
+                    pairData = self.__openCalls.get(pair)
+                    if pairData is None or not pairData['caughtUp']:
+                        continue
+                    pairData['health'].OnMessage()
+                    candles = timeframes.get(self.INTERVAL, [])
+                    for ohlcv in candles:
+                        if not await self.__HandleOhlcv(pairData, ohlcv):
+                            await self.__ClosePair(pair)
+                            break
+                    self.__ObserveCandles(pairData, len(candles), receivedAt)
+            except Exception as e:
+                backfill = True
+                await self.__OnSharedStreamFailure(e, generation)
+                lastMessageAt = time.monotonic()
+
+        self.__dispatcher = None
+
+    async def __OnSharedStreamFailure(self, error: Exception, generation: int):
+        """
+        Wait before subscribing the shared stream of all pairs again. All pairs failed
+        together, so the connection of the exchange is rebuilt.
+        """
+        if not self.__running:
+            return
+        reason = self.__DescribeError(error)
+        delay = self.__health.OnFailure(reason)
+        for pairData in self.__openCalls.values():
+            pairData['health'].OnFailure(reason, delay)
+        _logger.warning("Error watching OHLCV for %s: %s, reconnecting in %.1fs", self.__name, reason, delay,
+                        extra={"exchange": self.__name, "failures": self.__health.failures})
+        _RECONNECTS.Labels(self.__name).Inc()
+        await self.__RebuildConnection(generation, "the shared stream failed")
+        await self.__Sleep(delay)
+        self.__health.OnRetry()
+        for pairData in self.__openCalls.values():
+            pairData['health'].OnRetry()
+
+    def __ObserveCandles(self, pairData, nrOfCandles: int, receivedAt: float):
+        """Count the received candle updates of a pair and the time until they were processed."""
+        if _CANDLE_SECONDS.enabled:
+            _CANDLES.Labels(self.__name).Inc(nrOfCandles)
+            pairData['candleSeconds'].Observe(time.perf_counter() - receivedAt)
+
+    async def __ClosePair(self, pair):
+        """
+        Stop watching a pair once it has no open calls left.
+        """
+        if self.__running:
+            await self.__Unwatch([pair])
+        self.__openCalls.pop(pair, None)
+        self.__failing.discard(pair)
+        _logger.info("Closed all calls for %s", pair, extra={"exchange": self.__name})
+
+    async def _RegisterCall(self, call: Call, backfill: bool = True):
+        await self._RegisterCalls(call.pair, [call], backfill)
+
+    async def _RegisterCalls(self, pair: str, calls: List[Call], backfill: bool = True):
+        """
+        Register calls on the same pair with a single pair check and price fetch. Unless
+        backfill is off, the candles missed since the calls were last monitored are replayed.
+        """
+        pair = await self.__CheckPair(pair)
+        async with self.__pairLocks.setdefault(pair, asyncio.Lock()):
+            if pair in self.__openCalls:
+                for call in calls:
+                    self.__registry.Add(call)
+                    self.__openCalls[pair]['calls'].append(call)
+                    self.__openCalls[pair]['ladder'].Add(call)
+                return
+
+            state = await self.__GetPairState(pair)
+            fixedPoint = self.__markets.GetFixedPoint(pair)
+            ladder = PriceLadder(fixedPoint)
+            for call in calls:
+                ladder.Add(call)
+            pairData = {'calls': list(calls), 'ladder': ladder, 'fixedPoint': fixedPoint, 'pair': pair,
+                        'task': None, 'lastOhlcv': [0, 0, 0, 0, 0, 0], 'state': state,
+                        'candleSeconds': _CANDLE_SECONDS.Labels(self.__name, pair), 'health': StreamHealth(),
+                        'since': None, 'caughtUp': False}
+            if backfill:
+                # Replay the candles missed since the last processed candle, but not the ones
+                # from before the oldest call was created
+                since = min(call.createdAt for call in calls)
+                if state.lastCandleAt is not None:
+                    since = max(since, state.lastCandleAt)
+                if time.time() - since.timestamp() >= self.__intervalMs / 1000:
+                    pairData['since'] = int(since.timestamp() * 1000)
+            else:
+                # Nothing to replay, the price is seeded right away so it's known when the call is posted
+                await self.__SeedPrice(pairData)
+                pairData['caughtUp'] = True
+
+            # The pair is only added once it can be watched, its task catches up on the missed candles
+            self.__openCalls[pair] = pairData
+            for call in calls:
+                self.__registry.Add(call)
+            if self.__multiplexed:
+                pairData['task'] = asyncio.create_task(self.__CatchUpPair(pair))
+                _logger.info("Added %s to the %s dispatcher", pair, self.__name)
+            else:
+                pairData['task'] = asyncio.create_task(self.__WatchOhlcv(pair))
+                _logger.info("Created task call for %s", pair, extra={"exchange": self.__name})
 
     async def AddCall(self, contractAddress: str, pair: str, entryPrice: Decimal, stopLoss: Decimal, takeProfits: List):
-        await self.__CheckPair(pair)
+        pair = await self.__CheckPair(pair)
         call = await Call.Create(contractAddress, pair, self.name, entryPrice, stopLoss, takeProfits)
-        await self._RegisterCall(call)
-        print(f"Added pair {pair} to watch.")
+        # A new call has no missed candles
+        await self._RegisterCall(call, backfill=False)
+        _logger.info("Added pair %s to watch.", pair, extra={"exchange": self.name})
         return call
 
-    def Get(self, callId: int) -> Call:
+    def _UnregisterCall(self, call: Call):
         """
-        Get a call by its ID.
+        Stop monitoring a call. The pair is unwatched on its next update when it has no calls left.
         """
-        for pairData in self.__openCalls.values():
-            for call in pairData['calls']:
-                if call.id == callId:
-                    return call
+        pairData = self.__openCalls.get(call.pair)
+        if pairData is not None and call in pairData['calls']:
+            pairData['calls'].remove(call)
+            pairData['ladder'].Remove(call)
+        self.__registry.Update(call)
+
+    def _ReindexCall(self, call: Call):
+        """
+        Update the indexed thresholds of a call after its entry, stop loss or targets changed.
+        """
+        pairData = self.__openCalls.get(call.pair)
+        if pairData is not None and call in pairData['calls']:
+            pairData['ladder'].Add(call)
+
+    async def CloseCall(self, call: Call):
+        """
+        Close a call and stop monitoring it.
+        """
+        await call.Close()
+        self._UnregisterCall(call)
+
+    async def SetStopLoss(self, call: Call, stopLoss: Decimal):
+        """
+        Change the stop loss of a call and update its monitored thresholds.
+        """
+        call.stopLoss = stopLoss
+        await call.Save()
+        self._ReindexCall(call)
+
+    async def GetStreamHealth(self) -> List[dict]:
+        """
+        Get the health of the stream of every watched pair.
+        """
+        return [dict(pairData['health'].Describe(self.__staleSeconds), exchange=self.__name, pair=pair)
+                for pair, pairData in sorted(self.__openCalls.items())]
 
     def GetOpenCalls(self) -> List[Call]:
         """
@@ -488,26 +1063,45 @@ class CryptoMonitor:
         self.__bsm = None
         self.__running = False
         self.__exchanges = {}
+        self.__registry = CallRegistry(MonitorSettings.GetClosedCallCacheSize())
 
     async def Initialize(self):
         self.__running = True
+        database.WriteBehind.Start()
         await self.__LoadOpenCalls()
 
     async def Stop(self):
         self.__running = False
 
-        for exchange in self.__exchanges.copy().values():
-            await exchange.Stop()
+        try:
+            for exchange in self.__exchanges.copy().values():
+                await exchange.Stop()
+
+            self.__registry.Clear()
+        finally:
+            # Write all state changes that are still queued, also when an exchange failed to stop
+            await database.WriteBehind.Stop()
 
     async def __RegisterExchange(self, exchangeName: str):
         """
-        Register an exchange with the monitor.
+        Register an exchange with the monitor, in a worker process of its own when worker
+        processes are enabled.
         """
-        if exchangeName in self.__exchanges:
-            return self.__exchanges[exchangeName]
+        exchange = self.__exchanges.get(exchangeName)
+        if exchange is None:
+            if MonitorSettings.IsWorkerProcessesEnabled():
+                from .exchangeworker import ExchangeWorker
+                exchange = ExchangeWorker(exchangeName, self.__registry)
+            else:
+                exchange = CryptoExchange(exchangeName, self.__registry)
+            self.__exchanges[exchangeName] = exchange
 
-        exchange = CryptoExchange(exchangeName)
-        self.__exchanges[exchangeName] = exchange
+        try:
+            await exchange.Start()
+        except Exception:
+            if self.__exchanges.get(exchangeName) is exchange:
+                del self.__exchanges[exchangeName]
+            raise
         return exchange
 
 
@@ -525,45 +1119,89 @@ class CryptoMonitor:
 
         return call
 
-    async def __RegisterCall(self, call: Call):
-        """
-        Register a call with the appropriate exchange.
-        """
-        exchange = await self.__RegisterExchange(call.exchange)
-
-        await exchange._RegisterCall(call)
-
     async def Get(self, callId: int) -> Call:
         """
         Get a call by its ID.
         """
-        # First try to find it in the open calls
-        for exchange in self.__exchanges.values():
-            call = exchange.Get(callId)
-            if call is not None:
-                return call
-        return await Call.GetById(callId)
+        # First try to find it in the open and recently closed calls
+        call = self.__registry.Get(callId)
+        if call is None:
+            call = await Call.GetById(callId)
+            if call.status == database.CryptoCall.Status.CLOSED:
+                # Closed calls don't change anymore and are safe to cache
+                self.__registry.Add(call)
+        return call
 
     def GetOpenCalls(self) -> List[Call]:
         """
         Get all open calls.
         """
-        calls = []
-        for exchange in self.__exchanges.values():
-            calls.extend(exchange.GetOpenCalls())
-        return calls
+        return self.__registry.GetOpenCalls()
+
+    def GetCallsByPair(self, exchangeName: str, pair: str) -> List[Call]:
+        """
+        Get the open calls on a pair of an exchange.
+        """
+        return self.__registry.GetByPair(exchangeName, pair)
+
+    def GetCallsByStatus(self, status: database.CryptoCall.Status) -> List[Call]:
+        """
+        Get the open calls with a status.
+        """
+        return self.__registry.GetByStatus(status)
+
+    async def GetStreamHealth(self) -> List[dict]:
+        """
+        Get the health of the OHLCV stream of every watched pair of all exchanges.
+        """
+        rows = []
+        for exchange in list(self.__exchanges.values()):
+            try:
+                rows.extend(await exchange.GetStreamHealth())
+            except ConnectionError as e:
+                # The worker of the exchange is restarting
+                rows.append({"exchange": exchange.name, "pair": None, "state": "unavailable", "age": None,
+                             "failures": 0, "reconnects": 0, "retryIn": None, "error": str(e)})
+        return rows
 
     async def __LoadOpenCalls(self):
         """
         Load all open calls from the database.
         """
+        startTime = time.time()
         openCalls = await Call.GetOpenCalls()
+
+        # Group the calls per pair, so every pair is checked and priced only once
+        pairs = {}
         for call in openCalls:
-            try:
-                await self.__RegisterCall(call)
-            except ValueError:
-                call.Cancel()
-        print(f"Loaded {len(openCalls)} open calls.")
+            pairs.setdefault((call.exchange, call.pair), []).append(call)
+        _logger.info("Registering %d open calls on %d pairs.", len(openCalls), len(pairs))
+
+        semaphores = {}
+        progress = {'done': 0, 'failed': 0}
+        reportEvery = max(1, len(pairs) // 10)
+
+        async def RegisterPair(exchangeName: str, pair: str, calls: List[Call]):
+            # Limit the number of pairs registering concurrently per exchange
+            semaphore = semaphores.setdefault(exchangeName, asyncio.Semaphore(MonitorSettings.GetStartupConcurrency()))
+            async with semaphore:
+                try:
+                    exchange = await self.__RegisterExchange(exchangeName)
+                    await exchange._RegisterCalls(pair, calls)
+                except ValueError as e:
+                    _logger.warning("Cancelling %d calls on %s %s: %s", len(calls), exchangeName, pair, e)
+                    for call in calls:
+                        await call.Cancel()
+                        self.__registry.Add(call)
+                except Exception:
+                    progress['failed'] += 1
+                    _logger.exception("Error registering the calls on %s %s", exchangeName, pair)
+            progress['done'] += 1
+            if progress['done'] % reportEvery == 0 or progress['done'] == len(pairs):
+                _logger.info("Registered %d/%d pairs in %.1fs.", progress['done'], len(pairs), time.time() - startTime)
+
+        await asyncio.gather(*(RegisterPair(exchangeName, pair, calls) for (exchangeName, pair), calls in pairs.items()))
+        _logger.info("Loaded %d open calls in %.1fs, %d pairs failed.", len(openCalls), time.time() - startTime, progress['failed'])
 
     async def CloseCall(self, callId: int):
         """
@@ -572,4 +1210,18 @@ class CryptoMonitor:
         call = await self.Get(callId)
         if call is None:
             raise ValueError(f"Call with ID {callId} not found.")
-        await call.Close()
\ No newline at end of file
+        if call.exchange in self.__exchanges:
+            await self.__exchanges[call.exchange].CloseCall(call)
+        else:
+            await call.Close()
+            self.__registry.Update(call)
+
+    async def SetStopLoss(self, call: Call, stopLoss: Decimal):
+        """
+        Change the stop loss of a call and update the monitored thresholds.
+        """
+        if call.exchange in self.__exchanges:
+            await self.__exchanges[call.exchange].SetStopLoss(call, stopLoss)
+        else:
+            call.stopLoss = stopLoss
+            await call.Save()
\ No newline at end of file
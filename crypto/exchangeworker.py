@@ -0,0 +1,463 @@
+import asyncio
+import itertools
+import multiprocessing
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from typing import List
+
+import ccxt.pro as ccxt
+
+import database
+from .callregistry import CallRegistry
+from .cryptomonitor import Call, CryptoExchange
+from .monitorsettings import MonitorSettings
+from .pricestore import PriceStore
+from telemetry import Metrics, Logger
+
+_logger = Logger.Get("crypto")
+
+_WORKER_RESTARTS = Metrics.Counter("cryptocallbot_worker_restarts_total",
+                                   "Restarts of the exchange worker processes after they exited.", ("exchange",))
+
+# Seconds between the price updates a worker sends to the main process
+_PRICE_INTERVAL = 1.0
+# Seconds between the snapshots of the metrics a worker sends to the main process
+_METRICS_INTERVAL = 5.0
+# Seconds a worker waits for a request before it checks whether it was terminated
+_POLL_INTERVAL = 1.0
+# Seconds a worker gets to write its queued changes and close when it is stopped
+_STOP_TIMEOUT = 60.0
+
+
+def _Receive(connection):
+    """Wait for the next message on the connection, None when the other side closed it."""
+    try:
+        return connection.recv()
+    except (EOFError, OSError):
+        return None
+
+
+def _Send(connection, message: tuple):
+    """Send a message to the main process, dropped when the main process is gone."""
+    try:
+        connection.send(message)
+    except (OSError, ValueError):
+        pass
+
+
+class _CallEvents:
+    """
+    Stand-in for the bot in a worker process, the events of the calls are sent to the
+    main process together with the state of the call.
+    """
+    def __init__(self, connection):
+        self.__connection = connection
+
+    async def SendMessage(self, message: str) -> None:
+        _Send(self.__connection, ("message", message))
+
+    async def SendCallMessage(self, call: Call, comment: str, significant: bool = True) -> None:
+        _Send(self.__connection, ("call", call, comment, significant))
+
+
+class _Worker:
+    """
+    The monitor of a single exchange in a worker process, with its own event loop,
+    database pool and write behind queue. Requests of the main process are handled
+    concurrently, as they are by the monitor in a single process.
+    """
+    def __init__(self, name: str, connection):
+        self.__name = name
+        self.__connection = connection
+        self.__registry = CallRegistry(MonitorSettings.GetClosedCallCacheSize())
+        self.__exchange = None
+        self.__terminated = False
+        self.__requests = set()
+        self.__handlers = {"AddCall": self.__AddCall, "RegisterCalls": self.__RegisterCalls,
+                           "CloseCall": self.__CloseCall, "SetStopLoss": self.__SetStopLoss,
+                           "GetStreamHealth": self.__GetStreamHealth}
+
+    async def Run(self):
+        from bot import CryptoCallBot
+        CryptoCallBot.SetInstance(_CallEvents(self.__connection))
+        try:
+            self.__exchange = CryptoExchange(self.__name, self.__registry)
+            await database.Database.Init()
+            database.WriteBehind.Start()
+        except Exception as e:
+            _Send(self.__connection, ("ready", e))
+            return
+        _Send(self.__connection, ("ready", None))
+        _logger.info("Worker process of %s started", self.__name, extra={"exchange": self.__name})
+        # Terminating the worker stops it the same way, after it wrote its queued changes
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, self.__Terminate)
+
+        prices = asyncio.create_task(self.__SendPrices())
+        metrics = asyncio.create_task(self.__SendMetrics()) if Metrics.IsEnabled() else None
+        stopRequest = None
+        while not self.__terminated:
+            if not await asyncio.to_thread(self.__connection.poll, _POLL_INTERVAL):
+                continue
+            message = await asyncio.to_thread(_Receive, self.__connection)
+            if message is None:
+                # The main process is gone
+                break
+            _kind, requestId, method, args = message
+            if method == "Stop":
+                stopRequest = requestId
+                break
+            task = asyncio.create_task(self.__Handle(requestId, method, args))
+            self.__requests.add(task)
+            task.add_done_callback(self.__requests.discard)
+
+        prices.cancel()
+        if self.__requests:
+            await asyncio.gather(*self.__requests)
+        try:
+            await self.__exchange.Stop()
+        finally:
+            # Write all state changes that are still queued, also when the exchange failed to stop
+            await database.WriteBehind.Stop()
+        await database.Database.Close()
+        if metrics is not None:
+            metrics.cancel()
+            _Send(self.__connection, ("metrics", Metrics.Snapshot()))
+        _logger.info("Worker process of %s stopped", self.__name, extra={"exchange": self.__name})
+        if stopRequest is not None:
+            self.__Reply(stopRequest, None, None)
+
+    def __Terminate(self):
+        self.__terminated = True
+
+    def __Reply(self, requestId: int, result, error):
+        try:
+            _Send(self.__connection, ("reply", requestId, result, error, self.__exchange.size))
+        except Exception:
+            # The error can't be sent as it is, e.g. it doesn't pickle
+            _Send(self.__connection, ("reply", requestId, None, RuntimeError(f"{type(error).__name__}: {error}"),
+                                      self.__exchange.size))
+
+    async def __Handle(self, requestId: int, method: str, args: tuple):
+        try:
+            result = await self.__handlers[method](*args)
+        except Exception as e:
+            if not isinstance(e, ValueError):
+                _logger.exception("Error handling %s", method, extra={"exchange": self.__name})
+            self.__Reply(requestId, None, e)
+        else:
+            self.__Reply(requestId, result, None)
+
+    async def __GetCall(self, callId: int) -> Call:
+        call = self.__registry.Get(callId)
+        if call is None:
+            call = await Call.GetById(callId)
+        return call
+
+    async def __AddCall(self, contractAddress: str, pair: str, entryPrice: Decimal, stopLoss: Decimal,
+                        takeProfits: List) -> Call:
+        return await self.__exchange.AddCall(contractAddress, pair, entryPrice, stopLoss, takeProfits)
+
+    async def __RegisterCalls(self, pair: str, calls: List[Call]):
+        await self.__exchange._RegisterCalls(pair, calls)
+
+    async def __CloseCall(self, callId: int) -> Call:
+        call = await self.__GetCall(callId)
+        await self.__exchange.CloseCall(call)
+        return call
+
+    async def __SetStopLoss(self, callId: int, stopLoss: Decimal) -> Call:
+        call = await self.__GetCall(callId)
+        await self.__exchange.SetStopLoss(call, stopLoss)
+        return call
+
+    async def __GetStreamHealth(self) -> List[dict]:
+        return await self.__exchange.GetStreamHealth()
+
+    async def __SendMetrics(self):
+        """Send the metrics of the worker to the main process, which serves them with its own."""
+        while True:
+            await asyncio.sleep(_METRICS_INTERVAL)
+            _Send(self.__connection, ("metrics", Metrics.Snapshot()))
+
+    async def __SendPrices(self):
+        """Send the prices that changed to the main process, for the overviews of the calls."""
+        since = 0.0
+        while True:
+            await asyncio.sleep(_PRICE_INTERVAL)
+            updates = PriceStore.GetUpdates(self.__name, since)
+            if updates:
+                since = max(updatedAt for _pair, _price, _fixedPoint, updatedAt in updates)
+                _Send(self.__connection, ("prices", updates, self.__exchange.size))
+
+
+def RunWorker(name: str, connection):
+    """Entry point of a worker process, monitors the exchange until the main process stops it."""
+    # The interrupt of the terminal reaches the whole process group, the main process stops the worker
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        asyncio.run(_Worker(name, connection).Run())
+    finally:
+        connection.close()
+        Logger.Stop()
+
+
+class ExchangeWorker:
+    """
+    An exchange monitored in a worker process, so the streams and the trigger logic of
+    several exchanges run on separate cores instead of sharing the event loop of the bot.
+
+    It takes the place of a CryptoExchange in the monitor. Requests are sent to the worker
+    over a pipe and answered with the state of the call, the events of the calls are sent
+    back and posted by the bot. The registry of the monitor holds a copy of every call,
+    updated by the events, and the worker sends the last prices every second, so the
+    overviews are rendered in the main process. When the worker exits it is restarted
+    after a delay that doubles per restart, and the open calls of the exchange are loaded
+    from the database and registered again. Missed candles are replayed by the backfill.
+    The worker sends snapshots of its metrics, which are served by the metrics endpoint.
+    """
+    def __init__(self, name: str, registry: CallRegistry):
+        if name not in ccxt.exchanges:
+            # Checked here, so no process is started for an unknown exchange
+            raise ValueError(f"Exchange {name} not found.")
+        self.__name = name
+        self.__registry = registry
+        self.__connection = None
+        self.__process = None
+        self.__supervisor = None
+        self.__started = None
+        self.__running = True
+        self.__stopping = asyncio.Event()
+        self.__requests = {}  # request id -> future of the reply
+        self.__requestIds = itertools.count()
+        self.__size = 0
+        # The messages of the worker are awaited on a thread of its own, so the threads of
+        # the default executor are not kept busy
+        self.__receiver = ThreadPoolExecutor(1, thread_name_prefix=f"worker-{name}")
+
+    @property
+    def name(self) -> str:
+        return self.__name
+
+    @property
+    def size(self) -> int:
+        """Number of pairs watched by the worker."""
+        return self.__size
+
+    async def Start(self):
+        """
+        Start the worker process, raises the error of the worker when it can't monitor the exchange.
+        """
+        if self.__supervisor is None:
+            self.__started = asyncio.get_running_loop().create_future()
+            self.__supervisor = asyncio.create_task(self.__Supervise())
+        try:
+            await asyncio.shield(self.__started)
+        except Exception:
+            # The worker never ran, there is nothing left to stop
+            self.__receiver.shutdown()
+            raise
+
+    async def Stop(self):
+        """
+        Stop the worker process, after it wrote its queued changes.
+        """
+        self.__running = False
+        self.__stopping.set()
+        if self.__connection is not None:
+            try:
+                await asyncio.wait_for(self.__Request("Stop"), _STOP_TIMEOUT)
+            except asyncio.TimeoutError:
+                _logger.error("Worker of %s did not stop in time", self.__name, extra={"exchange": self.__name})
+                self.__process.kill()
+            except ConnectionError:
+                pass
+        if self.__supervisor is not None:
+            await self.__supervisor
+        self.__receiver.shutdown()
+        _logger.info("Stopped the worker of %s", self.__name)
+
+    async def __Spawn(self):
+        """Start a worker process and wait until it is ready."""
+        context = multiprocessing.get_context("spawn")
+        connection, workerConnection = context.Pipe()
+        process = context.Process(target=RunWorker, args=(self.__name, workerConnection),
+                                  name=f"cryptocallbot-{self.__name}", daemon=True)
+        try:
+            process.start()
+        except Exception:
+            connection.close()
+            raise
+        finally:
+            # The worker has its own copy of its end of the pipe
+            workerConnection.close()
+        self.__process = process
+        message = await self.__Receive(connection)
+        if message is None or message[1] is not None:
+            connection.close()
+            await self.__Join(process)
+            raise message[1] if message is not None else ConnectionError(f"Worker of {self.__name} exited on start.")
+        self.__connection = connection
+
+    async def __Receive(self, connection):
+        return await asyncio.get_running_loop().run_in_executor(self.__receiver, _Receive, connection)
+
+    async def __Join(self, process):
+        await asyncio.to_thread(process.join, _STOP_TIMEOUT)
+        if process.is_alive():
+            process.kill()
+
+    async def __Supervise(self):
+        """
+        Run the worker process and restart it when it exits while the monitor is running.
+        """
+        delay = 1.0
+        while self.__running:
+            startedAt = time.monotonic()
+            try:
+                await self.__Spawn()
+            except Exception as e:
+                if not self.__started.done():
+                    self.__started.set_exception(e)
+                    return
+                _logger.error("Error restarting the worker of %s: %s", self.__name, e, extra={"exchange": self.__name})
+            else:
+                reload = None
+                if not self.__started.done():
+                    self.__started.set_result(None)
+                elif self.__running:
+                    reload = asyncio.create_task(self.__Reload())
+                else:
+                    # Stopped while the worker was restarting
+                    self.__connection.send(("request", next(self.__requestIds), "Stop", ()))
+                await self.__Read(self.__connection)
+                if reload is not None:
+                    reload.cancel()
+                self.__connection.close()
+                self.__connection = None
+                Metrics.RetireSnapshot(self.__name)
+                for future in self.__requests.values():
+                    if not future.done():
+                        future.set_exception(ConnectionError(f"Worker of {self.__name} exited."))
+                self.__requests.clear()
+                await self.__Join(self.__process)
+
+            if not self.__running:
+                break
+            if time.monotonic() - startedAt > MonitorSettings.GetWorkerRestartMaxSeconds():
+                # The worker ran for a while, it didn't fail on start
+                delay = 1.0
+            _logger.error("Worker of %s exited with code %s, restarting in %.0fs", self.__name,
+                          self.__process.exitcode, delay, extra={"exchange": self.__name})
+            _WORKER_RESTARTS.Labels(self.__name).Inc()
+            try:
+                await asyncio.wait_for(self.__stopping.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            delay = min(delay * 2, MonitorSettings.GetWorkerRestartMaxSeconds())
+
+    async def __Read(self, connection):
+        """Handle the messages of the worker until it closes the connection."""
+        while True:
+            message = await self.__Receive(connection)
+            if message is None:
+                return
+            try:
+                await self.__Handle(message)
+            except Exception:
+                _logger.exception("Error handling a message of the worker of %s", self.__name)
+
+    async def __Handle(self, message: tuple):
+        kind = message[0]
+        if kind == "call":
+            _kind, call, comment, significant = message
+            await self.__Apply(call).SendMessage(comment, significant)
+        elif kind == "prices":
+            _kind, updates, self.__size = message
+            for pair, price, fixedPoint, updatedAt in updates:
+                PriceStore.Set(self.__name, pair, price, fixedPoint, updatedAt)
+        elif kind == "reply":
+            _kind, requestId, result, error, self.__size = message
+            future = self.__requests.pop(requestId, None)
+            if future is None or future.done():
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+        elif kind == "message":
+            from bot import CryptoCallBot
+            await CryptoCallBot.GetInstance().SendMessage(message[1])
+        elif kind == "metrics":
+            Metrics.AddSnapshot(self.__name, message[1])
+
+    def __Apply(self, call: Call) -> Call:
+        """
+        Update the copy of a call in the registry with the state sent by the worker.
+        """
+        known = self.__registry.Get(call.id)
+        if known is not None:
+            known._Assign(call)
+            call = known
+        self.__registry.Update(call)
+        return call
+
+    async def __Request(self, method: str, *args):
+        if self.__connection is None:
+            raise ConnectionError(f"Worker of {self.__name} is not running.")
+        requestId = next(self.__requestIds)
+        future = asyncio.get_running_loop().create_future()
+        self.__requests[requestId] = future
+        try:
+            self.__connection.send(("request", requestId, method, args))
+        except (OSError, ValueError) as e:
+            del self.__requests[requestId]
+            raise ConnectionError(f"Worker of {self.__name} is not running.") from e
+        return await future
+
+    async def __Reload(self):
+        """
+        Register the open calls of the exchange with a restarted worker, as they are stored
+        in the database.
+        """
+        calls = await Call.GetOpenCalls(self.__name)
+        callIds = {call.id for call in calls}
+        for known in self.__registry.GetOpenCalls():
+            if known.exchange == self.__name and known.id not in callIds:
+                self.__registry.Remove(known)
+
+        pairs = {}
+        for call in calls:
+            pairs.setdefault(call.pair, []).append(self.__Apply(call))
+        semaphore = asyncio.Semaphore(MonitorSettings.GetStartupConcurrency())
+
+        async def RegisterPair(pair: str, calls: List[Call]):
+            async with semaphore:
+                try:
+                    await self._RegisterCalls(pair, calls)
+                except Exception as e:
+                    _logger.error("Error registering the calls on %s again: %s", pair, e, extra={"exchange": self.__name})
+
+        await asyncio.gather(*(RegisterPair(pair, calls) for pair, calls in pairs.items()))
+        _logger.info("Registered %d open calls with the restarted worker", len(calls), extra={"exchange": self.__name})
+
+    async def _RegisterCalls(self, pair: str, calls: List[Call]):
+        for call in calls:
+            self.__registry.Add(call)
+        await self.__Request("RegisterCalls", pair, calls)
+
+    async def AddCall(self, contractAddress: str, pair: str, entryPrice: Decimal, stopLoss: Decimal, takeProfits: List):
+        call = await self.__Request("AddCall", contractAddress, pair, entryPrice, stopLoss, takeProfits)
+        return self.__Apply(call)
+
+    async def CloseCall(self, call: Call):
+        call._Assign(await self.__Request("CloseCall", call.id))
+        self.__Apply(call)
+
+    async def SetStopLoss(self, call: Call, stopLoss: Decimal):
+        call._Assign(await self.__Request("SetStopLoss", call.id, stopLoss))
+        self.__Apply(call)
+
+    async def GetStreamHealth(self) -> List[dict]:
+        return await self.__Request("GetStreamHealth")
@@ -0,0 +1,48 @@
+import math
+from decimal import Decimal, ROUND_CEILING, ROUND_FLOOR
+
+
+class FixedPoint:
+    """
+    Prices as integers scaled by 10^decimals, for comparisons on every tick without
+    creating Decimals.
+
+    Thresholds are rounded towards the side that never misses a crossing: a low
+    threshold (crossed when the low drops to or below it) is rounded down and a
+    candle low is rounded down as well, a high threshold and a candle high are
+    rounded up. A price that is rounded to the same integer as a threshold may be
+    reported as crossed while the exact Decimal comparison isn't, so the integer
+    comparison only preselects and the Decimal comparison in Call.Update decides.
+    """
+    DEFAULT_DECIMALS = 10  # The precision of the prices in the database
+
+    def __init__(self, decimals: int = DEFAULT_DECIMALS):
+        self.decimals = decimals
+        self.scale = 10 ** decimals
+
+    def __repr__(self):
+        return f"<FixedPoint decimals={self.decimals}>"
+
+    def Floor(self, value: float) -> int:
+        return math.floor(value * self.scale)
+
+    def Ceil(self, value: float) -> int:
+        return math.ceil(value * self.scale)
+
+    def Round(self, value: float) -> int:
+        return round(value * self.scale)
+
+    def FloorDecimal(self, value: Decimal) -> int:
+        return int(value.scaleb(self.decimals).to_integral_value(ROUND_FLOOR))
+
+    def CeilDecimal(self, value: Decimal) -> int:
+        return int(value.scaleb(self.decimals).to_integral_value(ROUND_CEILING))
+
+    def ToDecimal(self, value: int) -> Decimal:
+        return Decimal(value).scaleb(-self.decimals)
+
+    @classmethod
+    def FromTickSize(cls, tickSize) -> "FixedPoint":
+        """Create the scale of a market with a price precision given as tick size, e.g. 0.01."""
+        exponent = Decimal(str(tickSize)).normalize().as_tuple().exponent
+        return cls(max(0, -exponent))
@@ -0,0 +1,147 @@
+import asyncio
+import json
+import os
+import re
+import time
+from typing import Dict, Optional
+from ccxt.base.decimal_to_precision import DECIMAL_PLACES, TICK_SIZE
+
+from .fixedpoint import FixedPoint
+from .monitorsettings import MonitorSettings
+from telemetry import Logger
+
+_logger = Logger.Get("crypto")
+
+
+def NormalizeSymbol(symbol: str) -> str:
+    """Normalize a symbol for lookups, e.g. BTC/USDT, btc-usdt and BTCUSDT all become btcusdt."""
+    return re.sub(r'[^a-z0-9]', '', symbol.lower())
+
+
+class MarketCache:
+    """
+    Market metadata of an exchange, cached on disk.
+
+    The markets are read from the cache file when the monitor starts and handed to ccxt,
+    so no markets need to be downloaded before the first call registers. When the cache
+    is older than its TTL it is still used while a background task downloads the markets
+    again. Only a missing cache blocks on a download.
+
+    The active spot symbols are kept in a dictionary with their normalized aliases, such
+    as btcusdt for BTC/USDT, so a pair is validated with a single lookup.
+    """
+    def __init__(self, exchange, name: str):
+        self.__exchange = exchange
+        self.__path = os.path.join(MonitorSettings.GetMarketCacheDir(), f"{name}.json")
+        self.__symbols: Dict[str, str] = {}  # symbol or normalized alias -> symbol
+        self.__loadedAt = None
+        self.__loadLock = asyncio.Lock()
+        self.__refreshTask = None
+
+    @property
+    def age(self) -> float:
+        """Seconds since the markets were downloaded, infinite when they were never loaded."""
+        return float('inf') if self.__loadedAt is None else time.time() - self.__loadedAt
+
+    async def Stop(self):
+        if self.__refreshTask is not None:
+            self.__refreshTask.cancel()
+            try:
+                await self.__refreshTask
+            except asyncio.CancelledError:
+                pass
+            self.__refreshTask = None
+
+    async def Resolve(self, pair: str) -> Optional[str]:
+        """
+        Get the symbol of a pair, given as symbol or alias, None when it isn't an active spot market.
+        """
+        await self.__Load()
+        if self.age > MonitorSettings.GetMarketCacheTtl() and self.__refreshTask is None:
+            self.__refreshTask = asyncio.create_task(self.__RefreshInBackground())
+
+        return self.__symbols.get(pair) or self.__symbols.get(NormalizeSymbol(pair))
+
+    def GetFixedPoint(self, symbol: str) -> FixedPoint:
+        """Get the integer scale of the prices of a market, from the price precision of the market."""
+        market = (self.__exchange.markets or {}).get(symbol) or {}
+        precision = (market.get('precision') or {}).get('price')
+        if precision is not None:
+            if self.__exchange.precisionMode == TICK_SIZE:
+                return FixedPoint.FromTickSize(precision)
+            if self.__exchange.precisionMode == DECIMAL_PLACES:
+                return FixedPoint(int(precision))
+        return FixedPoint()
+
+    async def __Load(self):
+        """Load the markets once, from the cache file or else from the exchange."""
+        if self.__loadedAt is not None:
+            return
+        async with self.__loadLock:
+            if self.__loadedAt is not None:
+                return
+            try:
+                cached = await asyncio.to_thread(self.__ReadCache)
+            except Exception as e:
+                _logger.warning("Ignoring the market cache %s: %s", self.__path, e)
+                cached = None
+
+            if cached is not None:
+                self.__exchange.set_markets(cached['markets'])
+                self.__SetSymbols(cached['markets'].values(), cached['loadedAt'])
+                _logger.info("Loaded %d markets of %s from %s", len(cached['markets']), self.__exchange.name, self.__path)
+            else:
+                await self.__Refresh()
+
+    async def __Refresh(self):
+        markets = await self.__exchange.load_markets(reload=True)
+        self.__SetSymbols(markets.values(), time.time())
+        try:
+            await asyncio.to_thread(self.__WriteCache, markets)
+        except Exception as e:
+            _logger.warning("Error writing the market cache %s: %s", self.__path, e)
+
+    async def __RefreshInBackground(self):
+        try:
+            await self.__Refresh()
+            _logger.info("Refreshed the markets of %s", self.__exchange.name)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Keep using the cached markets, the next lookup tries again
+            _logger.exception("Error refreshing the markets of %s", self.__exchange.name)
+        finally:
+            self.__refreshTask = None
+
+    def __SetSymbols(self, markets, loadedAt: float):
+        symbols = {}
+        aliases = {}
+        for market in markets:
+            if market.get('active') is False or market.get('type') != 'spot':
+                continue
+            symbol = market['symbol']
+            symbols[symbol] = symbol
+            aliases.setdefault(NormalizeSymbol(symbol), symbol)
+            if market.get('id'):
+                aliases.setdefault(NormalizeSymbol(market['id']), symbol)
+        # Exact symbols take precedence over an alias of another symbol
+        aliases.update(symbols)
+        self.__symbols = aliases
+        self.__loadedAt = loadedAt
+
+    def __ReadCache(self) -> Optional[dict]:
+        if not os.path.exists(self.__path):
+            return None
+        with open(self.__path, encoding="utf-8") as file:
+            cached = json.load(file)
+        if not cached.get('markets'):
+            return None
+        return cached
+
+    def __WriteCache(self, markets: dict):
+        os.makedirs(os.path.dirname(self.__path) or ".", exist_ok=True)
+        # Write to a temporary file first, so a crash never leaves a truncated cache
+        temporaryPath = f"{self.__path}.tmp"
+        with open(temporaryPath, "w", encoding="utf-8") as file:
+            json.dump({'loadedAt': self.__loadedAt, 'markets': dict(markets)}, file, default=str)
+        os.replace(temporaryPath, self.__path)
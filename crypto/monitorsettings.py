@@ -0,0 +1,98 @@
+from dotenv import load_dotenv
+import os
+from envsettings import GetBool
+
+load_dotenv()
+
+
+class MonitorSettings:
+    __multiplexStreams = GetBool('CRYPTO_MULTIPLEX_STREAMS', True)
+    __streamingEvaluation = GetBool('CRYPTO_STREAMING_EVALUATION', True)
+    __startupConcurrency = int(os.getenv('CRYPTO_STARTUP_CONCURRENCY', '10'))
+    __backfillMaxHours = float(os.getenv('CRYPTO_BACKFILL_MAX_HOURS', '24'))
+    __backfillPageSize = int(os.getenv('CRYPTO_BACKFILL_PAGE_SIZE', '1000'))
+    __closedCallCacheSize = int(os.getenv('CRYPTO_CLOSED_CALL_CACHE_SIZE', '1000'))
+    __marketCacheDir = os.getenv('CRYPTO_MARKET_CACHE_DIR', '.cache/markets')
+    __marketCacheTtl = float(os.getenv('CRYPTO_MARKET_CACHE_TTL', '3600'))
+    __priceStaleSeconds = float(os.getenv('CRYPTO_PRICE_STALE_SECONDS', '120'))
+    __reconnectBaseSeconds = float(os.getenv('CRYPTO_RECONNECT_BASE_SECONDS', '1'))
+    __reconnectMaxSeconds = float(os.getenv('CRYPTO_RECONNECT_MAX_SECONDS', '60'))
+    __staleCandles = float(os.getenv('CRYPTO_STALE_CANDLES', '3'))
+    __rebuildFailureRatio = float(os.getenv('CRYPTO_REBUILD_FAILURE_RATIO', '0.5'))
+    __workerProcesses = GetBool('CRYPTO_WORKER_PROCESSES', False)
+    __workerRestartMaxSeconds = float(os.getenv('CRYPTO_WORKER_RESTART_MAX_SECONDS', '60'))
+
+    @classmethod
+    def IsMultiplexEnabled(cls) -> bool:
+        """Use a single multi-symbol OHLCV subscription per exchange when the exchange supports it."""
+        return cls.__multiplexStreams
+
+    @classmethod
+    def IsStreamingEvaluationEnabled(cls) -> bool:
+        """Evaluate every update of the running candle instead of only the first snapshot of each candle."""
+        return cls.__streamingEvaluation
+
+    @classmethod
+    def GetStartupConcurrency(cls) -> int:
+        """Maximum number of pairs registered concurrently per exchange when loading the open calls."""
+        return max(1, cls.__startupConcurrency)
+
+    @classmethod
+    def GetBackfillMaxHours(cls) -> float:
+        """Maximum number of hours of missed candles replayed after a restart or reconnect."""
+        return cls.__backfillMaxHours
+
+    @classmethod
+    def GetBackfillPageSize(cls) -> int:
+        """Number of candles fetched per request when replaying missed candles."""
+        return max(1, cls.__backfillPageSize)
+
+    @classmethod
+    def GetClosedCallCacheSize(cls) -> int:
+        """Number of recently closed calls kept in memory for lookups by ID."""
+        return max(0, cls.__closedCallCacheSize)
+
+    @classmethod
+    def GetMarketCacheDir(cls) -> str:
+        """Directory in which the market metadata of every exchange is cached."""
+        return cls.__marketCacheDir
+
+    @classmethod
+    def GetMarketCacheTtl(cls) -> float:
+        """Seconds after which the cached market metadata is refreshed in the background."""
+        return cls.__marketCacheTtl
+
+    @classmethod
+    def GetPriceStaleSeconds(cls) -> float:
+        """Seconds after which the last price of a pair is flagged as stale."""
+        return cls.__priceStaleSeconds
+
+    @classmethod
+    def GetReconnectBaseSeconds(cls) -> float:
+        """Delay before the first reconnect of a failed stream, doubled per consecutive failure."""
+        return max(0.1, cls.__reconnectBaseSeconds)
+
+    @classmethod
+    def GetReconnectMaxSeconds(cls) -> float:
+        """Maximum delay before reconnecting a failed stream."""
+        return max(cls.GetReconnectBaseSeconds(), cls.__reconnectMaxSeconds)
+
+    @classmethod
+    def GetStaleCandles(cls) -> float:
+        """Number of candle intervals without any update after which a stream is considered stalled."""
+        return max(1.0, cls.__staleCandles)
+
+    @classmethod
+    def GetRebuildFailureRatio(cls) -> float:
+        """Part of the pairs of an exchange failing together at which its connection is rebuilt."""
+        return cls.__rebuildFailureRatio
+
+    @classmethod
+    def IsWorkerProcessesEnabled(cls) -> bool:
+        """Monitor every exchange in its own worker process instead of on the event loop of the bot."""
+        return cls.__workerProcesses
+
+    @classmethod
+    def GetWorkerRestartMaxSeconds(cls) -> float:
+        """Maximum delay before a worker process that exited is restarted, the delay doubles per restart."""
+        return max(1.0, cls.__workerRestartMaxSeconds)
@@ -0,0 +1,76 @@
+import bisect
+from typing import List
+
+from .fixedpoint import FixedPoint
+
+_INFINITY = float('inf')
+
+
+class PriceLadder:
+    """
+    Sorted index of the pending price thresholds of all calls on a pair.
+
+    Low thresholds (entry and stop loss) are crossed when the low drops to or below
+    them, high thresholds (targets) when the high rises to or above them. Both are
+    kept as sorted lists of (price, callId), so the calls crossed by a candle are found
+    with a binary search. Prices are integers of the fixed point scale of the pair.
+    """
+    def __init__(self, fixedPoint: FixedPoint):
+        self.__fixedPoint = fixedPoint
+        self.__lows = []
+        self.__highs = []
+        self.__calls = {}
+
+    def __len__(self) -> int:
+        return len(self.__calls)
+
+    def __contains__(self, call) -> bool:
+        return call.id in self.__calls
+
+    def Add(self, call):
+        """
+        Index the current thresholds of a call, replacing the ones indexed before.
+        """
+        self.Remove(call)
+        lows, highs = call.GetThresholds()
+        lows = [self.__fixedPoint.FloorDecimal(price) for price in lows]
+        highs = [self.__fixedPoint.CeilDecimal(price) for price in highs]
+        for price in lows:
+            bisect.insort(self.__lows, (price, call.id))
+        for price in highs:
+            bisect.insort(self.__highs, (price, call.id))
+        self.__calls[call.id] = (call, lows, highs)
+
+    def Remove(self, call):
+        """
+        Remove all thresholds of a call from the index.
+        """
+        entry = self.__calls.pop(call.id, None)
+        if entry is None:
+            return
+        _, lows, highs = entry
+        for price in lows:
+            self.__Delete(self.__lows, (price, call.id))
+        for price in highs:
+            self.__Delete(self.__highs, (price, call.id))
+
+    @staticmethod
+    def __Delete(items: List, key):
+        idx = bisect.bisect_left(items, key)
+        if idx < len(items) and items[idx] == key:
+            del items[idx]
+
+    def GetCrossed(self, low: int, high: int) -> List:
+        """
+        Get the calls of which a threshold lies within reach of the low or the high,
+        ordered by call ID. The low is rounded down and the high up to the fixed point scale.
+        """
+        # (low,) sorts before every (low, callId), so this is the first threshold >= low
+        lowIdx = bisect.bisect_left(self.__lows, (low,))
+        highIdx = bisect.bisect_right(self.__highs, (high, _INFINITY))
+        if lowIdx == len(self.__lows) and highIdx == 0:
+            # Most ticks cross nothing
+            return []
+        callIds = {callId for _, callId in self.__lows[lowIdx:]}
+        callIds.update(callId for _, callId in self.__highs[:highIdx])
+        return [self.__calls[callId][0] for callId in sorted(callIds)]
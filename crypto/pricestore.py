@@ -0,0 +1,55 @@
+import time
+from decimal import Decimal
+from typing import List, Optional, Tuple
+
+from .fixedpoint import FixedPoint
+from .monitorsettings import MonitorSettings
+
+
+class PriceStore:
+    """
+    Last price of every pair per exchange, shared by all calls.
+
+    The streams write the close of every update once per pair instead of to every call
+    on the pair. Calls read their current price from here, and a pair that is watched
+    again is seeded from here instead of waiting for the exchange. The age of a price
+    tells whether it can still be trusted. Prices are stored as fixed point integers
+    and only converted to a Decimal when they are read.
+    """
+    __prices = {}  # (exchange, pair) -> (price, fixed point scale, time.time() of the update)
+
+    @classmethod
+    def Set(cls, exchange: str, pair: str, price: int, fixedPoint: FixedPoint, updatedAt: float = None):
+        cls.__prices[(exchange, pair)] = (price, fixedPoint, time.time() if updatedAt is None else updatedAt)
+
+    @classmethod
+    def GetUpdates(cls, exchange: str, since: float) -> List[Tuple[str, int, FixedPoint, float]]:
+        """Get the prices of an exchange updated after since, as (pair, price, fixed point scale, time) entries."""
+        return [(pair, price, fixedPoint, updatedAt)
+                for (entryExchange, pair), (price, fixedPoint, updatedAt) in list(cls.__prices.items())
+                if entryExchange == exchange and updatedAt > since]
+
+    @classmethod
+    def Get(cls, exchange: str, pair: str) -> Tuple[Optional[Decimal], Optional[float]]:
+        """Get the last price and its age in seconds, (None, None) when no price was received."""
+        entry = cls.__prices.get((exchange, pair))
+        if entry is None:
+            return None, None
+        price, fixedPoint, updatedAt = entry
+        return fixedPoint.ToDecimal(price), time.time() - updatedAt
+
+    @classmethod
+    def GetFresh(cls, exchange: str, pair: str) -> Optional[Decimal]:
+        """Get the last price when it isn't stale, None otherwise."""
+        price, age = cls.Get(exchange, pair)
+        if price is None or cls.IsStale(age):
+            return None
+        return price
+
+    @staticmethod
+    def IsStale(age: Optional[float]) -> bool:
+        return age is None or age > MonitorSettings.GetPriceStaleSeconds()
+
+    @classmethod
+    def Clear(cls):
+        cls.__prices.clear()
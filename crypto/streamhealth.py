@@ -0,0 +1,80 @@
+import random
+import time
+from enum import Enum
+from typing import Optional
+
+from .monitorsettings import MonitorSettings
+
+
+class StreamHealth:
+    """
+    Health of the OHLCV stream of a pair, or of the shared stream of an exchange.
+
+    A stream is healthy while updates arrive, stale when nothing arrived for the stale
+    time while it should have, and reconnecting while it waits to subscribe again after
+    a failure. The wait grows exponentially with the consecutive failures and is
+    jittered, so the pairs of an exchange that fail together don't reconnect in lockstep.
+    """
+    class State(Enum):
+        CONNECTING = "connecting"
+        HEALTHY = "healthy"
+        STALE = "stale"
+        RECONNECTING = "reconnecting"
+
+    __slots__ = ("state", "since", "lastMessageAt", "failures", "reconnects", "lastError", "retryAt")
+
+    def __init__(self):
+        self.state = StreamHealth.State.CONNECTING
+        self.since = time.time()  # Time of the last update or (re)connect
+        self.lastMessageAt = None
+        self.failures = 0  # Consecutive failures, reset by an update
+        self.reconnects = 0
+        self.lastError = None
+        self.retryAt = None
+
+    def OnMessage(self):
+        self.state = StreamHealth.State.HEALTHY
+        self.since = self.lastMessageAt = time.time()
+        self.failures = 0
+        self.retryAt = None
+
+    def OnFailure(self, error: str, delay: Optional[float] = None) -> float:
+        """
+        Count a failed or stalled stream, returns the seconds to wait before subscribing
+        again. A stream that shares the connection of another one is given its delay.
+        """
+        self.failures += 1
+        self.reconnects += 1
+        self.lastError = error
+        self.state = StreamHealth.State.RECONNECTING
+        if delay is None:
+            delay = self.GetBackoff(self.failures)
+        self.retryAt = time.time() + delay
+        return delay
+
+    def OnRetry(self):
+        self.state = StreamHealth.State.CONNECTING
+        self.since = time.time()
+        self.retryAt = None
+
+    def GetState(self, staleSeconds: float) -> "StreamHealth.State":
+        if self.state != StreamHealth.State.RECONNECTING and time.time() - self.since > staleSeconds:
+            return StreamHealth.State.STALE
+        return self.state
+
+    def Describe(self, staleSeconds: float) -> dict:
+        """The health as plain values, e.g. to send it to another process."""
+        now = time.time()
+        return {"state": self.GetState(staleSeconds).value,
+                "age": None if self.lastMessageAt is None else now - self.lastMessageAt,
+                "failures": self.failures,
+                "reconnects": self.reconnects,
+                "retryIn": None if self.retryAt is None else max(0.0, self.retryAt - now),
+                "error": self.lastError}
+
+    @staticmethod
+    def GetBackoff(failures: int) -> float:
+        """Exponential backoff with equal jitter, between half and all of the delay."""
+        delay = min(MonitorSettings.GetReconnectMaxSeconds(),
+                    MonitorSettings.GetReconnectBaseSeconds() * 2 ** min(failures - 1, 30))
+        return delay / 2 + random.uniform(0, delay / 2)
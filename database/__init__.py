@@ -1,11 +1,16 @@
 from .database import Database
 from .cryptocall import CryptoCall
 from .takeprofit import TakeProfit
+from .pairstate import PairState
+from .livemessage import LiveMessage
+from .writebehind import WriteBehind
 
-__all__ = ["Database", "CreateTables", "CryptoCall", "TakeProfit"]
+__all__ = ["Database", "CreateTables", "CryptoCall", "TakeProfit", "PairState", "LiveMessage", "WriteBehind"]
 
 
 async def CreateTables():
     """Create all tables in the database."""
     await CryptoCall.CreateTable()
     await TakeProfit.CreateTable()
+    await PairState.CreateTable()
+    await LiveMessage.CreateTable()
@@ -1,42 +1,222 @@
 import aiomysql
+import re
 from .database import Database
-from enum import Enum
-from decimal import Decimal
+from telemetry import Logger
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from typing import List
 
+_logger = Logger.Get("database")
 
-class BaseModel:
+
+def _EnumDecoder(enum):
+    """Convert a database value, an enum name or value, to the enum."""
+    # The stored lower case names are looked up without creating an upper case copy
+    members = {member.name.lower(): member for member in enum}
+    def Decode(value):
+        member = members.get(value) if isinstance(value, str) else None
+        if member is not None or value is None or isinstance(value, enum):
+            return member or value
+        if isinstance(value, str):
+            return enum[value.upper()]
+        return enum(value)
+    return Decode
+
+
+def _EnumEncoder(decode):
+    """Convert an enum, or anything the decoder accepts, to the lower case name stored in the database."""
+    def Encode(value):
+        value = decode(value)
+        return None if value is None else value.name.lower()
+    return Encode
+
+
+def _DecodeDecimal(value):
+    if value is None:
+        return value
+    if not isinstance(value, Decimal):
+        if isinstance(value, str):
+            value = Decimal(value)
+        else:
+            value = Decimal.from_float(value)
+    return value.quantize(Decimal('0.0000000001'))  # Set precision for Decimal
+
+
+_DEFAULT_PATTERN = re.compile(r"\bDEFAULT\s+('(?:[^']|'')*'|[^\s,]+)", re.IGNORECASE)
+_DECIMAL_PATTERN = re.compile(r"^DECIMAL\s*\(\s*\d+\s*,\s*(\d+)\s*\)", re.IGNORECASE)
+_INTEGER_PATTERN = re.compile(r"^(TINY|SMALL|MEDIUM|BIG)?INT\b", re.IGNORECASE)
+
+
+def _GetStoredCodec(definition: str, decode):
+    """Get a conversion of an inserted value to the value the database stores for the column."""
+    match = _DECIMAL_PATTERN.match(definition)
+    if match is not None:
+        exponent = Decimal(1).scaleb(-int(match.group(1)))
+        # MySQL rounds half away from zero
+        return lambda value: None if value is None else Decimal(str(value)).quantize(exponent, ROUND_HALF_UP)
+    if _INTEGER_PATTERN.match(definition):
+        return lambda value: None if value is None else int(value)
+    return decode
+
+
+def _GetStoredDefault(definition: str, store):
+    """Get a factory of the value the database stores for a column that isn't inserted."""
+    match = _DEFAULT_PATTERN.search(definition)
+    if match is None:
+        return lambda: None
+    default = match.group(1)
+    if default.upper() in ("CURRENT_TIMESTAMP", "CURRENT_TIMESTAMP()", "NOW()"):
+        # DATETIME columns store whole seconds
+        return lambda: datetime.now().replace(microsecond=0)
+    if default.upper() == "NULL":
+        return lambda: None
+    if default.startswith("'"):
+        default = default[1:-1].replace("''", "'")
+    value = default if store is None else store(default)
+    return lambda: value
+
+
+class _ModelMeta(type):
+    """
+    Compiles a model from its _fieldDefinitions when the class is created: the __slots__,
+    so instances have no __dict__, a bit per field in the mask of changed fields, the
+    codecs per column and the fixed SQL statements. Statements of which the columns
+    depend on the call are compiled once per set of columns.
+    """
+    def __new__(mcs, name, bases, namespace):
+        if "__slots__" not in namespace:
+            inherited = {slot for base in bases for klass in base.__mro__ for slot in getattr(klass, "__slots__", ())}
+            namespace["__slots__"] = tuple(field for field in namespace.get("_fieldDefinitions", {}) if field not in inherited)
+        cls = super().__new__(mcs, name, bases, namespace)
+
+        fields = tuple(cls._fieldDefinitions)
+        cls._fieldNames = fields
+        cls._fieldBits = {field: 1 << idx for idx, field in enumerate(fields)}
+
+        decoders = {}
+        encoders = {}
+        for field, definition in cls._fieldDefinitions.items():
+            if definition.startswith("ENUM"):
+                enumName = field.replace("_", " ").title().replace(" ", "")
+                decoders[field] = _EnumDecoder(getattr(cls, enumName))
+                encoders[field] = _EnumEncoder(decoders[field])
+            elif definition == "DECIMAL":
+                decoders[field] = encoders[field] = _DecodeDecimal
+        # Per column slot setter and decoder, None when the driver value is used as is
+        cls._setters = tuple(getattr(cls, field).__set__ for field in fields)
+        cls._decoders = tuple(decoders.get(field) for field in fields)
+        cls._decoderByField = decoders
+        cls._encoders = encoders
+        # Conversions and defaults to build an inserted instance without reading it back
+        cls._storedCodecs = {}
+        cls._storedDefaults = {}
+        for field, definition in cls._fieldDefinitions.items():
+            store = _GetStoredCodec(definition, decoders.get(field))
+            if store is not None:
+                cls._storedCodecs[field] = store
+            cls._storedDefaults[field] = _GetStoredDefault(definition, store)
+
+        columns = ", ".join(fields)
+        cls._selectQuery = f"SELECT {columns} FROM {cls._tableName}"
+        cls._selectByIdQuery = f"{cls._selectQuery} WHERE id = %s"
+        cls._deleteQuery = f"DELETE FROM {cls._tableName} WHERE id = %s"
+        cls._statements = {}
+        return cls
+
+
+class BaseModel(metaclass=_ModelMeta):
     """Base class for database models that handles table creation, inserts, updates, and deletions."""
+    # Bit mask of the fields changed since they were loaded or saved
+    __slots__ = ("__dirty",)
     # Override in child class for table name
     _tableName = None
     # Override in child class for table creation
     _fieldDefinitions = {}
     # Override in child class for additional table creation SQL
     _additionalFieldDefinitions = ""
+    # Override in child class for indexes, index name -> indexed columns
+    _indexDefinitions = {}
+    # Override in child class for constraints, constraint name -> definition
+    _constraintDefinitions = {}
     # Override in child class for initial
     _initialItems = []
 
+    # Maximum number of values in a single IN (...) clause
+    _IN_CHUNK_SIZE = 1000
+
     _BIGINT_NOT_NULL = "BIGINT NOT NULL"
     _BIGINT_NULL = "BIGINT NULL"
 
     def __init__(self, *args, **kwargs):
-        self.__originalData = {}  # Store original values for tracking changes
-        for idx, field in enumerate(self._fieldDefinitions):
-            if idx < len(args):
-                value = args[idx]
-            else:
-                value = kwargs.get(field)
+        fields = self._fieldNames
+        if kwargs:
+            args = [args[idx] if idx < len(args) else kwargs.get(field) for idx, field in enumerate(fields)]
+        elif len(args) < len(fields):
+            args = args + (None,) * (len(fields) - len(args))
+
+        self.__Load(args)
+
+    def __Load(self, row):
+        """Store the decoded values of a row, loaded values are not changes."""
+        # The slots are set directly, bypassing the change tracking of __setattr__
+        _SetDirty(self, 0)
+        for setValue, decode, value in zip(self._setters, self._decoders, row):
+            setValue(self, value if decode is None else decode(value))
+
+    @classmethod
+    def _FromRow(cls, row):
+        """Create an instance from a complete row as returned by the database driver."""
+        instance = cls.__new__(cls)
+        instance.__Load(row)
+        return instance
+
+    def __setattr__(self, name, value):
+        bit = self._fieldBits.get(name)
+        if bit is not None and not self.__dirty & bit and getattr(self, name) != value:
+            self.__dirty |= bit
+        object.__setattr__(self, name, value)
 
-            value = self.__ValueToPython(value, field)
-            setattr(self, field, value)
-            self.__originalData[field] = value  # Store original values
+    def __getstate__(self):
+        return tuple(getattr(self, field) for field in self._fieldNames), self.__dirty
+
+    def __setstate__(self, state):
+        values, self.__dirty = state
+        for field, value in zip(self._fieldNames, values):
+            object.__setattr__(self, field, value)
+
+    @property
+    def isDirty(self) -> bool:
+        return self.__dirty != 0
 
     def __repr__(self):
         result = f"<{self.__class__.__name__} "
         result += " ".join(
-            [f"{key}={getattr(self, key)}" for key in self._fieldDefinitions.keys()])
+            [f"{key}={getattr(self, key)}" for key in self._fieldNames])
         result += ">"
         return result
 
+    @classmethod
+    def _GetStatement(cls, key, build) -> str:
+        """Get a statement compiled for a set of columns, building it the first time."""
+        statement = cls._statements.get(key)
+        if statement is None:
+            statement = cls._statements[key] = build()
+        return statement
+
+    @classmethod
+    def _Encode(cls, field, value):
+        """Convert a Python value to the value stored in the database."""
+        encode = cls._encoders.get(field)
+        return value if encode is None else encode(value)
+
+    @classmethod
+    def _GetFields(cls, kwargs) -> tuple:
+        """Get the fields of the keyword arguments, in the order of the field definitions."""
+        for key in kwargs:
+            if key not in cls._fieldBits:
+                raise ValueError(f"Unknown field {key} of {cls.__name__}.")
+        return tuple(field for field in cls._fieldNames if field in kwargs)
+
     @classmethod
     async def CreateTable(cls):
         """Creates the table if it does not exist."""
@@ -46,11 +226,12 @@ class BaseModel:
             await cursor.execute(f"SHOW TABLES LIKE '{cls._tableName}'")
             result = await cursor.fetchone()
             if not result:
-                columns = ", ".join(
-                    [f"{name} {definition}" for name, definition in cls._fieldDefinitions.items()])
-                query = f"CREATE TABLE IF NOT EXISTS {cls._tableName} ({columns}{cls._additionalFieldDefinitions});"
+                definitions = [f"{name} {definition}" for name, definition in cls._fieldDefinitions.items()]
+                definitions += [f"INDEX {name} ({columns})" for name, columns in cls._indexDefinitions.items()]
+                definitions += [f"CONSTRAINT {name} {definition}" for name, definition in cls._constraintDefinitions.items()]
+                query = f"CREATE TABLE IF NOT EXISTS {cls._tableName} ({', '.join(definitions)}{cls._additionalFieldDefinitions});"
                 await cursor.execute(query)
-                print(f"Table '{cls._tableName}' created successfully.")
+                _logger.info("Table '%s' created successfully.", cls._tableName)
                 createTable = True
             else:
                 # Table exists, check for missing columns
@@ -61,12 +242,40 @@ class BaseModel:
                         # Add missing column
                         alterQuery = f"ALTER TABLE {cls._tableName} ADD COLUMN {columnName} {columnDefinition};"
                         await cursor.execute(alterQuery)
-                        print(f"Added column '{columnName}' to table '{cls._tableName}'.")
+                        _logger.info("Added column '%s' to table '%s'.", columnName, cls._tableName)
+                await cls.__MigrateIndexes(cursor)
 
         if createTable:
             # Insert initial data if the table was just created
             await cls._InsertInitialData()
 
+    @classmethod
+    async def __MigrateIndexes(cls, cursor):
+        """Add the declared indexes and constraints that are missing on an existing table."""
+        await cursor.execute(f"SHOW INDEX FROM {cls._tableName}")
+        # Key_name is the third column
+        existingIndexes = {row[2] for row in await cursor.fetchall()}
+        for name, columns in cls._indexDefinitions.items():
+            if name not in existingIndexes:
+                # Indexing a large table takes a while, the table stays usable meanwhile
+                _logger.info("Adding index '%s' to table '%s'...", name, cls._tableName)
+                await cursor.execute(f"ALTER TABLE {cls._tableName} ADD INDEX {name} ({columns});")
+                _logger.info("Added index '%s' to table '%s'.", name, cls._tableName)
+
+        if not cls._constraintDefinitions:
+            return
+        await cursor.execute("SELECT CONSTRAINT_NAME FROM information_schema.TABLE_CONSTRAINTS "
+                             "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s", (cls._tableName,))
+        existingConstraints = {row[0] for row in await cursor.fetchall()}
+        for name, definition in cls._constraintDefinitions.items():
+            if name not in existingConstraints:
+                try:
+                    await cursor.execute(f"ALTER TABLE {cls._tableName} ADD CONSTRAINT {name} {definition};")
+                    _logger.info("Added constraint '%s' to table '%s'.", name, cls._tableName)
+                except Exception as e:
+                    # E.g. a foreign key on a history with orphaned rows, the table works without it
+                    _logger.warning("Could not add constraint '%s' to table '%s': %s", name, cls._tableName, e)
+
     @classmethod
     async def _InsertInitialData(cls):
         """Insert initial data into the table."""
@@ -78,158 +287,205 @@ class BaseModel:
         """Drops the table if it exists."""
         async with Database.GetCursor() as cursor:
             await cursor.execute(f"DROP TABLE IF EXISTS {cls._tableName}")
-            print(f"Table '{cls._tableName}' dropped successfully.")
+            _logger.info("Table '%s' dropped successfully.", cls._tableName)
 
     @classmethod
     async def GetById(cls, recordId):
         """Fetch a record by ID and return an instance of the class."""
         async with Database.GetCursor() as cursor:
-            query = f"SELECT {', '.join(cls._fieldDefinitions.keys())} FROM {cls._tableName} WHERE id = %s"
-            await cursor.execute(query, (recordId,))
+            await cursor.execute(cls._selectByIdQuery, (recordId,))
             result = await cursor.fetchone()
-            return cls(*result) if result else None
+            return cls._FromRow(result) if result else None
 
     @classmethod
-    def __GetConvertedValues(cls, kwargs):
-        """Convert ENUM fields to Python values."""
-        values = []
-        for field in cls._fieldDefinitions:
-            if field in kwargs:
-                if cls._fieldDefinitions[field].startswith("ENUM"):
-                    values.append(cls.__PythonToValue(
-                        cls.__ValueToPython(kwargs.get(field), field), field))
-                else:
-                    values.append(kwargs.get(field))
-        return values
+    def __GetConvertedValues(cls, fields, kwargs):
+        """Convert the values of the keyword arguments to database values."""
+        return [cls._Encode(field, kwargs[field]) for field in fields]
+
+    @classmethod
+    def __GetWhereQuery(cls, operator: str, fields: tuple) -> str:
+        def Build():
+            where = ' AND '.join([f'{field} {operator} %s' for field in fields])
+            return f"{cls._selectQuery} WHERE {where};" if where else f"{cls._selectQuery};"
+        return cls._GetStatement(("where", operator, fields), Build)
 
     @classmethod
     async def GetBySelect(cls, **kwargs):
         """Fetch a record by a SELECT query and return an instance of the class."""
-        where = ' AND '.join([f'{key} = %s' for key in kwargs.keys()])
-        if where:
-            query = f"SELECT {', '.join(cls._fieldDefinitions.keys())} FROM {cls._tableName} WHERE {where};"
-        else:
-            query = f"SELECT {', '.join(cls._fieldDefinitions.keys())} FROM {cls._tableName};"
-
-        values = cls.__GetConvertedValues(kwargs)
+        fields = cls._GetFields(kwargs)
+        query = cls.__GetWhereQuery("=", fields)
+        values = cls.__GetConvertedValues(fields, kwargs)
         async with Database.GetCursor() as cursor:
             await cursor.execute(query, values)
-            result = [cls(*result) for result in await cursor.fetchall()]
+            result = [cls._FromRow(result) for result in await cursor.fetchall()]
             return result
 
     @classmethod
     async def GetByExclude(cls, **kwargs):
         """Fetch a record by a SELECT query and return an instance of the class."""
-        where = ' AND '.join([f'{key} != %s' for key in kwargs.keys()])
-        if where:
-            query = f"SELECT {', '.join(cls._fieldDefinitions.keys())} FROM {cls._tableName} WHERE {where};"
-        else:
-            query = f"SELECT {', '.join(cls._fieldDefinitions.keys())} FROM {cls._tableName};"
-        values = cls.__GetConvertedValues(kwargs)
+        fields = cls._GetFields(kwargs)
+        query = cls.__GetWhereQuery("!=", fields)
+        values = cls.__GetConvertedValues(fields, kwargs)
         async with Database.GetCursor() as cursor:
             await cursor.execute(query, values)
-            result = [cls(*result) for result in await cursor.fetchall()]
+            result = [cls._FromRow(result) for result in await cursor.fetchall()]
             return result
 
     @classmethod
-    def __ValueToPython(cls, value, field):
-        """Convert ENUM fields to Python values."""
-        if cls._fieldDefinitions[field].startswith("ENUM"):
-            # Convert ENUM fields to string
-            enumName = field.replace("_", " ").title().replace(" ", "")
-            enum = getattr(cls, enumName)
-            if not isinstance(value, enum):
-                if isinstance(value, str):
-                    value = enum[value.upper()]
-                else:
-                    value = enum(value)
-        elif cls._fieldDefinitions[field] == "DECIMAL":
-            # Convert DECIMAL fields to Decimal
-            if not isinstance(value, Decimal):
-                if isinstance(value, str):
-                    value = Decimal(value)
-                else:
-                    value = Decimal.from_float(value)
-            value = value.quantize(Decimal('0.0000000001'))  # Set precision for Decimal
-        return value
+    async def GetByIn(cls, field, values):
+        """Fetch all records of which the field matches one of the values, in chunks of _IN_CHUNK_SIZE values per query."""
+        cls._GetFields({field: None})
+        values = [cls._Encode(field, value) for value in values]
+        result = []
+        async with Database.GetCursor() as cursor:
+            for start in range(0, len(values), cls._IN_CHUNK_SIZE):
+                chunk = values[start:start + cls._IN_CHUNK_SIZE]
+                query = cls._GetStatement(("in", field, len(chunk)), lambda: \
+                    f"{cls._selectQuery} WHERE {field} IN ({', '.join(['%s'] * len(chunk))});")
+                await cursor.execute(query, chunk)
+                result.extend(cls._FromRow(row) for row in await cursor.fetchall())
+        return result
 
     @classmethod
-    def __PythonToValue(cls, value, field):
-        """Convert value fields to Enum."""
-        if cls._fieldDefinitions[field].startswith("ENUM"):
-            # Convert ENUM fields to string
-            if not isinstance(value, Enum):
-                if isinstance(value, str):
-                    enumName = field.replace("_", " ").title().replace(" ", "")
-                    value = getattr(cls, enumName)[value].name.lower()
-                else:
-                    enumName = field.replace("_", " ").title().replace(" ", "")
-                    value = cls.getattr(cls, enumName)(value).name.lower()
-            value = value.name.lower()
-        elif cls._fieldDefinitions[field] == "DECIMAL":
-            if isinstance(value, str):
-                value = Decimal(value)
-            elif isinstance(value, float):
-                value = Decimal.from_float(value)
-            value = value.quantize(Decimal('0.0000000001'))  # Set precision for Decimal
-        return value
+    async def GetGroupedBy(cls, field, values):
+        """
+        Fetch the records related to a list of keys in bulk, e.g. the child rows of a list
+        of parent IDs. Returns a dictionary with a (possibly empty) list of records per key.
+        """
+        values = list(values)
+        grouped = {value: [] for value in values}
+        for record in await cls.GetByIn(field, values):
+            grouped.setdefault(getattr(record, field), []).append(record)
+        return grouped
+
+    def _GetChanges(self) -> dict:
+        """Get the changed fields, converted to database values."""
+        changedFields = {}
+        dirty = self.__dirty
+        if not dirty:
+            return changedFields
+        encoders = self._encoders
+        fields = self._fieldNames
+        while dirty:
+            # Visit only the set bits, lowest first
+            bit = dirty & -dirty
+            dirty ^= bit
+            field = fields[bit.bit_length() - 1]
+            value = getattr(self, field)
+            encode = encoders.get(field)
+            changedFields[field] = value if encode is None else encode(value)
+        return changedFields
+
+    async def _SaveChanges(self, cursor, changedFields: dict):
+        """Write the given changed fields with the given cursor."""
+        fields = tuple(changedFields)
+        query = self._GetStatement(("update", fields), lambda: \
+            f"UPDATE {self._tableName} SET {', '.join(f'{field} = %s' for field in fields)} WHERE id = %s")
+        values = list(changedFields.values()) + \
+            [self.id]  # ID is the last parameter
+        await cursor.execute(query, values)
+
+    def _MarkSaved(self, changedFields: dict):
+        """Clear the changed bits of the saved fields, unless they changed again while saving."""
+        decoders = self._decoderByField
+        for field, value in changedFields.items():
+            decode = decoders.get(field)
+            if getattr(self, field) == (value if decode is None else decode(value)):
+                self.__dirty &= ~self._fieldBits[field]
 
     async def Save(self):
         """Update only changed fields in the database."""
-        changedFields = {}
-        for field in self._fieldDefinitions:
-            if getattr(self, field) != self.__originalData[field]:
-                value = getattr(self, field)
-                value = self.__PythonToValue(self.__ValueToPython(value, field), field)
-                changedFields[field] = value
+        changedFields = self._GetChanges()
 
         if not changedFields:
-            print("No changes detected, skipping update.")
+            _logger.debug("No changes detected, skipping the update of %s %s.", self._tableName, self.id)
             return  # No changes, skip update
 
-        setClause = ", ".join(f"{key} = %s" for key in changedFields.keys())
-        values = list(changedFields.values()) + \
-            [self.id]  # ID is the last parameter
-
-        query = f"UPDATE {self._tableName} SET {setClause} WHERE id = %s"
         async with Database.GetCursor() as cursor:
+            await self._SaveChanges(cursor, changedFields)
+        self._MarkSaved(changedFields)
+
+    @classmethod
+    def __FromInsert(cls, recordId, kwargs):
+        """
+        Build an inserted instance from the inserted values and the column defaults, as the
+        database stores them, instead of reading it back.
+        """
+        row = []
+        for field in cls._fieldNames:
+            if field in kwargs:
+                store = cls._storedCodecs.get(field)
+                value = kwargs[field] if store is None else store(kwargs[field])
+            elif field == "id":
+                value = recordId
+            else:
+                value = cls._storedDefaults[field]()
+            row.append(value)
+        return cls._FromRow(row)
+
+    @classmethod
+    async def Insert(cls, cursor=None, **kwargs):
+        """
+        Insert a new record into the database and return the created instance. With a cursor,
+        e.g. of Database.GetTransaction, the record is inserted with that cursor.
+        """
+        # The auto-increment ID is only included when it is given
+        fields = cls._GetFields(kwargs)
+        query = cls._GetStatement(("insert", fields), lambda: \
+            f"INSERT INTO {cls._tableName} ({', '.join(fields)}) VALUES ({', '.join(['%s'] * len(fields))})")
+        values = cls.__GetConvertedValues(fields, kwargs)
+
+        if cursor is None:
+            async with Database.GetCursor() as cursor:
+                await cursor.execute(query, values)
+                newId = cursor.lastrowid  # Get the newly inserted ID
+        else:
             await cursor.execute(query, values)
+            newId = cursor.lastrowid
 
-        # Update the original values to the new ones
-        self.__originalData.update(changedFields)
+        return cls.__FromInsert(kwargs.get("id", newId), kwargs)
 
     @classmethod
-    async def Insert(cls, **kwargs):
-        """Insert a new record into the database and return the created instance."""
-        fields = []
-        for field in cls._fieldDefinitions:
-            #if field != "id" or "id" in kwargs:
-            if field in kwargs:
-                if cls._fieldDefinitions[field].startswith("ENUM"):
-                    fields.append(cls.__PythonToValue(cls.__ValueToPython(kwargs.get(field), field), field))
-                else:
-                    fields.append(field)
-        # Exclude auto-increment ID
-        placeholders = ", ".join(["%s"] * len(fields))
-        columns = ", ".join(fields)
-        values = [kwargs.get(field) for field in fields]
+    async def InsertMany(cls, rows: List[dict], cursor=None) -> List:
+        """
+        Insert records with the same fields with a single multi-row INSERT and return the
+        created instances. With a cursor, e.g. of Database.GetTransaction, the records are
+        inserted with that cursor.
+        """
+        if not rows:
+            return []
+        fields = cls._GetFields(rows[0])
+        for row in rows:
+            if cls._GetFields(row) != fields:
+                raise ValueError(f"All {cls.__name__} rows of a multi-row insert need the same fields.")
+        query = cls._GetStatement(("insert", fields, len(rows)), lambda: \
+            f"INSERT INTO {cls._tableName} ({', '.join(fields)}) VALUES " +
+            ", ".join([f"({', '.join(['%s'] * len(fields))})"] * len(rows)))
+        values = [value for row in rows for value in cls.__GetConvertedValues(fields, row)]
 
-        query = f"INSERT INTO {cls._tableName} ({columns}) VALUES ({placeholders})"
-        async with Database.GetCursor() as cursor:
+        if cursor is None:
+            async with Database.GetCursor() as cursor:
+                await cursor.execute(query, values)
+                firstId = cursor.lastrowid
+                increment = await Database.GetAutoIncrementIncrement(cursor)
+        else:
             await cursor.execute(query, values)
-            newId = cursor.lastrowid  # Get the newly inserted ID
+            firstId = cursor.lastrowid
+            increment = await Database.GetAutoIncrementIncrement(cursor)
 
-        # Fetch and return the created object
-        return await cls.GetById(newId)
+        # The ID of the first row is returned, the rows of a multi-row INSERT with a known
+        # number of rows are given consecutive IDs
+        return [cls.__FromInsert(row.get("id", firstId + idx * increment), row) for idx, row in enumerate(rows)]
 
     async def Delete(self):
         """Delete the current record from the database."""
         if not hasattr(self, "id") or self.id is None:
             raise ValueError("Cannot delete an object without an ID.")
 
-        query = f"DELETE FROM {self._tableName} WHERE id = %s"
-
         async with Database.GetCursor() as cursor:
-            await cursor.execute(query, (self.id,))
+            await cursor.execute(self._deleteQuery, (self.id,))
+
+        _logger.info("Deleted %s record with ID %s", self._tableName, self.id)
+
 
-        print(f"Deleted {self._tableName} record with ID {self.id}")
+_SetDirty = BaseModel._BaseModel__dirty.__set__
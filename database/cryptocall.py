@@ -29,6 +29,11 @@ class CryptoCall(BaseModel):
         "closedAt": "DATETIME DEFAULT NULL",
         "status": "ENUM('acquiring', 'active', 'closed') NOT NULL DEFAULT 'acquiring'"
     }
+    _indexDefinitions = {
+        # Loading the open calls on startup, per exchange and pair
+        "status_exchange_pair": "status, exchange, pair",
+        "closedAt": "closedAt",
+    }
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
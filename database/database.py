@@ -1,18 +1,63 @@
 #!/usr/bin/env python3
 import os
+import re
+import time
 import aiomysql
 import asyncio
 from contextlib import asynccontextmanager
+from functools import lru_cache
 
+from telemetry import Metrics
+
+_QUERY_SECONDS = Metrics.Histogram("cryptocallbot_db_query_seconds", "Duration of database statements.", ("statement",))
+_POOL_WAIT_SECONDS = Metrics.Histogram("cryptocallbot_db_pool_wait_seconds", "Time waiting for a connection of the pool.")
+_TABLE_PATTERN = re.compile(r"\b(?:FROM|INTO|UPDATE|TABLE)\s+(\w+)", re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def _GetStatementLabel(query: str) -> str:
+    """Label a statement by its kind and table, e.g. UPDATE crypto_call."""
+    kind = query.split(None, 1)[0].upper() if query.strip() else ""
+    match = _TABLE_PATTERN.search(query)
+    return f"{kind} {match.group(1)}" if match else kind
+
+
+class _TimedCursor:
+    """Cursor that measures the duration of its statements, only used when metrics are enabled."""
+    def __init__(self, cursor):
+        self.__cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self.__cursor, name)
+
+    async def execute(self, query, args=None):
+        startTime = time.perf_counter()
+        try:
+            return await self.__cursor.execute(query, args)
+        finally:
+            _QUERY_SECONDS.Labels(_GetStatementLabel(query)).Observe(time.perf_counter() - startTime)
+
+    async def executemany(self, query, args):
+        startTime = time.perf_counter()
+        try:
+            return await self.__cursor.executemany(query, args)
+        finally:
+            _QUERY_SECONDS.Labels(_GetStatementLabel(query)).Observe(time.perf_counter() - startTime)
 
 
 class Database:
     __pool = None  # Class-level connection pool
+    __autoIncrementIncrement = None
 
     @classmethod
-    async def Init(cls):
-        """Initialize the database connection pool (call this once at bot startup)."""
-        if cls.__pool is None:
+    async def Init(cls, pool=None):
+        """
+        Initialize the database connection pool (call this once at bot startup). A given
+        pool is used instead of connecting, e.g. a stand-in of the benchmarks.
+        """
+        if pool is not None:
+            cls.__pool = pool
+        elif cls.__pool is None:
             cls.__pool = await aiomysql.create_pool(host=os.getenv("MYSQL_HOST"),
                                                     port=int(os.getenv("MYSQL_PORT")),
                                                     user=os.getenv("MYSQL_USER"),
@@ -35,16 +80,56 @@ class Database:
         """Get the existing pool, ensuring it is initialized."""
         return cls.__pool
 
+    @classmethod
+    async def __Acquire(cls, pool):
+        startTime = time.perf_counter()
+        conn = await pool.acquire()
+        _POOL_WAIT_SECONDS.Observe(time.perf_counter() - startTime)
+        return conn
+
+    @staticmethod
+    async def __GetCursor(conn):
+        cursor = await conn.cursor()
+        return _TimedCursor(cursor) if _QUERY_SECONDS.enabled else cursor
+
     @classmethod
     @asynccontextmanager
     async def GetCursor(cls):
         """Get a cursor from the pool and close it automatically."""
         pool = cls.Get()
-        conn = await pool.acquire()
+        conn = await cls.__Acquire(pool)
+        try:
+            cursor = await cls.__GetCursor(conn)
+            try:
+                yield cursor
+            finally:
+                await cursor.close()
+        finally:
+            pool.release(conn)
+
+    @classmethod
+    async def GetAutoIncrementIncrement(cls, cursor) -> int:
+        """Get the step between generated auto-increment IDs, read from the server once."""
+        if cls.__autoIncrementIncrement is None:
+            await cursor.execute("SELECT @@auto_increment_increment")
+            cls.__autoIncrementIncrement = int((await cursor.fetchone())[0])
+        return cls.__autoIncrementIncrement
+
+    @classmethod
+    @asynccontextmanager
+    async def GetTransaction(cls):
+        """Get a cursor within a transaction, committed on success and rolled back on an error."""
+        pool = cls.Get()
+        conn = await cls.__Acquire(pool)
         try:
-            cursor = await conn.cursor()
+            await conn.begin()
+            cursor = await cls.__GetCursor(conn)
             try:
                 yield cursor
+                await conn.commit()
+            except BaseException:
+                await conn.rollback()
+                raise
             finally:
                 await cursor.close()
         finally:
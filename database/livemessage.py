@@ -0,0 +1,28 @@
+from .basemodel import BaseModel
+from enum import Enum
+
+class LiveMessage(BaseModel):
+    class Status(Enum):
+        LIVE = 0
+        CLOSED = 1
+
+    """LiveMessage model mapped to the 'live_message' table in MySQL, a Telegram message that is kept up to date by editing it."""
+    _tableName = "live_message"
+    _fieldDefinitions = {
+        "id": "BIGINT AUTO_INCREMENT PRIMARY KEY",
+        # NULL for a status overview of all open calls
+        "callId": "BIGINT NULL",
+        "chatId": "BIGINT NOT NULL",
+        "messageId": "BIGINT NOT NULL",
+        # The page shown by an overview of all open calls
+        "view": "VARCHAR(30) DEFAULT NULL",
+        "createdAt": "DATETIME DEFAULT CURRENT_TIMESTAMP",
+        "status": "ENUM('live', 'closed') NOT NULL DEFAULT 'live'"
+    }
+    _indexDefinitions = {
+        # Loading the live messages on startup
+        "status": "status",
+    }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
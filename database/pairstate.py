@@ -0,0 +1,16 @@
+from .basemodel import BaseModel
+
+class PairState(BaseModel):
+
+    """PairState model mapped to the 'pair_state' table in MySQL, tracks the last processed candle of a monitored pair."""
+    _tableName = "pair_state"
+    _fieldDefinitions = {
+        "id": "BIGINT AUTO_INCREMENT PRIMARY KEY",
+        "exchange": "VARCHAR(30) NOT NULL",
+        "pair": "VARCHAR(30) NOT NULL",
+        "lastCandleAt": "DATETIME DEFAULT NULL",
+    }
+    _additionalFieldDefinitions = ", UNIQUE KEY exchange_pair (exchange, pair)"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
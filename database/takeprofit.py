@@ -13,6 +13,12 @@ class TakeProfit(BaseModel):
         "result": "DECIMAL(20, 10) DEFAULT '0.0'",
         "triggeredAt": "DATETIME DEFAULT NULL",
     }
+    _indexDefinitions = {
+        "callId": "callId",
+    }
+    _constraintDefinitions = {
+        "takeprofit_call": "FOREIGN KEY (callId) REFERENCES crypto_call(id) ON DELETE CASCADE",
+    }
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
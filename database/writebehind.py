@@ -0,0 +1,105 @@
+import os
+import asyncio
+from .database import Database
+from telemetry import Logger
+
+_logger = Logger.Get("database")
+
+
+class WriteBehind:
+    """
+    Write-behind queue for changed models.
+
+    Changed models are queued instead of written right away. Several changes to the
+    same row are coalesced into a single UPDATE, and the queue is flushed in a single
+    transaction every flush interval or as soon as the flush size is reached.
+    """
+    __flushInterval = float(os.getenv('MYSQL_FLUSH_INTERVAL', '1.0'))
+    __flushSize = int(os.getenv('MYSQL_FLUSH_SIZE', '100'))
+    __pending = {}  # (table name, id) -> list of model instances
+    __lock = None
+    __wakeup = None
+    __task = None
+    __stopping = False
+
+    @classmethod
+    def Start(cls):
+        """Start flushing the queue in the background."""
+        if cls.__task is None:
+            cls.__stopping = False
+            cls.__lock = asyncio.Lock()
+            cls.__wakeup = asyncio.Event()
+            cls.__task = asyncio.create_task(cls.__Run())
+
+    @classmethod
+    async def Stop(cls):
+        """Stop the background flushing and write everything that is still queued."""
+        if cls.__task is not None:
+            # The flag ends the loop, a cancel can be swallowed by the wait_for of a
+            # wakeup that fired at the same time
+            cls.__stopping = True
+            cls.__wakeup.set()
+            try:
+                await cls.__task
+            except asyncio.CancelledError:
+                pass
+            cls.__task = None
+        await cls.Flush()
+
+    @classmethod
+    def Enqueue(cls, *models):
+        """Queue changed models to be written with the next flush."""
+        for model in models:
+            instances = cls.__pending.setdefault((model._tableName, model.id), [])
+            if not any(instance is model for instance in instances):
+                instances.append(model)
+        if cls.__wakeup is not None and len(cls.__pending) >= cls.__flushSize:
+            cls.__wakeup.set()
+
+    @classmethod
+    async def Persist(cls, *models, wait: bool = False):
+        """
+        Queue changed models, when wait is set return only after they have been written.
+        """
+        cls.Enqueue(*models)
+        if wait:
+            await cls.Flush()
+
+    @classmethod
+    async def Flush(cls):
+        """Write all queued changes in a single transaction."""
+        if cls.__lock is None:
+            cls.__lock = asyncio.Lock()
+        async with cls.__lock:
+            if not cls.__pending:
+                return
+            pending, cls.__pending = cls.__pending, {}
+            models = [model for instances in pending.values() for model in instances]
+            changes = [(model, model._GetChanges()) for model in models]
+            changes = [(model, changedFields) for model, changedFields in changes if changedFields]
+            try:
+                if changes:
+                    async with Database.GetTransaction() as cursor:
+                        for model, changedFields in changes:
+                            await model._SaveChanges(cursor, changedFields)
+            except BaseException:
+                # Queue the models again so the changes are written with a later flush
+                cls.Enqueue(*models)
+                raise
+            for model, changedFields in changes:
+                model._MarkSaved(changedFields)
+
+    @classmethod
+    async def __Run(cls):
+        while not cls.__stopping:
+            try:
+                await asyncio.wait_for(cls.__wakeup.wait(), cls.__flushInterval)
+            except asyncio.TimeoutError:
+                pass
+            cls.__wakeup.clear()
+            try:
+                await cls.Flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                _logger.exception("Error flushing the write-behind queue")
@@ -0,0 +1,9 @@
+import os
+
+
+def GetBool(name: str, default: bool) -> bool:
+    """Read a boolean environment variable, the default when it is unset or empty."""
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
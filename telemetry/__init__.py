@@ -0,0 +1,5 @@
+from .telemetrysettings import TelemetrySettings
+from .metrics import Metrics
+from .logger import Logger
+
+__all__ = ["TelemetrySettings", "Metrics", "Logger"]
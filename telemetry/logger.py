@@ -0,0 +1,105 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+from datetime import datetime
+
+from .telemetrysettings import TelemetrySettings
+
+# Attributes of every LogRecord, the others were given as structured fields with extra
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue the records for the writer thread. Only the message is formatted here, as its
+    arguments may change after the call, the rest of the formatting is left to the writer.
+    """
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            # The traceback refers to the frames of the event loop, format it now
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class _StructuredFormatter(logging.Formatter):
+    """A line of text or a JSON object per record, with the structured fields of the record."""
+    def __init__(self, asJson: bool):
+        super().__init__()
+        self.__asJson = asJson
+
+    def format(self, record) -> str:
+        fields = {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+        time = datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds")
+        if self.__asJson:
+            entry = {"time": time, "level": record.levelname, "logger": record.name, "message": record.getMessage()}
+            entry.update(fields)
+            if record.exc_text:
+                entry["exception"] = record.exc_text
+            return json.dumps(entry, default=str)
+        line = f"{time} {record.levelname:<7} {record.name}: {record.getMessage()}"
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+
+class Logger:
+    """
+    Loggers per subsystem, e.g. Logger.Get("crypto"), that don't block the event loop.
+
+    Records are put on a queue and written by a background thread, so a slow stdout never
+    stalls the loop. Messages take their arguments %-style, they are only formatted when
+    the level of the logger is enabled. Structured fields are given with extra, e.g.
+    extra={"pair": pair}, and written as key=value or as JSON fields with LOG_FORMAT=json.
+    """
+    ROOT = "cryptocallbot"
+    __listener = None
+    __writer = None
+
+    @classmethod
+    def Get(cls, subsystem: str) -> logging.Logger:
+        cls.Start()
+        return logging.getLogger(f"{cls.ROOT}.{subsystem}")
+
+    @classmethod
+    def Start(cls, stream=None):
+        """
+        Start the writer thread, writing to stdout unless another stream is given. When
+        it was started already, a given stream replaces the stream it writes to.
+        """
+        if cls.__listener is not None:
+            if stream is not None:
+                cls.__writer.setStream(stream)
+            return
+        records = queue.SimpleQueue()
+        cls.__writer = logging.StreamHandler(stream or sys.stdout)
+        cls.__writer.setFormatter(_StructuredFormatter(TelemetrySettings.GetLogFormat() == "json"))
+        cls.__listener = logging.handlers.QueueListener(records, cls.__writer)
+        cls.__listener.start()
+
+        root = logging.getLogger(cls.ROOT)
+        root.setLevel(TelemetrySettings.GetLogLevel())
+        root.propagate = False
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(_QueueHandler(records))
+        for subsystem, level in TelemetrySettings.GetLogLevels().items():
+            logging.getLogger(f"{cls.ROOT}.{subsystem}").setLevel(level)
+        atexit.register(cls.Stop)
+
+    @classmethod
+    def Stop(cls):
+        """Write the queued records and stop the writer thread."""
+        if cls.__listener is not None:
+            cls.__listener.stop()
+            cls.__listener = None
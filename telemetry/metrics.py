@@ -0,0 +1,342 @@
+import asyncio
+import bisect
+import itertools
+from abc import ABC, abstractmethod
+from typing import Callable, List, Sequence
+
+from .telemetrysettings import TelemetrySettings
+from .logger import Logger
+
+_logger = Logger.Get("telemetry")
+
+# Seconds, from a tick evaluation up to a slow database or Telegram request
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _FormatValue(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _FormatLabels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for value in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+class _NullMetric:
+    """Stand-in for every metric when metrics are disabled, all updates are ignored."""
+    enabled = False
+
+    def Labels(self, *values):
+        return self
+
+    def Inc(self, amount: float = 1):
+        pass
+
+    def Dec(self, amount: float = 1):
+        pass
+
+    def Set(self, value: float):
+        pass
+
+    def SetFunction(self, function: Callable[[], float]):
+        pass
+
+    def Observe(self, value: float):
+        pass
+
+
+class _Metric(ABC):
+    """
+    A metric with a child per combination of label values. The child of a combination is
+    created on first use, hot paths keep the child instead of looking it up every time.
+    """
+    enabled = True
+    TYPE = None
+
+    def __init__(self, name: str, documentation: str, labelNames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelNames = tuple(labelNames)
+        self._children = {}
+
+    def Labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelNames):
+                raise ValueError(f"Metric {self.name} has the labels {self.labelNames}, got {values}.")
+            child = self._children[values] = self._CreateChild()
+        return child
+
+    @abstractmethod
+    def _CreateChild(self):
+        """Create the child of a combination of label values."""
+
+    def Copy(self) -> "_Metric":
+        """An empty metric with the same name, documentation and labels."""
+        return type(self)(self.name, self.documentation, self.labelNames)
+
+    def Merge(self, other: "_Metric"):
+        """Add the values of the children of another instance of the metric, e.g. of another process."""
+        for values, child in list(other._children.items()):
+            self.Labels(*values).Merge(child)
+
+    def Render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.TYPE}"]
+        for values, child in list(self._children.items()):
+            lines.extend(child.Render(self.name, self.labelNames, values))
+        return lines
+
+    # Metrics without labels are updated directly
+
+    def Inc(self, amount: float = 1):
+        self.Labels().Inc(amount)
+
+    def Set(self, value: float):
+        self.Labels().Set(value)
+
+    def SetFunction(self, function: Callable[[], float]):
+        self.Labels().SetFunction(function)
+
+    def Observe(self, value: float):
+        self.Labels().Observe(value)
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def Inc(self, amount: float = 1):
+        self.value += amount
+
+    def Merge(self, other: "_CounterChild"):
+        self.value += other.value
+
+    def Render(self, name, labelNames, values):
+        return [f"{name}{_FormatLabels(labelNames, values)} {_FormatValue(self.value)}"]
+
+
+class Counter(_Metric):
+    TYPE = "counter"
+
+    def _CreateChild(self):
+        return _CounterChild()
+
+
+class _GaugeChild:
+    __slots__ = ("value", "function")
+
+    def __init__(self):
+        self.value = 0
+        self.function = None
+
+    def Inc(self, amount: float = 1):
+        self.value += amount
+
+    def Dec(self, amount: float = 1):
+        self.value -= amount
+
+    def Set(self, value: float):
+        self.value = value
+
+    def SetFunction(self, function: Callable[[], float]):
+        """Read the value when the metrics are rendered, e.g. the size of a queue."""
+        self.function = function
+
+    def Get(self) -> float:
+        return self.value if self.function is None else self.function()
+
+    def Merge(self, other: "_GaugeChild"):
+        # The gauges of several processes add up, e.g. the sizes of their queues
+        self.value += other.Get()
+
+    def Render(self, name, labelNames, values):
+        return [f"{name}{_FormatLabels(labelNames, values)} {_FormatValue(self.Get())}"]
+
+
+class Gauge(_Metric):
+    TYPE = "gauge"
+
+    def _CreateChild(self):
+        return _GaugeChild()
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def Observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def Merge(self, other: "_HistogramChild"):
+        self.counts = [count + otherCount for count, otherCount in zip(self.counts, other.counts)]
+        self.sum += other.sum
+        self.count += other.count
+
+    def Render(self, name, labelNames, values):
+        lines = []
+        cumulative = 0
+        bucketLabels = labelNames + ("le",)
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_FormatLabels(bucketLabels, values + (_FormatValue(bound),))} {cumulative}")
+        labels = _FormatLabels(labelNames, values)
+        lines.append(f"{name}_sum{labels} {_FormatValue(self.sum)}")
+        lines.append(f"{name}_count{labels} {self.count}")
+        return lines
+
+
+class Histogram(_Metric):
+    TYPE = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelNames: Sequence[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelNames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _CreateChild(self):
+        return _HistogramChild(self.buckets)
+
+    def Copy(self) -> "Histogram":
+        return Histogram(self.name, self.documentation, self.labelNames, self.buckets)
+
+
+class Metrics:
+    """
+    Registry of the metrics, served in the Prometheus text format on a local endpoint.
+
+    Metrics are created when their module is imported. When metrics are disabled every
+    metric is the same object that ignores all updates, so instrumented code only pays
+    for an empty method call. Hot paths can check the enabled attribute of a metric to
+    skip taking the time as well.
+
+    Other processes, e.g. the exchange workers, send snapshots of their metrics, which are
+    added to the metrics of this process when they are rendered. The counters and
+    histograms of a process that exited are kept, so they don't go back on a restart.
+    """
+    __metrics = {}
+    __snapshots = {}  # source -> metrics of another process
+    __retired = {}  # name -> counters and histograms of the processes that exited
+    __server = None
+    __NULL = _NullMetric()
+
+    @classmethod
+    def IsEnabled(cls) -> bool:
+        return TelemetrySettings.IsMetricsEnabled()
+
+    @classmethod
+    def __Register(cls, metricType, name: str, *args, **kwargs):
+        if not cls.IsEnabled():
+            return cls.__NULL
+        metric = cls.__metrics.get(name)
+        if metric is None:
+            metric = cls.__metrics[name] = metricType(name, *args, **kwargs)
+        elif not isinstance(metric, metricType):
+            raise ValueError(f"Metric {name} is already registered as a {metric.TYPE}.")
+        return metric
+
+    @classmethod
+    def Counter(cls, name: str, documentation: str, labelNames: Sequence[str] = ()):
+        return cls.__Register(Counter, name, documentation, labelNames)
+
+    @classmethod
+    def Gauge(cls, name: str, documentation: str, labelNames: Sequence[str] = ()):
+        return cls.__Register(Gauge, name, documentation, labelNames)
+
+    @classmethod
+    def Histogram(cls, name: str, documentation: str, labelNames: Sequence[str] = (), buckets=LATENCY_BUCKETS):
+        return cls.__Register(Histogram, name, documentation, labelNames, buckets=buckets)
+
+    @classmethod
+    def Snapshot(cls) -> List[_Metric]:
+        """Copy of the values of all metrics, to send them to another process."""
+        snapshot = []
+        for metric in list(cls.__metrics.values()):
+            if metric._children:
+                copy = metric.Copy()
+                copy.Merge(metric)
+                snapshot.append(copy)
+        return snapshot
+
+    @classmethod
+    def AddSnapshot(cls, source: str, snapshot: List[_Metric]):
+        """Serve the metrics of another process, replacing its previous snapshot."""
+        if cls.IsEnabled():
+            cls.__snapshots[source] = snapshot
+
+    @classmethod
+    def RetireSnapshot(cls, source: str):
+        """The process exited, its counters and histograms are kept and its gauges dropped."""
+        for metric in cls.__snapshots.pop(source, ()):
+            if isinstance(metric, Gauge):
+                continue
+            retired = cls.__retired.get(metric.name)
+            if retired is None:
+                retired = cls.__retired[metric.name] = metric.Copy()
+            retired.Merge(metric)
+
+    @classmethod
+    def Render(cls) -> str:
+        metrics = list(cls.__metrics.values())
+        if cls.__snapshots or cls.__retired:
+            merged = {}
+            for metric in itertools.chain(metrics, cls.__retired.values(), *cls.__snapshots.values()):
+                target = merged.get(metric.name)
+                if target is None:
+                    target = merged[metric.name] = metric.Copy()
+                target.Merge(metric)
+            metrics = merged.values()
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.Render())
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    async def Start(cls):
+        """Serve the metrics on the metrics endpoint, when metrics are enabled."""
+        if not cls.IsEnabled() or cls.__server is not None:
+            return
+        host, port = TelemetrySettings.GetMetricsHost(), TelemetrySettings.GetMetricsPort()
+        cls.__server = await asyncio.start_server(cls.__HandleRequest, host, port)
+        _logger.info("Serving metrics on http://%s:%s/metrics", host, port)
+
+    @classmethod
+    async def Stop(cls):
+        if cls.__server is not None:
+            cls.__server.close()
+            await cls.__server.wait_closed()
+            cls.__server = None
+
+    @classmethod
+    async def __HandleRequest(cls, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            requestLine = await asyncio.wait_for(reader.readline(), 5)
+            # Skip the headers
+            while (await asyncio.wait_for(reader.readline(), 5)).strip():
+                pass
+            parts = requestLine.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+                status, contentType, body = "200 OK", "text/plain; version=0.0.4; charset=utf-8", cls.Render()
+            else:
+                status, contentType, body = "404 Not Found", "text/plain; charset=utf-8", "Not found, use /metrics\n"
+            body = body.encode("utf-8")
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: {contentType}\r\nContent-Length: {len(body)}\r\n"
+                         f"Connection: close\r\n\r\n".encode("latin-1") + body)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        except Exception:
+            _logger.exception("Error serving the metrics")
+        finally:
+            writer.close()
@@ -0,0 +1,49 @@
+from dotenv import load_dotenv
+import os
+from envsettings import GetBool
+
+load_dotenv()
+
+
+class TelemetrySettings:
+    __metricsEnabled = GetBool('METRICS_ENABLED', False)
+    __metricsHost = os.getenv('METRICS_HOST', '127.0.0.1')
+    __metricsPort = int(os.getenv('METRICS_PORT', '9108'))
+    __logLevel = os.getenv('LOG_LEVEL', 'INFO').strip().upper()
+    __logLevels = os.getenv('LOG_LEVELS', '')
+    __logFormat = os.getenv('LOG_FORMAT', 'text').strip().lower()
+
+    @classmethod
+    def IsMetricsEnabled(cls) -> bool:
+        """Collect metrics and serve them on the metrics endpoint."""
+        return cls.__metricsEnabled
+
+    @classmethod
+    def GetMetricsHost(cls) -> str:
+        """Address the metrics endpoint listens on, only local by default."""
+        return cls.__metricsHost
+
+    @classmethod
+    def GetMetricsPort(cls) -> int:
+        """Port of the metrics endpoint."""
+        return cls.__metricsPort
+
+    @classmethod
+    def GetLogLevel(cls) -> str:
+        """Level of the log messages that are written, e.g. DEBUG, INFO or WARNING."""
+        return cls.__logLevel
+
+    @classmethod
+    def GetLogLevels(cls) -> dict:
+        """Levels per subsystem, given as e.g. database=DEBUG,crypto=WARNING."""
+        levels = {}
+        for entry in cls.__logLevels.split(","):
+            if "=" in entry:
+                subsystem, level = entry.split("=", 1)
+                levels[subsystem.strip()] = level.strip().upper()
+        return levels
+
+    @classmethod
+    def GetLogFormat(cls) -> str:
+        """Format of the log lines, text or json."""
+        return cls.__logFormat